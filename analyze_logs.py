@@ -0,0 +1,47 @@
+import argparse
+import json
+import time
+
+from judgement.env import JudgementEnv
+from judgement.agents import BASELINE_AGENTS
+from judgement.analytics import RoundLogWriter, chunk_paths, analyze, build_report, format_report
+
+def simulate(args):
+    """Record baseline games, e.g. as a reference report for checkpoints"""
+    env = JudgementEnv({'starting_set_cards': args.cards, 'allow_step_back': False, 'seed': args.seed})
+    agent = BASELINE_AGENTS[args.simulate_agent](num_actions=env.num_actions)
+    env.set_agents([agent] * env.num_players)
+    writer = RoundLogWriter(args.logs[0])
+    start = time.time()
+    for _ in range(args.simulate):
+        env.run(is_training=False)
+        writer.add_game(env.game.round_log)
+    writer.close()
+    print(f"Recorded {args.simulate} {args.simulate_agent} games in {time.time() - start:.1f}s to {args.logs[0]}")
+
+def report(args):
+    paths = [path for log in args.logs for path in chunk_paths(log)]
+    start = time.time()
+    result = build_report(analyze(paths, num_workers=args.workers))
+    print(f"Analyzed {len(paths)} chunks in {time.time() - start:.1f}s")
+    print(format_report(result))
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"Report saved to {args.out}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Vectorized statistics over recorded Judgement rounds")
+    parser.add_argument('--logs', type=str, nargs='+', required=True,
+                        help="round log directories (train_nfsp.py --round_log_dir) or chunk files")
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--out', type=str, default='', help="write the report as JSON")
+    parser.add_argument('--simulate', type=int, default=0, help="first record this many baseline games into --logs")
+    parser.add_argument('--simulate_agent', type=str, default='random', choices=sorted(BASELINE_AGENTS))
+    parser.add_argument('--cards', type=int, default=13)
+    parser.add_argument('--seed', type=int, default=42)
+
+    args = parser.parse_args()
+    if args.simulate:
+        simulate(args)
+    report(args)
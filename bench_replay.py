@@ -0,0 +1,56 @@
+import argparse
+import time
+import numpy as np
+
+from judgement.prioritized_replay import SumTree, PrioritizedMemory
+
+def bench_tree(capacity, batch_size, repeats, rng):
+    tree = SumTree(capacity)
+    tree.update(np.arange(capacity), rng.random(capacity))
+    start = time.perf_counter()
+    for _ in range(repeats):
+        tree.sample(batch_size, rng)
+    sample = (time.perf_counter() - start) / repeats
+    start = time.perf_counter()
+    for _ in range(repeats):
+        tree.update(rng.integers(0, capacity, batch_size), rng.random(batch_size))
+    update = (time.perf_counter() - start) / repeats
+    return sample, update
+
+def bench_memory(capacity, batch_size, obs_size, repeats, rng):
+    memory = PrioritizedMemory(capacity, batch_size, seed=0)
+    memory.save(np.zeros(obs_size), 0, 0.0, np.zeros(obs_size), [0], False)
+    # Fill the ring directly, saving a million transitions one by one only measures Python
+    memory.size = capacity
+    memory.legal_actions = [[0, 1]] * capacity
+    memory.tree.update(np.arange(capacity), rng.random(capacity))
+    start = time.perf_counter()
+    for _ in range(repeats):
+        memory.sample(0.4)
+        memory.update_priorities(memory.last_indices, rng.standard_normal(batch_size))
+    return (time.perf_counter() - start) / repeats
+
+def run(args):
+    rng = np.random.default_rng(args.seed)
+    capacities = [int(c) for c in args.capacities.split(',')]
+    print(f"Sum-tree replay, batch {args.batch_size}, {args.repeats} batches per capacity")
+    for capacity in capacities:
+        sample, update = bench_tree(capacity, args.batch_size, args.repeats, rng)
+        line = f"  >> capacity {capacity:>9d}: sample {sample * 1e6:7.1f}us | update {update * 1e6:7.1f}us"
+        if capacity <= args.max_memory_capacity:
+            full = bench_memory(capacity, args.batch_size, args.obs_size, args.repeats, rng)
+            line += f" | memory sample+update {full * 1e6:7.1f}us"
+        print(line)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Prioritized replay sampling cost against capacity")
+    parser.add_argument('--capacities', type=str, default='10000,100000,1000000,4000000')
+    parser.add_argument('--batch_size', type=int, default=256)
+    parser.add_argument('--repeats', type=int, default=200)
+    parser.add_argument('--obs_size', type=int, default=227)
+    parser.add_argument('--max_memory_capacity', type=int, default=1000000,
+                        help="largest capacity to also benchmark with full transition storage (2 x capacity x obs_size floats)")
+    parser.add_argument('--seed', type=int, default=0)
+
+    args = parser.parse_args()
+    run(args)
@@ -0,0 +1,24 @@
+import argparse
+import time
+import numpy as np
+
+from judgement.bidding import build_table, save_table, DEFAULT_TABLE_PATH
+
+def build(args):
+    start = time.time()
+    counts = build_table(args.games, starting_set_cards=args.cards, seed=args.seed)
+    save_table(counts, args.out)
+    sampled = np.count_nonzero(counts.sum(axis=-1))
+    print(f"Played {args.games} games in {time.time() - start:.1f}s")
+    print(f"  >> {int(counts.sum())} hands over {sampled} (num_cards, seat, bucket) cells")
+    print(f"Table saved to {args.out}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Build the Judgement bidding lookup table")
+    parser.add_argument('--games', type=int, default=20000)
+    parser.add_argument('--cards', type=int, default=13)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', type=str, default=DEFAULT_TABLE_PATH)
+
+    args = parser.parse_args()
+    build(args)
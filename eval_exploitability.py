@@ -0,0 +1,36 @@
+import argparse
+import json
+import time
+
+from judgement.agents import BASELINE_AGENTS
+from judgement.exploitability import exploitability
+
+def evaluate(args):
+    policy = BASELINE_AGENTS[args.policy](num_actions=66) if args.policy in BASELINE_AGENTS else args.policy
+    start = time.time()
+    result = exploitability(policy, starting_set_cards=args.cards, num_hands=args.hands,
+                            deals_per_hand=args.deals_per_hand, num_workers=args.workers, seed=args.seed)
+    print(f"Best responses for {args.policy} on {args.cards} cards in {time.time() - start:.1f}s")
+    for seat, (br, value) in enumerate(zip(result['br_value'], result['policy_value'])):
+        print(f"  >> Seat {seat}: BR {br:.3f} | policy {value:.3f} | gain {br - value:.3f}")
+    print(f"  >> NashConv: {result['nash_conv']:.3f} | Exploitability: {result['exploitability']:.3f}")
+    if args.out:
+        # One JSON line per run, so a periodic job can keep appending to the same file
+        with open(args.out, 'a') as f:
+            f.write(json.dumps(dict(result, policy=args.policy, cards=args.cards, hands=args.hands,
+                                     deals_per_hand=args.deals_per_hand, time=time.time())) + '\n')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Sampled best response / exploitability on small Judgement games")
+    parser.add_argument('--policy', type=str, required=True,
+                        help="random, follow_low, bid_tracking, an NFSP .pth checkpoint or an .npz export/MCCFR table")
+    parser.add_argument('--cards', type=int, default=1)
+    parser.add_argument('--hands', type=int, default=32)
+    parser.add_argument('--deals_per_hand', type=int, default=16,
+                        help="deals of the other hands per responder hand, more means less upward bias")
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', type=str, default='')
+
+    args = parser.parse_args()
+    evaluate(args)
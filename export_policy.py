@@ -0,0 +1,110 @@
+import argparse
+import sys
+import time
+import numpy as np
+import torch
+
+from rlcard.agents.nfsp_agent import NFSPAgent
+from rlcard.agents.random_agent import RandomAgent
+from rlcard.utils.utils import remove_illegal
+from judgement.env import JudgementEnv
+from judgement.frozen_policy import FrozenPolicy
+from judgement.policy_export import export_numpy, export_torchscript
+
+def collect_states(num_games, cards, seed):
+    """Observations met in random play, used as the benchmark workload"""
+    env = JudgementEnv({'allow_step_back': False, 'starting_set_cards': cards, 'seed': seed})
+    agent = RandomAgent(num_actions=env.num_actions)
+    states = []
+    for _ in range(num_games):
+        state, _ = env.reset()
+        while not env.is_over():
+            states.append(state)
+            state, _ = env.step(agent.step(state))
+    return states
+
+def legal_masks(states, num_actions):
+    masks = np.zeros((len(states), num_actions), dtype=bool)
+    for i, state in enumerate(states):
+        masks[i, list(state['legal_actions'])] = True
+    return masks
+
+def benchmark(args):
+    torch.set_num_threads(args.threads)
+    checkpoint = torch.load(args.checkpoint, map_location='cpu', weights_only=False)
+    agent = NFSPAgent.from_checkpoint(checkpoint)
+    agent.set_device(torch.device('cpu'))
+    states = collect_states(args.games, args.cards, args.seed)
+    obs = np.stack([s['obs'] for s in states]).astype(np.float32)
+    masks = legal_masks(states, agent._num_actions)
+
+    if args.format == 'numpy':
+        policy = FrozenPolicy.load(args.out)
+        single = lambda i: policy.probs(obs[i:i + 1], masks[i:i + 1])
+        batch = lambda o, m: policy.probs(o, m)
+    else:
+        policy = torch.jit.load(args.out)
+        def single(i):
+            with torch.no_grad():
+                return policy(torch.from_numpy(obs[i:i + 1]), torch.from_numpy(masks[i:i + 1]))
+        def batch(o, m):
+            with torch.no_grad():
+                return policy(torch.from_numpy(o), torch.from_numpy(m)).numpy()
+
+    n = min(len(states), args.latency_samples)
+    start = time.perf_counter()
+    for i in range(n):
+        agent.eval_step(states[i])
+    original_latency = (time.perf_counter() - start) / n
+    start = time.perf_counter()
+    for i in range(n):
+        single(i)
+    frozen_latency = (time.perf_counter() - start) / n
+
+    # Batch throughput: original network + masking vs frozen export
+    start = time.perf_counter()
+    with torch.no_grad():
+        for lo in range(0, len(obs), args.batch_size):
+            log_probs = agent.policy_network(torch.from_numpy(obs[lo:lo + args.batch_size])).numpy()
+            np.where(masks[lo:lo + args.batch_size], np.exp(log_probs), 0.0)
+    original_throughput = len(obs) / (time.perf_counter() - start)
+    start = time.perf_counter()
+    frozen_probs = []
+    for lo in range(0, len(obs), args.batch_size):
+        frozen_probs.append(batch(obs[lo:lo + args.batch_size], masks[lo:lo + args.batch_size]))
+    frozen_throughput = len(obs) / (time.perf_counter() - start)
+    frozen_probs = np.concatenate(frozen_probs)
+
+    original_actions = np.array([np.argmax(remove_illegal(agent._act(o), list(s['legal_actions'])))
+                                 for o, s in zip(obs, states)])
+    agreement = float(np.mean(original_actions == np.argmax(frozen_probs, axis=-1)))
+
+    print(f"Benchmark on {len(states)} observations ({args.threads} threads)")
+    print(f"  >> Single obs latency: original {original_latency * 1e6:.1f}us | frozen {frozen_latency * 1e6:.1f}us")
+    print(f"  >> Batch throughput ({args.batch_size}): original {original_throughput:.0f}/s | frozen {frozen_throughput:.0f}/s")
+    print(f"  >> Greedy action agreement: {agreement:.4f} (tolerance {args.min_agreement})")
+    return agreement >= args.min_agreement
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Export a frozen Judgement average policy")
+    parser.add_argument('--checkpoint', type=str, required=True)
+    parser.add_argument('--out', type=str, required=True)
+    parser.add_argument('--format', type=str, default='numpy', choices=['numpy', 'torchscript'])
+    parser.add_argument('--quantize', action='store_true')
+    parser.add_argument('--benchmark', action='store_true')
+    parser.add_argument('--games', type=int, default=20)
+    parser.add_argument('--cards', type=int, default=13)
+    parser.add_argument('--batch_size', type=int, default=256)
+    parser.add_argument('--latency_samples', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--min_agreement', type=float, default=0.99)
+    parser.add_argument('--seed', type=int, default=42)
+
+    args = parser.parse_args()
+    if args.format == 'numpy':
+        export_numpy(args.checkpoint, args.out, quantize=args.quantize)
+    else:
+        export_torchscript(args.checkpoint, args.out, quantize=args.quantize)
+    print(f"Exported {args.checkpoint} to {args.out}")
+    if args.benchmark and not benchmark(args):
+        sys.exit(1)
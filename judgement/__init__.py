@@ -1,7 +1,28 @@
-"""Judgement (Oh Hell) Card Game for RLCard"""
+"""
+Judgement (Oh Hell) Card Game for RLCard
 
-from .game import JudgementGame
-from .env import JudgementEnv
-from .card import JudgementCard
-from .player import JudgementPlayer
-from .dealer import JudgementDealer
+Submodules are imported on first use, so `from judgement.game import JudgementGame`
+does not pull in rlcard (only judgement.env and the tools built on it do).
+"""
+
+import importlib
+
+_LAZY_ATTRS={
+    'JudgementGame':'.game',
+    'JudgementEnv':'.env',
+    'JudgementCard':'.card',
+    'JudgementPlayer':'.player',
+    'JudgementDealer':'.dealer',
+}
+
+__all__=list(_LAZY_ATTRS)
+
+def __getattr__(name:str):
+    if name in _LAZY_ATTRS:
+        value=getattr(importlib.import_module(_LAZY_ATTRS[name],__name__),name)
+        globals()[name]=value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals())|set(__all__))
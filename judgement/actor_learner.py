@@ -0,0 +1,293 @@
+"""
+Asynchronous actor/learner training for NFSP agents
+
+Actors are separate processes that play self-play episodes with a (possibly
+stale) CPU snapshot of every agent's networks and push the experience into a
+bounded queue. The learner (the calling process) owns the real NFSPAgents and
+keeps running Q-network and average-policy updates on whatever arrives, so
+simulation and SGD overlap instead of alternating.
+
+    - Weights: every publish_every episodes the learner copies its networks into
+      the next slot of a WeightStore (judgement.weight_store) and bumps its
+      version, actors map their networks onto the new slot only when the
+      version changed. Episodes whose slot was reused before they finished
+      are dropped (counted as torn). A slot lives num_slots-1 publishes and
+      an actor's episode spans about num_actors/publish_every of them, so
+      by default the store gets ceil(num_actors/publish_every)+2 slots (at
+      least 4), and a warning is raised once if many episodes still tear
+    - Backpressure: the queue is bounded, actors block on put once the learner
+      falls behind (the time spent blocked is reported)
+    - Staleness: every episode is tagged with the weight version that played it,
+      the learner tracks how many versions behind it was
+"""
+
+from typing import List, Dict, Optional, Callable
+import time
+import queue
+import random
+import warnings
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+from rlcard.agents.nfsp_agent import NFSPAgent, Transition
+from rlcard.utils import reorganize
+from .env import JudgementEnv
+from .weight_store import WeightStore
+
+def _networks(agent:NFSPAgent)->Dict[str,torch.nn.Module]:
+    """Networks the actors need for acting (target net stays with the learner)"""
+    return {'policy':agent.policy_network,'q':agent._rl_agent.q_estimator.qnet}
+
+def _state_arrays(agents:List[NFSPAgent])->Dict[str,np.ndarray]:
+    """Every acting network tensor of every agent, keyed agent.network.tensor"""
+    return {f'{i}.{name}.{k}':v.detach().cpu().numpy()
+            for i,agent in enumerate(agents) for name,net in _networks(agent).items()
+            for k,v in net.state_dict().items()}
+
+def _bind(net:torch.nn.Module,tensors:Dict[str,torch.Tensor]):
+    """Point net's parameters and buffers at tensors instead of copying into them"""
+    for key,tensor in tensors.items():
+        prefix,_,attr=key.rpartition('.')
+        owner=net.get_submodule(prefix) if prefix else net
+        if attr in owner._parameters:
+            owner._parameters[attr].data=tensor
+        else:
+            owner._buffers[attr]=tensor
+
+class SharedWeights:
+    """
+    Versioned copy of every agent's acting networks in a WeightStore
+
+    pull maps the actor's networks onto the newest slot (no copy), so all
+    actors on a host share num_slots copies of the weights. Actors must not
+    modify their networks in place, the writes would land in the store.
+    """
+
+    def __init__(self,agents:List[NFSPAgent],num_slots:int=4):
+        #RL step count per agent rides along as counters, drives the actors' epsilon schedule
+        self.store=WeightStore.create(_state_arrays(agents),num_slots=num_slots,num_counters=len(agents))
+
+    def publish(self,agents:List[NFSPAgent])->int:
+        """Copy the learner's weights in and return the new version"""
+        return self.store.publish(_state_arrays(agents),[agent._rl_agent.total_t for agent in agents])
+
+    def pull(self,agents:List[NFSPAgent],version:int)->int:
+        """Map agents onto the shared weights if they are newer than version, returns the loaded version"""
+        if self.store.version==version:
+            return version
+        version,arrays,rl_steps=self.store.latest()
+        for i,agent in enumerate(agents):
+            for name,net in _networks(agent).items():
+                prefix=f'{i}.{name}.'
+                _bind(net,{k[len(prefix):]:torch.from_numpy(v) for k,v in arrays.items() if k.startswith(prefix)})
+            agent._rl_agent.total_t=int(rl_steps[i])
+        return version
+
+    def intact(self,version:int)->bool:
+        """False once the slot pulled at version has been reused by a newer publish"""
+        return self.store.intact(version)
+
+    def close(self):
+        """Remove the shared weight file (actors must be gone)"""
+        self.store.close()
+
+def _pack_transition(ts)->tuple:
+    """Strip an env transition down to what NFSPAgent.feed reads"""
+    state,action,reward,next_state,done=ts
+    return (state['obs'],int(action),float(reward),next_state['obs'],list(next_state['legal_actions']),bool(done))
+
+def _unpack_transition(packed:tuple)->tuple:
+    obs,action,reward,next_obs,next_legal,done=packed
+    return ({'obs':obs,'legal_actions':{}},action,reward,
+            {'obs':next_obs,'legal_actions':dict.fromkeys(next_legal)},done)
+
+def _drain_reservoir(agent:NFSPAgent)->List[tuple]:
+    """Take the (obs, action) pairs the actor's best response added this episode"""
+    data=[(t.info_state,int(np.argmax(t.action_probs))) for t in agent._reservoir_buffer._data]
+    agent._reservoir_buffer.clear()
+    return data
+
+def actor_loop(actor_id:int,agent_kwargs:Dict,env_config:Dict,weights:SharedWeights,
+               experience,stop,seed:int):
+    """Actor process: play self-play episodes and push them to the experience queue"""
+    torch.set_num_threads(1)
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+    env=JudgementEnv(dict(env_config,seed=seed,allow_step_back=False))
+    agents=[NFSPAgent(**dict(agent_kwargs,state_shape=env.state_shape[i],device=torch.device('cpu')))
+            for i in range(env.num_players)]
+    env.set_agents(agents)
+    version=weights.pull(agents,-1)
+    put_wait=0.0
+    torn=0
+    while not stop.is_set():
+        version=weights.pull(agents,version)
+        for agent in agents:
+            agent.sample_episode_policy()
+        trajectories,payoffs=env.run(is_training=True)
+        if not weights.intact(version):
+            #the learner lapped the slot mid-episode, some moves may have seen mixed weights
+            torn+=1
+            for agent in agents:
+                agent._reservoir_buffer.clear()
+            continue
+        trajectories=reorganize(trajectories,payoffs)
+        episode={
+            'actor_id':actor_id,
+            'version':version,
+            'payoffs':np.asarray(payoffs,dtype=np.float32),
+            'rl':[[_pack_transition(ts) for ts in traj] for traj in trajectories],
+            'sl':[_drain_reservoir(agent) for agent in agents],
+            'round_log':env.game.round_log,
+            'put_wait':put_wait,
+            'torn':torn,
+        }
+        start=time.perf_counter()
+        while not stop.is_set():
+            try:
+                experience.put(episode,timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        put_wait+=time.perf_counter()-start
+
+class ActorLearner:
+    """
+    Runs num_actors actor processes feeding the given (learner side) agents
+
+    agent_kwargs are the NFSPAgent keyword arguments (without state_shape/device)
+    the actors use to build their CPU copies, env_config the JudgementEnv config.
+    num_slots sizes the weight store, None picks it from num_actors and publish_every.
+    """
+
+    #torn episode share above which a run warns (once) that num_slots is too small
+    TORN_WARNING=0.1
+
+    def __init__(self,agents:List[NFSPAgent],agent_kwargs:Dict,env_config:Dict,num_actors:int=2,
+                 queue_size:int=64,publish_every:int=10,seed:int=0,num_slots:Optional[int]=None):
+        self.agents=agents
+        self.agent_kwargs={k:v for k,v in agent_kwargs.items() if k not in ('state_shape','device')}
+        self.env_config={k:v for k,v in env_config.items() if k!='seed'}
+        self.num_actors=num_actors
+        self.publish_every=publish_every
+        self.seed=seed
+        self.ctx=mp.get_context('spawn')
+        if num_slots is None:
+            num_slots=max(4,-(-num_actors//publish_every)+2)
+        self.weights=SharedWeights(agents,num_slots)
+        self.experience=self.ctx.Queue(maxsize=queue_size)
+        self.stop_event=self.ctx.Event()
+        self.actors=[]
+        self.version=self.weights.publish(agents)
+        #metrics
+        self.episodes=0
+        self.transitions=0
+        self.learner_wait=0.0
+        self.staleness_sum=0
+        self.staleness_max=0
+        self.actor_put_wait=[0.0]*num_actors
+        self.actor_torn=[0]*num_actors
+        self.torn_warned=False
+        #rounds of the last consumed episode, for game logs
+        self.last_round_log=[]
+
+    def start(self):
+        """Spawn the actor processes"""
+        self.stop_event.clear()
+        for actor_id in range(self.num_actors):
+            actor=self.ctx.Process(target=actor_loop,daemon=True,args=(
+                actor_id,self.agent_kwargs,self.env_config,self.weights,
+                self.experience,self.stop_event,self.seed+actor_id+1))
+            actor.start()
+            self.actors.append(actor)
+
+    def _next_episode(self)->Dict:
+        start=time.perf_counter()
+        while True:
+            try:
+                episode=self.experience.get(timeout=1.0)
+                break
+            except queue.Empty:
+                if not any(actor.is_alive() for actor in self.actors):
+                    raise RuntimeError("All actor processes exited")
+        self.learner_wait+=time.perf_counter()-start
+        return episode
+
+    def _consume(self,episode:Dict):
+        """Run the NFSP updates for one actor episode"""
+        staleness=self.version-episode['version']
+        self.staleness_sum+=staleness
+        self.staleness_max=max(self.staleness_max,staleness)
+        self.actor_put_wait[episode['actor_id']]=episode['put_wait']
+        self.actor_torn[episode['actor_id']]=episode['torn']
+        self.last_round_log=episode['round_log']
+        for agent,sl_data,rl_data in zip(self.agents,episode['sl'],episode['rl']):
+            for obs,action in sl_data:
+                one_hot=np.zeros(agent._num_actions)
+                one_hot[action]=1
+                agent._reservoir_buffer.add(Transition(info_state=obs,action_probs=one_hot))
+            for packed in rl_data:
+                agent.feed(_unpack_transition(packed))
+                self.transitions+=1
+        self.episodes+=1
+        if self.episodes%self.publish_every==0:
+            self.version=self.weights.publish(self.agents)
+            self._check_torn()
+
+    def _check_torn(self):
+        torn=sum(self.actor_torn)
+        played=self.episodes+torn
+        if self.torn_warned or played<10*self.num_actors or torn<=self.TORN_WARNING*played:
+            return
+        self.torn_warned=True
+        warnings.warn(f"{torn} of {played} actor episodes were torn (weight slot reused mid-episode), "
+                      f"pass a larger num_slots than {self.weights.store.num_slots}",RuntimeWarning)
+
+    def learn(self,num_episodes:int,on_episode:Optional[Callable[[int,np.ndarray],None]]=None):
+        """
+        Consume num_episodes actor episodes
+        on_episode(episode_index, payoffs) is called after each one (e.g. evaluation)
+        """
+        if not self.actors:
+            self.start()
+        for _ in range(num_episodes):
+            episode=self._next_episode()
+            self._consume(episode)
+            if on_episode is not None:
+                on_episode(self.episodes-1,episode['payoffs'])
+
+    def stop(self,timeout:float=10.0):
+        """Stop the actors (draining the queue so none stays blocked on put) and remove the weight file"""
+        self.stop_event.set()
+        deadline=time.time()+timeout
+        while any(actor.is_alive() for actor in self.actors) and time.time()<deadline:
+            try:
+                self.experience.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        for actor in self.actors:
+            if actor.is_alive():
+                actor.terminate()
+            actor.join()
+        self.actors=[]
+        self.weights.close()
+
+    def get_metrics(self)->Dict[str,float]:
+        """Throughput, backpressure and staleness counters"""
+        try:
+            queue_size=self.experience.qsize()
+        except NotImplementedError:
+            queue_size=-1
+        return {
+            'episodes':self.episodes,
+            'transitions':self.transitions,
+            'version':self.version,
+            'queue_size':queue_size,
+            'learner_wait':self.learner_wait,
+            'actor_put_wait':sum(self.actor_put_wait),
+            'staleness_mean':self.staleness_sum/self.episodes if self.episodes else 0.0,
+            'staleness_max':self.staleness_max,
+            'torn_episodes':sum(self.actor_torn),
+            'torn_rate':sum(self.actor_torn)/max(1,self.episodes+sum(self.actor_torn)),
+        }
@@ -0,0 +1,192 @@
+"""
+Rule based baseline agents
+
+Cheap opponents without torch: every decision is a handful of integer bit
+operations on 52-bit card masks (bit i = card index i, so within a suit a
+higher bit is a higher rank). They read the 'raw_state' entry of
+JudgementEnv states and only ever pick from state['legal_actions'], so
+dealer bid restrictions are respected by construction.
+"""
+
+from typing import List, Dict, Tuple
+from abc import ABC, abstractmethod
+from .card import JudgementCard
+
+SUIT_MASKS=[((1<<13)-1)<<(13*s) for s in range(4)]
+FULL_MASK=(1<<52)-1
+HONOR_RANKS=(12,11,10) # A, K, Q
+
+def cards_to_mask(cards:List[JudgementCard])->int:
+    mask=0
+    for card in cards:
+        mask|=1<<card.get_index()
+    return mask
+
+def actions_to_mask(action_ids)->int:
+    """Card mask of the playing actions (14-65) among action_ids"""
+    mask=0
+    for action_id in action_ids:
+        if action_id>=14:
+            mask|=1<<(action_id-14)
+    return mask
+
+def lowest_card(mask:int)->int:
+    return (mask&-mask).bit_length()-1
+
+def highest_card(mask:int)->int:
+    return mask.bit_length()-1
+
+def lowest_rank_card(mask:int,avoid:int=0)->int:
+    """Card of lowest rank across suits, preferring cards outside avoid"""
+    preferred=mask&~avoid
+    if preferred:
+        mask=preferred
+    best=-1
+    for suit_mask in SUIT_MASKS:
+        if mask&suit_mask:
+            card=lowest_card(mask&suit_mask)
+            if best<0 or card%13<best%13:
+                best=card
+    return best
+
+def highest_rank_card(mask:int,avoid:int=0)->int:
+    """Card of highest rank across suits, preferring cards outside avoid"""
+    preferred=mask&~avoid
+    if preferred:
+        mask=preferred
+    best=-1
+    for suit_mask in SUIT_MASKS:
+        if mask&suit_mask:
+            card=highest_card(mask&suit_mask)
+            if best<0 or card%13>best%13:
+                best=card
+    return best
+
+def _above(card:int)->int:
+    """Mask of the cards of the same suit ranked above card"""
+    return SUIT_MASKS[card//13]&~((1<<(card+1))-1)
+
+def winning_mask(legal_mask:int,current_trick:List[Tuple[int,JudgementCard]],trump:int)->int:
+    """Subset of legal_mask that would currently win the trick"""
+    if not current_trick:
+        return legal_mask
+    lead=current_trick[0][1].get_index()//13
+    best=current_trick[0][1].get_index()
+    for _,card in current_trick[1:]:
+        idx=card.get_index()
+        suit=idx//13
+        if suit==best//13 and idx>best:
+            best=idx
+        elif suit==trump and best//13!=trump:
+            best=idx
+    if best//13==trump:
+        return legal_mask&_above(best)
+    wins=legal_mask&_above(best)
+    if lead!=trump:
+        wins|=legal_mask&SUIT_MASKS[trump]
+    return wins
+
+def estimate_tricks(hand_mask:int,trump:int)->float:
+    """Quick trick count: honours, long trumps and short side suits with trumps"""
+    trumps=hand_mask&SUIT_MASKS[trump]
+    num_trumps=bin(trumps).count('1')
+    tricks=0.0
+    for suit in range(4):
+        suit_cards=hand_mask&SUIT_MASKS[suit]
+        length=bin(suit_cards).count('1')
+        for depth,rank in enumerate(HONOR_RANKS):
+            if suit_cards>>(13*suit+rank)&1 and length>depth:
+                # Side suit honours lose value as they get more likely to be trumped
+                tricks+=1.0 if suit==trump else (1.0,0.6,0.2)[depth]
+        if suit!=trump and length<=1 and num_trumps>=2:
+            tricks+=0.5*(2-length)
+    tricks+=max(0,num_trumps-3)
+    return tricks
+
+def dealer_aware_bid(state:Dict,legal_bids:List[int])->int:
+    """
+    Bid closest to the hand estimate among legal bids
+    For the dealer the forbidden total is already missing from legal_bids,
+    ties go to the lower bid.
+    """
+    trump=JudgementCard.SUITS.index(state['trump_suit'])
+    estimate=min(estimate_tricks(cards_to_mask(state['hand']),trump),state['num_cards'])
+    return min(legal_bids,key=lambda b:(abs(b-estimate),b))
+
+class HeuristicAgent(ABC):
+    """
+    Base for the rule based agents
+    Bids with dealer_aware_bid, subclasses implement play_card
+    """
+
+    def __init__(self,num_actions:int=66):
+        self.use_raw=False
+        self.num_actions=num_actions
+
+    @abstractmethod
+    def play_card(self,state:Dict,legal_mask:int,trump:int)->int:
+        """Card index to play from legal_mask"""
+
+    def step(self,state:Dict)->int:
+        raw=state['raw_state']
+        legal_actions=list(state['legal_actions'].keys())
+        if raw['phase']=='bidding':
+            return dealer_aware_bid(raw,legal_actions)
+        trump=JudgementCard.SUITS.index(raw['trump_suit'])
+        return self.play_card(raw,actions_to_mask(legal_actions),trump)+14
+
+    def eval_step(self,state:Dict)->Tuple[int,Dict]:
+        return self.step(state),{}
+
+class FollowLowAgent(HeuristicAgent):
+    """
+    Wins a trick as cheaply as possible when it can, otherwise follows low
+    Leads its lowest non trump card
+    """
+
+    def play_card(self,state:Dict,legal_mask:int,trump:int)->int:
+        trump_mask=SUIT_MASKS[trump]
+        if not state['current_trick']:
+            return lowest_rank_card(legal_mask,avoid=trump_mask)
+        wins=winning_mask(legal_mask,state['current_trick'],trump)
+        if wins:
+            return lowest_rank_card(wins,avoid=trump_mask)
+        return lowest_rank_card(legal_mask,avoid=trump_mask)
+
+class BidTrackingAgent(HeuristicAgent):
+    """
+    Plays to take exactly bids[player_id] tricks
+    While short of the bid it leads high and wins cheaply, once the bid is made
+    it leads low, ducks with its highest losing card and sheds high cards when
+    it is forced to win anyway
+    """
+
+    def play_card(self,state:Dict,legal_mask:int,trump:int)->int:
+        player_id=state['player_id']
+        trump_mask=SUIT_MASKS[trump]
+        needed=state['bids'][player_id]-state['tricks_won'][player_id]
+        if not state['current_trick']:
+            if needed>0:
+                return highest_rank_card(legal_mask)
+            return lowest_rank_card(legal_mask,avoid=trump_mask)
+        wins=winning_mask(legal_mask,state['current_trick'],trump)
+        if needed>0:
+            if wins:
+                return lowest_rank_card(wins,avoid=trump_mask)
+            return lowest_rank_card(legal_mask,avoid=trump_mask)
+        losers=legal_mask&~wins
+        if losers:
+            return highest_rank_card(losers,avoid=trump_mask)
+        return highest_rank_card(wins)
+
+def random_agent(num_actions:int=66):
+    """rlcard's uniform RandomAgent (imported on use, rlcard.agents pulls in torch)"""
+    from rlcard.agents.random_agent import RandomAgent
+    return RandomAgent(num_actions=num_actions)
+
+#baseline opponents by name, each called with num_actions
+BASELINE_AGENTS={
+    'random':random_agent,
+    'follow_low':FollowLowAgent,
+    'bid_tracking':BidTrackingAgent,
+}
@@ -0,0 +1,286 @@
+"""
+Columnar analytics over recorded rounds
+
+Finished games are stored one row per round in column arrays (.npz chunks)
+written by RoundLogWriter from JudgementGame.round_log:
+
+    game_id (n,)            int64   sequential per log directory
+    round_number (n,)       int16
+    num_cards (n,)          int8
+    dealer_id (n,)          int8
+    trump (n,)              int8    suit index (JudgementCard.SUITS)
+    bids (n, 4)             int8    per player id
+    tricks_won (n, 4)       int8
+    payoffs (n, 4)          int16
+    hands (n, 4, 13)        int8    dealt card indices, -1 padded
+    trick_leaders (n, 13)   int8    -1 padded
+    trick_winners (n, 13)   int8    -1 padded
+    trick_cards (n, 13, 4)  int8    card indices in play order, -1 padded
+
+round_stats turns one chunk into additive count arrays (bincounts over
+num_cards x seat keys, no per-round Python), merge_stats adds them up, and
+build_report reduces the totals to the compact report. analyze runs the
+chunks in a WarmPool, so logs only ever need to fit in memory one chunk at a
+time. Chunks only ever hold whole games, so per-game totals stay exact.
+"""
+
+from typing import List, Dict, Iterable
+import os
+import numpy as np
+from .card import JudgementCard
+
+NUM_PLAYERS=4
+MAX_CARDS=13
+MAX_ROUND_SCORE=(MAX_CARDS+1)*10+MAX_CARDS
+#bound on a whole game's score (every round of a 13 card game at the maximum)
+MAX_GAME_SCORE=MAX_ROUND_SCORE*sum(range(1,MAX_CARDS+1))
+COLUMNS=('game_id','round_number','num_cards','dealer_id','trump','bids','tricks_won','payoffs',
+         'hands','trick_leaders','trick_winners','trick_cards')
+
+def rounds_to_columns(round_logs:Iterable[List[Dict]],first_game_id:int=0)->Dict[str,np.ndarray]:
+    """Column arrays of every round of the given games (one round_log per game)"""
+    rows=[(game_id,record) for game_id,round_log in enumerate(round_logs,start=first_game_id)
+          for record in round_log]
+    n=len(rows)
+    columns={
+        'game_id':np.zeros(n,dtype=np.int64),
+        'round_number':np.zeros(n,dtype=np.int16),
+        'num_cards':np.zeros(n,dtype=np.int8),
+        'dealer_id':np.zeros(n,dtype=np.int8),
+        'trump':np.zeros(n,dtype=np.int8),
+        'bids':np.zeros((n,NUM_PLAYERS),dtype=np.int8),
+        'tricks_won':np.zeros((n,NUM_PLAYERS),dtype=np.int8),
+        'payoffs':np.zeros((n,NUM_PLAYERS),dtype=np.int16),
+        'hands':np.full((n,NUM_PLAYERS,MAX_CARDS),-1,dtype=np.int8),
+        'trick_leaders':np.full((n,MAX_CARDS),-1,dtype=np.int8),
+        'trick_winners':np.full((n,MAX_CARDS),-1,dtype=np.int8),
+        'trick_cards':np.full((n,MAX_CARDS,NUM_PLAYERS),-1,dtype=np.int8),
+    }
+    for i,(game_id,record) in enumerate(rows):
+        num_cards=record['num_cards']
+        columns['game_id'][i]=game_id
+        columns['round_number'][i]=record['round_number']
+        columns['num_cards'][i]=num_cards
+        columns['dealer_id'][i]=record['dealer_id']
+        columns['trump'][i]=JudgementCard.SUITS.index(record['trump_suit'])
+        columns['bids'][i]=record['bids']
+        columns['tricks_won'][i]=record['tricks_won']
+        columns['payoffs'][i]=record['payoffs']
+        columns['hands'][i,:,:num_cards]=record['hands']
+        columns['trick_leaders'][i,:num_cards]=record['trick_leaders']
+        columns['trick_winners'][i,:num_cards]=record['trick_winners']
+        columns['trick_cards'][i,:num_cards]=record['trick_cards']
+    return columns
+
+class RoundLogWriter:
+    """Buffers finished games and writes them as .npz column chunks of about chunk_rounds rounds"""
+
+    def __init__(self,path:str,chunk_rounds:int=100000):
+        self.path=path
+        self.chunk_rounds=chunk_rounds
+        os.makedirs(path,exist_ok=True)
+        chunks=chunk_paths(path)
+        self.num_chunks=len(chunks)
+        self.games:List[List[Dict]]=[]
+        self.pending_rounds=0
+        #a reused directory continues after the games already in it
+        self.next_game_id=0
+        if chunks:
+            with np.load(chunks[-1]) as data:
+                self.next_game_id=int(data['game_id'].max())+1
+
+    def add_game(self,round_log:List[Dict]):
+        self.games.append(list(round_log))
+        self.pending_rounds+=len(round_log)
+        if self.pending_rounds>=self.chunk_rounds:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered games (atomically) as the next chunk"""
+        if not self.games:
+            return
+        columns=rounds_to_columns(self.games,self.next_game_id)
+        path=os.path.join(self.path,f'rounds_{self.num_chunks:06d}.npz')
+        with open(path+'.tmp','wb') as f:
+            np.savez(f,**columns)
+        os.replace(path+'.tmp',path)
+        self.num_chunks+=1
+        self.next_game_id+=len(self.games)
+        self.games=[]
+        self.pending_rounds=0
+
+    def close(self):
+        self.flush()
+
+def chunk_paths(path:str)->List[str]:
+    """Round chunks in a log directory (or the file itself)"""
+    if os.path.isfile(path):
+        return [path]
+    return sorted(os.path.join(path,f) for f in os.listdir(path) if f.startswith('rounds_') and f.endswith('.npz'))
+
+def load_rounds(path:str)->Dict[str,np.ndarray]:
+    with np.load(path) as data:
+        return {k:data[k] for k in data.files}
+
+def round_stats(columns:Dict[str,np.ndarray])->Dict[str,np.ndarray]:
+    """Additive counts of one chunk (see merge_stats and build_report)"""
+    num_cards=columns['num_cards'].astype(np.int64)
+    dealer=columns['dealer_id'].astype(np.int64)
+    bids=columns['bids'].astype(np.int64)
+    tricks=columns['tricks_won'].astype(np.int64)
+    payoffs=columns['payoffs'].astype(np.int64)
+    n=len(num_cards)
+    cells=(MAX_CARDS+1)*NUM_PLAYERS
+
+    #bid accuracy by (num_cards, seat), seat 0 bids first and 3 is the dealer
+    seat=(np.arange(NUM_PLAYERS)[None,:]-dealer[:,None]-1)%NUM_PLAYERS
+    key=(num_cards[:,None]*NUM_PLAYERS+seat).ravel()
+    exact=(bids==tricks).ravel()
+    error=(tricks-bids).ravel()
+    bid_rounds=np.bincount(key,minlength=cells)
+    bid_exact=np.bincount(key,weights=exact,minlength=cells)
+    bid_over=np.bincount(key,weights=error<0,minlength=cells)
+    bid_sum=np.bincount(key,weights=bids.ravel(),minlength=cells)
+    tricks_sum=np.bincount(key,weights=tricks.ravel(),minlength=cells)
+
+    #dealer constraint: the bid that would make the total equal num_cards is a legal number
+    rows=np.arange(n)
+    dealer_bid=bids[rows,dealer]
+    forbidden=num_cards-(bids.sum(axis=1)-dealer_bid)
+    constrained=(forbidden>=0)&(forbidden<=num_cards)
+    rounds=np.bincount(num_cards,minlength=MAX_CARDS+1)
+    dealer_constrained=np.bincount(num_cards,weights=constrained,minlength=MAX_CARDS+1)
+    dealer_exact_constrained=np.bincount(num_cards,weights=constrained&(dealer_bid==tricks[rows,dealer]),
+                                         minlength=MAX_CARDS+1)
+    total_bid=bids.sum(axis=1)-num_cards
+    overbid_hist=np.bincount(total_bid+MAX_CARDS,minlength=NUM_PLAYERS*MAX_CARDS+MAX_CARDS+1)
+
+    #tricks taken with a trump: winning card is at offset (winner - leader) in play order
+    played=columns['trick_leaders']>=0
+    offset=(columns['trick_winners'].astype(np.int64)-columns['trick_leaders'])%NUM_PLAYERS
+    winning_card=np.take_along_axis(columns['trick_cards'].astype(np.int64),offset[...,None],axis=2)[...,0]
+    trump_won=played&(winning_card//13==columns['trump'][:,None])
+    lead_trump=played&(columns['trick_cards'][...,0]//13==columns['trump'][:,None])
+    tricks_played=np.bincount(num_cards,weights=played.sum(axis=1),minlength=MAX_CARDS+1)
+    trump_tricks=np.bincount(num_cards,weights=trump_won.sum(axis=1),minlength=MAX_CARDS+1)
+    trump_led=np.bincount(num_cards,weights=lead_trump.sum(axis=1),minlength=MAX_CARDS+1)
+
+    #score distributions: per round by seat, per game by player
+    payoff_hist=np.stack([np.bincount(payoffs[seat==s]+MAX_ROUND_SCORE,minlength=2*MAX_ROUND_SCORE+1)
+                          for s in range(NUM_PLAYERS)])
+    _,game_index=np.unique(columns['game_id'],return_inverse=True)
+    num_games=int(game_index.max())+1 if n else 0
+    game_totals=np.zeros((num_games,NUM_PLAYERS),dtype=np.int64)
+    np.add.at(game_totals,game_index,payoffs)
+    game_hist=np.bincount(game_totals.ravel()+MAX_GAME_SCORE,minlength=2*MAX_GAME_SCORE+1)
+
+    return {
+        'rounds':rounds,
+        'games':np.array(num_games),
+        'bid_rounds':bid_rounds.reshape(MAX_CARDS+1,NUM_PLAYERS),
+        'bid_exact':bid_exact.reshape(MAX_CARDS+1,NUM_PLAYERS),
+        'bid_over':bid_over.reshape(MAX_CARDS+1,NUM_PLAYERS),
+        'bid_sum':bid_sum.reshape(MAX_CARDS+1,NUM_PLAYERS),
+        'tricks_sum':tricks_sum.reshape(MAX_CARDS+1,NUM_PLAYERS),
+        'dealer_constrained':dealer_constrained,
+        'dealer_exact_constrained':dealer_exact_constrained,
+        'overbid_hist':overbid_hist,
+        'tricks_played':tricks_played,
+        'trump_tricks':trump_tricks,
+        'trump_led':trump_led,
+        'payoff_hist':payoff_hist,
+        'game_hist':game_hist,
+    }
+
+def merge_stats(stats:Iterable[Dict[str,np.ndarray]])->Dict[str,np.ndarray]:
+    total=None
+    for part in stats:
+        if total is None:
+            total={k:v.astype(np.float64) for k,v in part.items()}
+        else:
+            for k,v in part.items():
+                total[k]+=v
+    return total
+
+def _file_stats(path:str)->Dict[str,np.ndarray]:
+    return round_stats(load_rounds(path))
+
+def analyze(paths:List[str],num_workers:int=1)->Dict[str,np.ndarray]:
+    """Merged round_stats of every chunk, chunks spread over num_workers processes"""
+    if not paths:
+        raise ValueError("No round chunks to analyze")
+    if num_workers>1 and len(paths)>1:
+        from .worker_pool import WarmPool
+        with WarmPool(min(num_workers,len(paths)),preload=('numpy','judgement.analytics')) as pool:
+            return merge_stats(pool.imap_unordered(_file_stats,paths))
+    return merge_stats(_file_stats(path) for path in paths)
+
+def _ratio(numerator:np.ndarray,denominator:np.ndarray)->np.ndarray:
+    return np.divide(numerator,denominator,out=np.full(np.shape(numerator),np.nan),where=denominator>0)
+
+def _percentiles(hist:np.ndarray,offset:int,q:Iterable[float]=(1,5,25,50,75,95,99))->Dict[str,float]:
+    """Mean, std and percentiles of integer values stored as a histogram starting at -offset"""
+    values=np.arange(len(hist))-offset
+    count=hist.sum()
+    if count==0:
+        return {}
+    mean=float((values*hist).sum()/count)
+    result={'mean':mean,'std':float(np.sqrt((hist*(values-mean)**2).sum()/count))}
+    cdf=np.cumsum(hist)
+    for p in q:
+        result[f'p{p}']=float(values[np.searchsorted(cdf,p/100*count)])
+    return result
+
+def build_report(stats:Dict[str,np.ndarray])->Dict:
+    """Compact report (plain lists/dicts, JSON serializable) from merged stats"""
+    sizes=[n for n in range(MAX_CARDS+1) if stats['rounds'][n]>0]
+    rounds=stats['rounds'][sizes]
+    bid_rounds=stats['bid_rounds'][sizes]
+    seat_rounds=bid_rounds.sum(axis=1)
+    return {
+        'games':int(stats['games']),
+        'rounds':int(stats['rounds'].sum()),
+        'num_cards':sizes,
+        'rounds_by_cards':rounds.astype(int).tolist(),
+        'bid_accuracy':_ratio(stats['bid_exact'][sizes].sum(axis=1),seat_rounds).tolist(),
+        'overbid_rate':_ratio(stats['bid_over'][sizes].sum(axis=1),seat_rounds).tolist(),
+        'mean_bid':_ratio(stats['bid_sum'][sizes].sum(axis=1),seat_rounds).tolist(),
+        'mean_tricks':_ratio(stats['tricks_sum'][sizes].sum(axis=1),seat_rounds).tolist(),
+        'bid_accuracy_by_cards_seat':_ratio(stats['bid_exact'][sizes],bid_rounds).tolist(),
+        'bid_accuracy_by_seat':_ratio(stats['bid_exact'].sum(axis=0),stats['bid_rounds'].sum(axis=0)).tolist(),
+        'dealer_constrained_rate':_ratio(stats['dealer_constrained'][sizes],rounds).tolist(),
+        'dealer_accuracy_when_constrained':_ratio(stats['dealer_exact_constrained'][sizes],
+                                                  stats['dealer_constrained'][sizes]).tolist(),
+        'total_bid_minus_cards':_percentiles(stats['overbid_hist'],MAX_CARDS),
+        'trump_trick_ratio':_ratio(stats['trump_tricks'][sizes],stats['tricks_played'][sizes]).tolist(),
+        'trump_lead_ratio':_ratio(stats['trump_led'][sizes],stats['tricks_played'][sizes]).tolist(),
+        'round_payoff_by_seat':[_percentiles(h,MAX_ROUND_SCORE) for h in stats['payoff_hist']],
+        'game_score':_percentiles(stats['game_hist'],MAX_GAME_SCORE),
+    }
+
+def format_report(report:Dict)->str:
+    """Text tables of a build_report result"""
+    if not report['rounds']:
+        return "No rounds"
+    lines=[f"{report['games']} games | {report['rounds']} rounds",
+           "cards   rounds  bid acc  overbid  mean bid  tricks  dealer constr  dealer acc  trump tricks  trump leads"]
+    for i,n in enumerate(report['num_cards']):
+        lines.append(f"{n:5d} {report['rounds_by_cards'][i]:8d} {report['bid_accuracy'][i]:8.3f} "
+                     f"{report['overbid_rate'][i]:8.3f} {report['mean_bid'][i]:9.3f} {report['mean_tricks'][i]:7.3f} "
+                     f"{report['dealer_constrained_rate'][i]:14.3f} {report['dealer_accuracy_when_constrained'][i]:11.3f} "
+                     f"{report['trump_trick_ratio'][i]:13.3f} {report['trump_lead_ratio'][i]:12.3f}")
+    lines.append("bid accuracy by seat (0 = first bidder, 3 = dealer)")
+    for n,by_seat in zip(report['num_cards'],report['bid_accuracy_by_cards_seat']):
+        lines.append(f"{n:5d}   "+"  ".join(f"{acc:.3f}" for acc in by_seat))
+    lines.append("  all   "+
+                 "  ".join(f"{acc:.3f}" for acc in report['bid_accuracy_by_seat']))
+    overbid=report['total_bid_minus_cards']
+    lines.append(f"total bids - cards: mean {overbid['mean']:.2f} | p5 {overbid['p5']:.0f} | p50 {overbid['p50']:.0f} | p95 {overbid['p95']:.0f}")
+    for seat,payoff in enumerate(report['round_payoff_by_seat']):
+        if payoff:
+            lines.append(f"round payoff seat {seat}: mean {payoff['mean']:.2f} | std {payoff['std']:.2f} | "
+                         f"p5 {payoff['p5']:.0f} | p50 {payoff['p50']:.0f} | p95 {payoff['p95']:.0f}")
+    game=report['game_score']
+    lines.append(f"game score: mean {game['mean']:.1f} | std {game['std']:.1f} | p1 {game['p1']:.0f} | "
+                 f"p50 {game['p50']:.0f} | p99 {game['p99']:.0f}")
+    return "\n".join(lines)
@@ -0,0 +1,197 @@
+"""
+Precomputed hand strength for the bidding phase
+
+A lookup table of how many tricks a hand takes, built offline by Monte Carlo
+self-play on JudgementGame and memory-mapped at import, so a bid costs a table
+lookup instead of a network pass or rollouts.
+
+Table layout: counts[num_cards, seat, bucket, tricks] (uint32)
+    - num_cards: 0-13 (0 unused)
+    - seat: bidding position, 0 = first bidder after dealer, 3 = dealer
+    - bucket: canonical hand shape relative to trump, see hand_bucket. Trump
+      identity itself is folded away by suit symmetry
+    - tricks: 0-13 tricks taken by the hand
+
+Build with build_bid_table.py, the file is looked up at $JUDGEMENT_BID_TABLE or
+judgement/bid_table.npy.
+"""
+
+from typing import List, Dict, Optional, Tuple
+import os
+import numpy as np
+from .card import JudgementCard
+from .game import JudgementGame
+
+MAX_CARDS=13
+NUM_SEATS=4
+TRUMP_LEN_CAP=6
+NUM_BUCKETS=(TRUMP_LEN_CAP+1)*4*4*4*4
+HIGH_RANKS=('A','K','Q')
+DEFAULT_TABLE_PATH=os.environ.get('JUDGEMENT_BID_TABLE',
+                                  os.path.join(os.path.dirname(__file__),'bid_table.npy'))
+
+def hand_bucket(hand:List[JudgementCard],trump_suit:str)->int:
+    """
+    Canonical hand shape index
+    (trump length capped at 6, trump A/K/Q held, side aces, side kings,
+    side suits with at most one card)
+    """
+    trump_len=0
+    trump_high=0
+    side_aces=0
+    side_kings=0
+    side_len={suit:0 for suit in JudgementCard.SUITS if suit!=trump_suit}
+    for card in hand:
+        if card.suit==trump_suit:
+            trump_len+=1
+            trump_high+=card.rank in HIGH_RANKS
+        else:
+            side_len[card.suit]+=1
+            side_aces+=card.rank=='A'
+            side_kings+=card.rank=='K'
+    short=sum(1 for n in side_len.values() if n<=1)
+    bucket=min(trump_len,TRUMP_LEN_CAP)
+    for value in (trump_high,side_aces,side_kings,short):
+        bucket=bucket*4+min(value,3)
+    return bucket
+
+def get_seat(player_id:int,dealer_id:int)->int:
+    """Bidding position of player, dealer bids last (3)"""
+    return (player_id-dealer_id-1)%NUM_SEATS
+
+def _card_strength(card:JudgementCard,trump_suit:str,lead_suit:Optional[str])->int:
+    """Orders cards within a trick, cards that cannot win are -1"""
+    if card.suit==trump_suit:
+        return 26+card.get_rank()
+    if card.suit==lead_suit:
+        return 13+card.get_rank()
+    return -1
+
+def greedy_play(legal_cards:List[JudgementCard],current_trick:List[Tuple[int,JudgementCard]],
+                trump_suit:str,lead_suit:Optional[str])->JudgementCard:
+    """
+    Simple trick winning policy used for the playouts
+    Leads its highest card, otherwise wins as cheaply as possible or
+    throws its lowest non trump card
+    """
+    if not current_trick:
+        return max(legal_cards,key=lambda c:_card_strength(c,trump_suit,c.suit))
+    best=max(_card_strength(c,trump_suit,lead_suit) for _,c in current_trick)
+    winners=[c for c in legal_cards if _card_strength(c,trump_suit,lead_suit)>best]
+    if winners:
+        return min(winners,key=lambda c:_card_strength(c,trump_suit,lead_suit))
+    return min(legal_cards,key=lambda c:(c.suit==trump_suit,c.get_rank()))
+
+def build_table(num_games:int,starting_set_cards:int=MAX_CARDS,seed:Optional[int]=None)->np.ndarray:
+    """
+    Monte Carlo build of the trick count table
+    Plays num_games full games (every round size, every dealer) with greedy_play
+    for all seats and records every dealt hand with the tricks it took
+    """
+    counts=np.zeros((MAX_CARDS+1,NUM_SEATS,NUM_BUCKETS,MAX_CARDS+1),dtype=np.uint32)
+    game=JudgementGame(allow_step_back=False,starting_set_cards=starting_set_cards)
+    game.dealer.seed(seed)
+    for _ in range(num_games):
+        game.init_game()
+        while not game.is_over():
+            if game.phase=='bidding':
+                game.step(game.get_legal_actions()[0])
+            else:
+                player=game.players[game.current_player_id]
+                card=greedy_play(game._get_playable_cards(player),game.current_trick,
+                                 game.trump_suit,game.lead_suit)
+                game.step(card)
+        for record in game.round_log:
+            for player_id,indices in enumerate(record['hands']):
+                hand=[JudgementCard.make_from_index(i) for i in indices]
+                bucket=hand_bucket(hand,record['trump_suit'])
+                seat=get_seat(player_id,record['dealer_id'])
+                counts[record['num_cards'],seat,bucket,record['tricks_won'][player_id]]+=1
+    return counts
+
+def save_table(counts:np.ndarray,path:str=DEFAULT_TABLE_PATH):
+    np.save(path,counts)
+
+def load_table(path:str=DEFAULT_TABLE_PATH)->Optional[np.ndarray]:
+    """Memory map a table, None if it was never built"""
+    if not os.path.exists(path):
+        return None
+    return np.load(path,mmap_mode='r')
+
+BID_TABLE=load_table()
+
+def trick_distribution(hand:List[JudgementCard],trump_suit:str,num_cards:int,seat:int,
+                       table:Optional[np.ndarray]=None)->Optional[np.ndarray]:
+    """
+    Probability of taking 0-13 tricks with this hand
+    None if there is no table or the cell was never sampled
+    """
+    table=BID_TABLE if table is None else table
+    if table is None:
+        return None
+    counts=table[num_cards,seat,hand_bucket(hand,trump_suit)]
+    total=counts.sum()
+    if total==0:
+        return None
+    return counts/np.float32(total)
+
+def expected_tricks(hand:List[JudgementCard],trump_suit:str,num_cards:int,seat:int,
+                    table:Optional[np.ndarray]=None)->float:
+    """Expected tricks of this hand, num_cards/4 when the table has nothing"""
+    dist=trick_distribution(hand,trump_suit,num_cards,seat,table)
+    if dist is None:
+        return num_cards/NUM_SEATS
+    return float(dist@np.arange(MAX_CARDS+1))
+
+NUM_BID_FEATURES=MAX_CARDS+2
+
+def bid_features(state:Dict,table:Optional[np.ndarray]=None)->np.ndarray:
+    """
+    Extra observation features from the table for a game state (get_state dict)
+    Trick distribution (14) and normalized expected tricks (1), zeros outside bidding
+    """
+    features=np.zeros(NUM_BID_FEATURES,dtype=np.float32)
+    if state['phase']!='bidding':
+        return features
+    seat=get_seat(state['player_id'],state['dealer_id'])
+    dist=trick_distribution(state['hand'],state['trump_suit'],state['num_cards'],seat,table)
+    if dist is not None:
+        features[:MAX_CARDS+1]=dist
+        features[-1]=float(dist@np.arange(MAX_CARDS+1))/MAX_CARDS
+    return features
+
+class TableBidAgent:
+    """
+    Heuristic agent that bids from the lookup table
+    Picks the legal bid with the best expected round score under the trick
+    distribution, and plays cards with greedy_play.
+    Needs the 'raw_state' entry of JudgementEnv states.
+    """
+
+    def __init__(self,num_actions:int=JudgementGame.NUM_ACTIONS,table:Optional[np.ndarray]=None):
+        self.use_raw=False
+        self.num_actions=num_actions
+        self.table=table
+
+    def _bid(self,state:Dict,legal_actions:List[int])->int:
+        seat=get_seat(state['player_id'],state['dealer_id'])
+        dist=trick_distribution(state['hand'],state['trump_suit'],state['num_cards'],seat,self.table)
+        if dist is None:
+            target=state['num_cards']/NUM_SEATS
+            return min(legal_actions,key=lambda b:abs(b-target))
+        def _score(bid:int)->float:
+            reward=(bid+1)*10+bid
+            return dist[bid]*reward-(1-dist[bid])*reward
+        return max(legal_actions,key=_score)
+
+    def step(self,state:Dict)->int:
+        raw=state['raw_state']
+        legal_actions=list(state['legal_actions'].keys())
+        if raw['phase']=='bidding':
+            return self._bid(raw,legal_actions)
+        legal_cards=[JudgementCard.make_from_index(a-14) for a in legal_actions]
+        card=greedy_play(legal_cards,raw['current_trick'],raw['trump_suit'],raw['lead_suit'])
+        return card.get_index()+14
+
+    def eval_step(self,state:Dict)->Tuple[int,Dict]:
+        return self.step(state),{}
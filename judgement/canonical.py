@@ -0,0 +1,190 @@
+"""
+Canonical keys and Zobrist hashing for Judgement states
+
+canonical_key / canonical_game_key map a player's information state (or the full
+state) to compact bytes that are identical for strategically equivalent states:
+    - Suit isomorphism: trump always becomes suit 0, the three non trump suits are
+      relabelled in a fixed order of their contents, so states that only differ by a
+      permutation of non trump suits share a key
+    - Played out equivalence: cards of completed tricks are gone for the rest of the
+      round, so live cards are ranked among live cards only (e.g. holding the 7 after
+      the 6 was played is the same as holding the 6 after the 7 was played).
+      Completed tricks keep leader, winner and suit of each card, which is what
+      matters for inference (voids, who won), but not the played ranks. This
+      forgets which ranks the others chose to play, so strategies keyed on it
+      are an abstraction of the game. played_out=False keeps the played ranks
+      and leaves suit isomorphism (lossless) as the only merging
+Keys are meant for transposition tables, memoized policy calls and sample dedup.
+
+The Zobrist tables give a 64-bit position hash that JudgementGame keeps up to date
+incrementally in step and restores in step_back (see JudgementGame.zobrist).
+"""
+
+from typing import List, Dict, Tuple, Optional
+import random
+from .card import JudgementCard
+
+NUM_PLAYERS=4
+NUM_SUITS=4
+DECK_SIZE=52
+MAX_BID=13
+
+_zobrist_rng=random.Random(0x4A756467)
+def _zobrist_keys(*shape)->list:
+    if len(shape)==1:
+        return [_zobrist_rng.getrandbits(64) for _ in range(shape[0])]
+    return [_zobrist_keys(*shape[1:]) for _ in range(shape[0])]
+
+ZOBRIST_HAND=_zobrist_keys(NUM_PLAYERS,DECK_SIZE)      # card held by player
+ZOBRIST_TRICK=_zobrist_keys(NUM_PLAYERS,DECK_SIZE)     # card on table, played by player
+ZOBRIST_PLAYED=_zobrist_keys(DECK_SIZE)                # card in a completed trick
+ZOBRIST_BID=_zobrist_keys(NUM_PLAYERS,MAX_BID+1)
+ZOBRIST_WON=_zobrist_keys(NUM_PLAYERS,MAX_BID+1)       # tricks won so far by player
+ZOBRIST_TO_MOVE=_zobrist_keys(NUM_PLAYERS)
+ZOBRIST_PHASE=_zobrist_rng.getrandbits(64)             # set while in playing phase
+ZOBRIST_DEAL=_zobrist_keys(MAX_BID+1,NUM_PLAYERS,NUM_SUITS)  # num_cards x dealer x trump
+
+def zobrist_hash(game)->int:
+    """
+    Compute the Zobrist hash of a game from scratch
+    Covers the round setup, hands, table, completed tricks, bids, tricks won,
+    phase and player to move. Cumulative scores are not part of the hash.
+    """
+    h=ZOBRIST_DEAL[game.num_cards][game.dealer_id][JudgementCard.SUITS.index(game.trump_suit)]
+    h^=ZOBRIST_TO_MOVE[game.current_player_id]
+    if game.phase=='playing':
+        h^=ZOBRIST_PHASE
+    for player in game.players:
+        for card in player.hand:
+            h^=ZOBRIST_HAND[player.player_id][card.get_index()]
+    for player_id,card in game.current_trick:
+        h^=ZOBRIST_TRICK[player_id][card.get_index()]
+    for card_index in game.tricks.played_cards().tolist():
+        h^=ZOBRIST_PLAYED[card_index]
+    for player_id in range(NUM_PLAYERS):
+        if game.bids[player_id] is not None:
+            h^=ZOBRIST_BID[player_id][game.bids[player_id]]
+        h^=ZOBRIST_WON[player_id][game.tricks_won[player_id]]
+    return h
+
+def _canonical_bytes(hands:List[Tuple[int,List[JudgementCard]]],trump_suit:str,
+                     current_trick:List[Tuple[int,JudgementCard]],history:List[Dict],
+                     bids:List[Optional[int]],tricks_won:List[int],dealer_id:int,
+                     phase:str,num_cards:int,player_id:int,
+                     played_out:bool=True)->Tuple[bytes,Dict[str,int],List[List[int]]]:
+    """
+    Shared encoder for information state and full state keys
+    Also returns the suit relabelling and live ranks used, to map actions
+    """
+    # Several passes below, build the trick dicts of a TrickHistory once
+    history=list(history)
+    # Live ranks per suit: cards of completed tricks no longer take part in play
+    live=[[True]*13 for _ in range(NUM_SUITS)]
+    for trick in history if played_out else ():
+        for _,card in trick['cards']:
+            idx=card.get_index()
+            live[idx//13][idx%13]=False
+    compressed=[]
+    for suit_live in live:
+        ranks=[]
+        below=0
+        for alive in suit_live:
+            ranks.append(below)
+            below+=alive
+        compressed.append(ranks)
+    def _rank(card:JudgementCard)->int:
+        idx=card.get_index()
+        return compressed[idx//13][idx%13]
+
+    # Label free signature of every suit, non trump suits are ordered by it
+    signatures=[]
+    for suit in JudgementCard.SUITS:
+        sig=[]
+        for pid,hand in hands:
+            sig.append((pid,tuple(sorted(_rank(c) for c in hand if c.suit==suit))))
+        sig.append(tuple((pos,pid,_rank(c)) for pos,(pid,c) in enumerate(current_trick) if c.suit==suit))
+        sig.append(tuple((t,pos,-1 if played_out else _rank(c)) for t,trick in enumerate(history)
+                         for pos,(_,c) in enumerate(trick['cards']) if c.suit==suit))
+        signatures.append(tuple(sig))
+    suit_map={trump_suit:0}
+    others=sorted((s for s in JudgementCard.SUITS if s!=trump_suit),
+                  key=lambda s:signatures[JudgementCard.SUITS.index(s)])
+    for i,suit in enumerate(others):
+        suit_map[suit]=i+1
+
+    key=[1 if phase=='playing' else 0,num_cards,dealer_id,player_id]
+    key.extend(0 if b is None else b+1 for b in bids)
+    key.extend(tricks_won)
+    for pid,hand in hands:
+        key.append(pid)
+        for suit in sorted(suit_map,key=suit_map.get):
+            ranks=sorted(_rank(c) for c in hand if c.suit==suit)
+            key.append(len(ranks))
+            key.extend(ranks)
+    key.append(len(current_trick))
+    for pid,card in current_trick:
+        key.extend((pid,suit_map[card.suit],_rank(card)))
+    key.append(len(history))
+    for trick in history:
+        key.append(trick['cards'][0][0])
+        key.append(trick['winner_id'])
+        key.extend(suit_map[c.suit] for _,c in trick['cards'])
+        if not played_out:
+            key.extend(_rank(c) for _,c in trick['cards'])
+    return bytes(key),suit_map,compressed
+
+def canonical_key(state:Dict)->bytes:
+    """
+    Canonical key of a player's information state
+    Takes the dict returned by JudgementGame.get_state
+    """
+    return _canonical_state(state)[0]
+
+def _canonical_state(state:Dict,played_out:bool=True)->Tuple[bytes,Dict[str,int],List[List[int]]]:
+    return _canonical_bytes(
+        [(state['player_id'],state['hand'])],
+        state['trump_suit'],
+        state['current_trick'],
+        state.get('played_cards_history',[]),
+        state['bids'],
+        state['tricks_won'],
+        state['dealer_id'],
+        state['phase'],
+        state['num_cards'],
+        state['player_id'],
+        played_out,
+    )
+
+def canonical_game_key(game)->bytes:
+    """
+    Canonical key of the full (perfect information) state of a game,
+    including every hand and the player to move
+    """
+    return _canonical_bytes(
+        [(p.player_id,p.hand) for p in game.players],
+        game.trump_suit,
+        game.current_trick,
+        game.played_cards_history,
+        game.bids,
+        game.tricks_won,
+        game.dealer_id,
+        game.phase,
+        game.num_cards,
+        game.current_player_id,
+    )[0]
+
+def canonical_infoset(state:Dict,played_out:bool=True)->Tuple[bytes,List[int]]:
+    """
+    Canonical key of an information state plus its legal actions in canonical order
+    Equivalent states get the same key and their legal actions line up position
+    by position (bids by value, cards by relabelled suit and live rank), so a
+    strategy stored per key applies to every state mapping to it.
+    played_out=False keeps the ranks of completed tricks (suit isomorphism only)
+    """
+    key,suit_map,compressed=_canonical_state(state,played_out)
+    def _canonical_action(action_id:int)->int:
+        if action_id<14:
+            return action_id
+        idx=action_id-14
+        return 14+suit_map[JudgementCard.SUITS[idx//13]]*13+compressed[idx//13][idx%13]
+    return key,sorted(state['legal_actions'],key=_canonical_action)
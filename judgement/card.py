@@ -35,3 +35,7 @@ class JudgementCard:
     
     def __hash__(self)->int:
         return self.get_index()
+
+
+# One shared instance per card index; cards are never mutated so dealing can reuse them
+CARDS=[JudgementCard.make_from_index(i) for i in range(52)]
@@ -0,0 +1,321 @@
+"""
+Full training run checkpoints for NFSP agents
+
+RunCheckpointer saves everything needed to resume a run exactly: every agent's
+networks (including the DQN target network), optimizer states, counters and
+episode policy mode, the replay memories and reservoir buffers, the global
+python/numpy/torch RNG states and the envs' dealer RNG and deal pool.
+
+    - Asynchronous: save() only takes in-memory copies, a background thread
+      writes them, so training does not wait on disk
+    - Incremental buffers: only what changed since the previous save is written.
+      Replay memory segments hold the transitions appended since then (dead
+      segments are pruned once the memory has rotated past them). Reservoir
+      segments hold the slots written since then, tracked by
+      TrackedReservoirBuffer, and get compacted into a fresh base once they add
+      up to twice the buffer capacity
+    - manifest.json is replaced atomically after all files of a save are on
+      disk, so an interrupted write never leaves a broken checkpoint
+"""
+
+from typing import List, Dict, Optional
+import os
+import copy
+import json
+import queue
+import random
+import threading
+import numpy as np
+import torch
+from rlcard.agents.nfsp_agent import NFSPAgent, ReservoirBuffer, Transition as SLTransition
+from rlcard.agents.dqn_agent import Transition as RLTransition
+
+MANIFEST='manifest.json'
+
+class TrackedReservoirBuffer(ReservoirBuffer):
+    """ReservoirBuffer that remembers which slots were written since the last checkpoint"""
+
+    def __init__(self,reservoir_buffer_capacity:int):
+        super().__init__(reservoir_buffer_capacity)
+        self.dirty=set()
+
+    @classmethod
+    def from_buffer(cls,buffer:ReservoirBuffer)->'TrackedReservoirBuffer':
+        tracked=cls(buffer._reservoir_buffer_capacity)
+        tracked._data=buffer._data
+        tracked._add_calls=buffer._add_calls
+        tracked.dirty=set(range(len(buffer._data)))
+        return tracked
+
+    def add(self,element):
+        # Same sampling (and RNG use) as ReservoirBuffer.add
+        if len(self._data)<self._reservoir_buffer_capacity:
+            self.dirty.add(len(self._data))
+            self._data.append(element)
+        else:
+            idx=np.random.randint(0,self._add_calls+1)
+            if idx<self._reservoir_buffer_capacity:
+                self._data[idx]=element
+                self.dirty.add(idx)
+        self._add_calls+=1
+
+    def clear(self):
+        super().clear()
+        self.dirty=set()
+
+def _cpu_clone(obj):
+    """Detached CPU copy of state dicts (nested dicts/lists of tensors)"""
+    if isinstance(obj,torch.Tensor):
+        return obj.detach().cpu().clone()
+    if isinstance(obj,dict):
+        return {k:_cpu_clone(v) for k,v in obj.items()}
+    if isinstance(obj,(list,tuple)):
+        return type(obj)(_cpu_clone(v) for v in obj)
+    return copy.deepcopy(obj)
+
+def _agent_state(agent:NFSPAgent)->Dict:
+    rl=agent._rl_agent
+    return _cpu_clone({
+        'policy_network':agent.policy_network.state_dict(),
+        'policy_network_optimizer':agent.policy_network_optimizer.state_dict(),
+        'q_estimator':rl.q_estimator.qnet.state_dict(),
+        'q_optimizer':rl.q_estimator.optimizer.state_dict(),
+        'target_estimator':rl.target_estimator.qnet.state_dict(),
+        'mode':agent._mode,
+        'total_t':agent.total_t,
+        'train_t':agent.train_t,
+        'rl_total_t':rl.total_t,
+        'rl_train_t':rl.train_t,
+        'reservoir_add_calls':agent._reservoir_buffer._add_calls,
+    })
+
+def _load_agent_state(agent:NFSPAgent,state:Dict):
+    rl=agent._rl_agent
+    agent.policy_network.load_state_dict(state['policy_network'])
+    agent.policy_network_optimizer.load_state_dict(state['policy_network_optimizer'])
+    rl.q_estimator.qnet.load_state_dict(state['q_estimator'])
+    rl.q_estimator.optimizer.load_state_dict(state['q_optimizer'])
+    rl.target_estimator.qnet.load_state_dict(state['target_estimator'])
+    agent._mode=state['mode']
+    agent.total_t=state['total_t']
+    agent.train_t=state['train_t']
+    rl.total_t=state['rl_total_t']
+    rl.train_t=state['rl_train_t']
+
+def _rng_state(envs:List)->Dict:
+    return {
+        'python':random.getstate(),
+        'numpy':np.random.get_state(),
+        'torch':torch.get_rng_state(),
+        'cuda':torch.cuda.get_rng_state_all() if torch.cuda.is_available() else None,
+        'envs':[{
+            'np_random':env.np_random.get_state(),
+            'dealer':env.game.dealer.np_random.bit_generator.state,
+            'pool':env.game.dealer._pool.copy(),
+            'pool_pos':env.game.dealer._pool_pos,
+        } for env in envs],
+    }
+
+def _load_rng_state(envs:List,state:Dict):
+    random.setstate(state['python'])
+    np.random.set_state(state['numpy'])
+    torch.set_rng_state(state['torch'])
+    if state['cuda'] is not None and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state['cuda'])
+    for env,env_state in zip(envs,state['envs']):
+        env.np_random.set_state(env_state['np_random'])
+        env.game.dealer.np_random.bit_generator.state=env_state['dealer']
+        env.game.dealer._pool=env_state['pool']
+        env.game.dealer._pool_pos=env_state['pool_pos']
+
+def _pack_rl(transitions:List[RLTransition])->Dict:
+    return {
+        'state':np.stack([t.state for t in transitions]),
+        'action':np.array([t.action for t in transitions]),
+        'reward':np.array([t.reward for t in transitions]),
+        'next_state':np.stack([t.next_state for t in transitions]),
+        'done':np.array([t.done for t in transitions]),
+        'legal_actions':[t.legal_actions for t in transitions],
+    }
+
+def _unpack_rl(segment:Dict)->List[RLTransition]:
+    return [RLTransition(segment['state'][i],segment['action'][i].item(),segment['reward'][i].item(),
+                         segment['next_state'][i],segment['done'][i].item(),segment['legal_actions'][i])
+            for i in range(len(segment['action']))]
+
+def _pack_sl(data:List[SLTransition],indices:List[int],base:bool)->Dict:
+    return {
+        'base':base,
+        'indices':np.array(indices,dtype=np.int64),
+        'info_state':np.stack([data[i].info_state for i in indices]),
+        'action_probs':np.stack([data[i].action_probs for i in indices]),
+    }
+
+class RunCheckpointer:
+    """
+    Periodic, asynchronous, incremental checkpoints of a whole NFSP run
+
+    Wraps every agent's reservoir buffer in a TrackedReservoirBuffer, so create
+    it before training starts. envs are the JudgementEnvs whose RNG is saved.
+    """
+
+    def __init__(self,save_dir:str,agents:List[NFSPAgent],envs:Optional[List]=None):
+        self.save_dir=save_dir
+        self.agents=agents
+        self.envs=envs or []
+        os.makedirs(save_dir,exist_ok=True)
+        for agent in agents:
+            if not isinstance(agent._reservoir_buffer,TrackedReservoirBuffer):
+                agent._reservoir_buffer=TrackedReservoirBuffer.from_buffer(agent._reservoir_buffer)
+        self.seq=0
+        self.state_file=None
+        #per agent: replay memory segments [{'file','start','end'}], transitions saved so far
+        self.rl_segments=[[] for _ in agents]
+        self.rl_saved=[0]*len(agents)
+        #per agent: reservoir segment files (first may be a base), slots written since base
+        self.sl_segments=[[] for _ in agents]
+        self.sl_written=[0]*len(agents)
+        self._jobs=queue.Queue()
+        self._error:Optional[BaseException]=None
+        self._writer=threading.Thread(target=self._write_loop,daemon=True)
+        self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            job=self._jobs.get()
+            if job is None:
+                self._jobs.task_done()
+                return
+            try:
+                if self._error is None:
+                    self._write(*job)
+            except Exception as e:
+                # Later saves build on this one, so stop writing and report it
+                self._error=e
+            finally:
+                self._jobs.task_done()
+
+    def _write(self,files:Dict,manifest:Dict,obsolete:List[str]):
+        for name,obj in files.items():
+            path=os.path.join(self.save_dir,name)
+            torch.save(obj,path+'.tmp')
+            os.replace(path+'.tmp',path)
+        path=os.path.join(self.save_dir,MANIFEST)
+        with open(path+'.tmp','w') as f:
+            json.dump(manifest,f)
+        os.replace(path+'.tmp',path)
+        for name in obsolete:
+            path=os.path.join(self.save_dir,name)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _raise_writer_error(self):
+        if self._error is not None:
+            raise RuntimeError(f"Checkpoint writer failed: {self._error}") from self._error
+
+    def save(self,episode:int):
+        """Snapshot the run after episode and queue it for writing"""
+        self._raise_writer_error()
+        self.seq+=1
+        files={}
+        obsolete=[]
+        for i,agent in enumerate(self.agents):
+            rl=agent._rl_agent
+            memory=rl.memory.memory
+            new=min(rl.total_t-self.rl_saved[i],len(memory))
+            if new>0:
+                name=f'agent{i}_rl_{self.seq:06d}.pt'
+                files[name]=_pack_rl(memory[len(memory)-new:])
+                self.rl_segments[i].append({'file':name,'start':rl.total_t-new,'end':rl.total_t})
+                self.rl_saved[i]=rl.total_t
+            # Segments the memory has rotated past are no longer needed
+            oldest=rl.total_t-len(memory)
+            live=[seg for seg in self.rl_segments[i] if seg['end']>oldest]
+            obsolete.extend(seg['file'] for seg in self.rl_segments[i] if seg['end']<=oldest)
+            self.rl_segments[i]=live
+
+            buffer=agent._reservoir_buffer
+            if buffer.dirty:
+                name=f'agent{i}_sl_{self.seq:06d}.pt'
+                if self.sl_written[i]+len(buffer.dirty)>2*buffer._reservoir_buffer_capacity:
+                    files[name]=_pack_sl(buffer._data,list(range(len(buffer._data))),base=True)
+                    obsolete.extend(self.sl_segments[i])
+                    self.sl_segments[i]=[]
+                    self.sl_written[i]=len(buffer._data)
+                else:
+                    files[name]=_pack_sl(buffer._data,sorted(buffer.dirty),base=False)
+                    self.sl_written[i]+=len(buffer.dirty)
+                self.sl_segments[i].append(name)
+                buffer.dirty=set()
+
+        state_file=f'state_{self.seq:06d}.pt'
+        files[state_file]={
+            'episode':episode,
+            'agents':[_agent_state(agent) for agent in self.agents],
+            'rng':_rng_state(self.envs),
+        }
+        if self.state_file is not None:
+            obsolete.append(self.state_file)
+        self.state_file=state_file
+        manifest={
+            'episode':episode,
+            'seq':self.seq,
+            'state':state_file,
+            'rl_segments':copy.deepcopy(self.rl_segments),
+            'rl_saved':list(self.rl_saved),
+            'sl_segments':copy.deepcopy(self.sl_segments),
+            'sl_written':list(self.sl_written),
+        }
+        self._jobs.put((files,manifest,obsolete))
+
+    def restore(self)->Optional[int]:
+        """Load the latest checkpoint into the agents/envs, returns its episode (None if there is none)"""
+        path=os.path.join(self.save_dir,MANIFEST)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            manifest=json.load(f)
+        state=torch.load(os.path.join(self.save_dir,manifest['state']),map_location='cpu',weights_only=False)
+        for i,agent in enumerate(self.agents):
+            _load_agent_state(agent,state['agents'][i])
+            rl=agent._rl_agent
+            transitions=[]
+            for seg in manifest['rl_segments'][i]:
+                transitions.extend(_unpack_rl(self._load(seg['file'])))
+            rl.memory.memory=transitions[-rl.memory.memory_size:]
+
+            buffer=TrackedReservoirBuffer(agent._reservoir_buffer._reservoir_buffer_capacity)
+            for name in manifest['sl_segments'][i]:
+                seg=self._load(name)
+                if seg['base']:
+                    buffer._data=[]
+                for j,idx in enumerate(seg['indices'].tolist()):
+                    element=SLTransition(info_state=seg['info_state'][j],action_probs=seg['action_probs'][j])
+                    if idx==len(buffer._data):
+                        buffer._data.append(element)
+                    else:
+                        buffer._data[idx]=element
+            buffer._add_calls=state['agents'][i]['reservoir_add_calls']
+            agent._reservoir_buffer=buffer
+        _load_rng_state(self.envs,state['rng'])
+
+        self.seq=manifest['seq']
+        self.state_file=manifest['state']
+        self.rl_segments=manifest['rl_segments']
+        self.rl_saved=manifest['rl_saved']
+        self.sl_segments=manifest['sl_segments']
+        self.sl_written=manifest['sl_written']
+        return state['episode']
+
+    def _load(self,name:str):
+        return torch.load(os.path.join(self.save_dir,name),map_location='cpu',weights_only=False)
+
+    def flush(self):
+        """Block until every queued save is on disk"""
+        self._jobs.join()
+        self._raise_writer_error()
+
+    def close(self):
+        self.flush()
+        self._jobs.put(None)
+        self._writer.join()
@@ -1,34 +1,76 @@
 from typing import List
-from .card import JudgementCard
+from .card import CARDS
 from .player import JudgementPlayer
+import numpy as np
 import secrets
 
+DECK_SIZE=52
+
+def deal_permutations(rng:np.random.Generator,num_deals:int)->np.ndarray:
+    """
+    Shuffle num_deals decks at once
+    returns (num_deals,52) int8 array, each row a permutation of card indices
+    """
+    decks=np.broadcast_to(np.arange(DECK_SIZE,dtype=np.int8),(num_deals,DECK_SIZE))
+    return rng.permuted(decks,axis=1)
+
+def deal_hands(rng:np.random.Generator,num_deals:int,num_cards:int,num_players:int=4)->np.ndarray:
+    """
+    Deal num_deals independent rounds in one go (e.g. one per env)
+    returns (num_deals,num_players,num_cards) int8 array of card indices
+    """
+    decks=deal_permutations(rng,num_deals)
+    return decks[:,:num_players*num_cards].reshape(num_deals,num_players,num_cards)
+
+def hands_to_masks(hands:np.ndarray)->np.ndarray:
+    """
+    Convert card index hands (...,num_cards) to 52-wide boolean hand masks (...,52)
+    """
+    masks=np.zeros(hands.shape[:-1]+(DECK_SIZE,),dtype=bool)
+    np.put_along_axis(masks,hands.astype(np.intp),True,axis=-1)
+    return masks
+
 class JudgementDealer:
-    """In charge of deck creation,shuffling, dealing and tracking which suit is trump"""
+    """Deals rounds from a pool of pre-shuffled decks and knows which suit is trump"""
 
     TRUMP_ORDER = ['S','D','C','H']
+    POOL_SIZE = 256
 
-    def __init__(self):
-        self.rng=secrets.SystemRandom()
-        self.deck:List[JudgementCard]=[]
-        # True Random shuffling and deck initialization
+    def __init__(self,pool_size:int=POOL_SIZE):
+        # True random deals until seed() is called, every deal comes from this generator
+        self.np_random=np.random.default_rng(secrets.randbits(128))
+        #Pool of pre-shuffled decks, one row is used per round
+        self.pool_size=pool_size
+        self._pool=np.empty((0,DECK_SIZE),dtype=np.int8)
+        self._pool_pos=0
 
-    def create_deck(self):
-        """Make a completely new deck"""
-        self.deck=[]
-        for suit in JudgementCard.SUITS:
-            for rank in JudgementCard.RANKS:
-                self.deck.append(JudgementCard(suit,rank))
+    def seed(self,seed=None):
+        """Reseed the deal generator and drop already shuffled decks"""
+        self.np_random=np.random.default_rng(seed)
+        self._pool=np.empty((0,DECK_SIZE),dtype=np.int8)
+        self._pool_pos=0
 
-    def shuffle(self):
-        """Shuffle deck in place"""
-        self.rng.shuffle(self.deck)
+    def refill_pool(self):
+        """Shuffle a fresh batch of pool_size decks"""
+        self._pool=deal_permutations(self.np_random,self.pool_size)
+        self._pool_pos=0
 
-    def deal_cards(self,player:JudgementPlayer,num_cards:int):
-        """Give player specified number of cards"""
-        for _ in range(num_cards):
-            if self.deck:
-                player.hand.append(self.deck.pop())
+    def next_deal(self)->np.ndarray:
+        """Take the next shuffled deck (52 card indices) from the pool"""
+        if self._pool_pos>=len(self._pool):
+            self.refill_pool()
+        deal=self._pool[self._pool_pos]
+        self._pool_pos+=1
+        return deal
+
+    def deal_round(self,players:List[JudgementPlayer],num_cards:int):
+        """
+        Deal num_cards to every player from one pooled deck
+        Player i gets the i-th consecutive slice of the shuffled deck
+        """
+        deal=self.next_deal()[:len(players)*num_cards].tolist()
+        for i,player in enumerate(players):
+            player.hand=[CARDS[c] for c in deal[i*num_cards:(i+1)*num_cards]]
 
     @classmethod
     def get_trump(cls,round_number:int)->str:
@@ -37,4 +79,4 @@ class JudgementDealer:
         Order is as follows
         Spade, Diamonds, Clubs, Hearts
         """
-        return cls.TRUMP_ORDER[(round_number-1)%4]
\ No newline at end of file
+        return cls.TRUMP_ORDER[(round_number-1)%4]
@@ -3,6 +3,8 @@ from collections import OrderedDict as ODict
 from rlcard.envs import Env
 from .game import JudgementGame
 from .card import JudgementCard
+from .trick_history import TrickHistory
+from .bidding import bid_features, load_table, DEFAULT_TABLE_PATH, NUM_BID_FEATURES
 import numpy as np
 class JudgementEnv(Env):
     """
@@ -21,6 +23,8 @@ class JudgementEnv(Env):
     - Trick Winners: 52 bits (13 tricks * 4 players)
     - Played Cards Bitmask: 52 bits
     Total: 227 features
+    Optional ('bid_features': True): 15 more from the bidding lookup table
+    (trick distribution + expected tricks, see judgement.bidding)
 
     Action Space (66 actions):
     - 0-13: Bid 0-13 tricks
@@ -41,9 +45,22 @@ class JudgementEnv(Env):
             config['allow_step_back']=True
         super().__init__(config)
 
-        self.state_shape = [[227] for _ in range(self.NUM_PLAYERS)]
+        self.bid_table = None
+        if config.get('bid_features', False):
+            table_path = config.get('bid_table', DEFAULT_TABLE_PATH)
+            self.bid_table = load_table(table_path)
+            if self.bid_table is None:
+                raise FileNotFoundError(f"No bidding table at {table_path}, build one with build_bid_table.py")
+        obs_size = 227 + (NUM_BID_FEATURES if self.bid_table is not None else 0)
+        self.state_shape = [[obs_size] for _ in range(self.NUM_PLAYERS)]
         self.action_shape = [None for _ in range(self.NUM_PLAYERS)]
 
+    def seed(self, seed=None):
+        """Seed rlcard's rng and the dealer's deal pool"""
+        seed=super().seed(seed)
+        self.game.dealer.seed(seed)
+        return seed
+
     def _extract_state(self, state:Dict)->Dict:
         """
         Converts game state to rl observation
@@ -89,22 +106,20 @@ class JudgementEnv(Env):
         #my wins
         my_wins_rep = np.array([state['tricks_won'][player_id] / max_cards], dtype=np.float32)
         obs_parts.append(my_wins_rep)
-        #winners
+        #winners and played cards, straight from the history arrays
         winners_rep = np.zeros(52, dtype=np.float32)
-        if 'played_cards_history' in state:
-            for i, trick in enumerate(state['played_cards_history']):
-                if i < 13:
-                    winner_id = trick['winner_id']
-                    winners_rep[i * self.NUM_PLAYERS + winner_id] = 1
-        obs_parts.append(winners_rep)
-        #played cards
         played_cards_rep = np.zeros(52, dtype=np.float32)
         if 'played_cards_history' in state:
-            for trick in state['played_cards_history']:
-                for _, card in trick['cards']:
-                    played_cards_rep[card.get_index()] = 1
+            history = state['played_cards_history']
+            if not isinstance(history, TrickHistory):
+                history = TrickHistory.from_dicts(history)
+            num_tricks = len(history)
+            winners_rep[np.arange(num_tricks) * self.NUM_PLAYERS + history.winners[:num_tricks]] = 1
+            played_cards_rep[history.played_cards()] = 1
+        obs_parts.append(winners_rep)
         obs_parts.append(played_cards_rep)
-        
+        if self.bid_table is not None:
+            obs_parts.append(bid_features(state, self.bid_table))
 
         obs=np.concatenate(obs_parts)
         
@@ -115,7 +130,8 @@ class JudgementEnv(Env):
             'obs': obs,
             'legal_actions': legal_actions,
             'raw_obs': obs,
-            'raw_legal_actions': legal_action_ids
+            'raw_legal_actions': legal_action_ids,
+            'raw_state': state
         }
 
     def _decode_action(self, action_id):
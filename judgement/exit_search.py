@@ -0,0 +1,308 @@
+"""
+Search and self-play generation for expert iteration (NumPy only)
+
+The trainer side (torch network, SGD, orchestration) lives in
+judgement.expert_iteration; everything here runs in the generation workers,
+which never import torch.
+
+    - PolicyValueWeights: numpy forward pass of the policy/value network
+      (shared trunk, 66 policy logits, one value for the observing player)
+    - DeterminizedSearch: samples determinizations of the hidden hands that
+      respect the information set (own hand, played cards, revealed voids) and
+      runs PUCT with step/step_back on each, network priors at every node and
+      network values at the leaves. Root visit counts summed over the
+      determinizations are the improved action distribution
+    - generation_loop: self-play worker, plays games with the search, labels
+      every searched position with the player's round payoff and pushes them
+      per round into a bounded queue
+    - ExItDataset: on-disk .npz shards of (obs, legal mask, target probs, value)
+
+Search never crosses the end of a round (the next deal is not part of the
+information set) so round payoffs are the terminal values.
+"""
+
+from typing import List, Dict, Tuple, Optional
+import os
+import time
+import queue
+import random
+import numpy as np
+from .game import JudgementGame, to_game_action
+from .env import JudgementEnv
+from .card import CARDS
+from .canonical import zobrist_hash
+from .weight_store import WeightStore
+
+NUM_ACTIONS=66
+#largest payoff is (13+1)*10+13=153, scaled into [-1, 1] for the tanh value head
+VALUE_SCALE=160.0
+
+class PolicyValueWeights:
+    """NumPy policy/value network: ReLU trunk, policy and value heads"""
+
+    def __init__(self,arrays:Dict[str,np.ndarray]):
+        self.trunk=[(arrays[f'trunk_w{i}'].T.copy(),arrays[f'trunk_b{i}'])
+                    for i in range(int(arrays['num_trunk']))]
+        self.policy_w=arrays['policy_w'].T.copy()
+        self.policy_b=arrays['policy_b']
+        self.value_w=arrays['value_w'].T.copy()
+        self.value_b=arrays['value_b']
+        self.use_raw=False
+
+    @classmethod
+    def load(cls,path:str)->'PolicyValueWeights':
+        with np.load(path) as data:
+            return cls({k:data[k] for k in data.files})
+
+    def evaluate(self,obs:np.ndarray,legal_mask:np.ndarray)->Tuple[np.ndarray,np.ndarray]:
+        """Masked action probabilities (batch, 66) and values (batch,) in payoff/VALUE_SCALE units"""
+        x=np.asarray(obs,dtype=np.float32)
+        for w,b in self.trunk:
+            x=np.maximum(x@w+b,0)
+        logits=np.where(legal_mask,x@self.policy_w+self.policy_b,-np.inf)
+        logits-=logits.max(axis=-1,keepdims=True)
+        probs=np.exp(logits)
+        probs/=probs.sum(axis=-1,keepdims=True)
+        values=np.tanh(x@self.value_w+self.value_b)[:,0]
+        return probs,values
+
+    def eval_step(self,state:Dict)->Tuple[int,Dict]:
+        """RLCard agent interface on the policy head"""
+        legal_actions=list(state['legal_actions'])
+        mask=np.zeros((1,NUM_ACTIONS),dtype=bool)
+        mask[0,legal_actions]=True
+        probs=self.evaluate(state['obs'][None,:],mask)[0][0]
+        action=int(np.random.choice(NUM_ACTIONS,p=probs))
+        return action,{'probs':{a:float(probs[a]) for a in legal_actions}}
+
+    def step(self,state:Dict)->int:
+        return self.eval_step(state)[0]
+
+def _voids(game:JudgementGame)->List[set]:
+    """Suits each player is known to be out of (failed to follow the lead)"""
+    voids=[set() for _ in range(game.NUM_PLAYERS)]
+    tricks=[trick['cards'] for trick in game.played_cards_history]
+    if game.current_trick:
+        tricks.append(game.current_trick)
+    for trick in tricks:
+        lead=trick[0][1].suit
+        for player_id,card in trick[1:]:
+            if card.suit!=lead:
+                voids[player_id].add(lead)
+    return voids
+
+def determinize(game:JudgementGame,player_id:int,rng:random.Random,max_tries:int=20)->List[List[int]]:
+    """
+    Hands for every player consistent with what player_id has seen
+    Own hand is kept, the other players get the unseen cards with their
+    revealed voids respected (voids are dropped if no such deal is found)
+    """
+    seen=set(game.players[player_id].get_hand_indices())
+    for trick in game.played_cards_history:
+        seen.update(card.get_index() for _,card in trick['cards'])
+    seen.update(card.get_index() for _,card in game.current_trick)
+    unseen=[c for c in range(52) if c not in seen]
+    voids=_voids(game)
+    others=[p for p in range(game.NUM_PLAYERS) if p!=player_id]
+    sizes={p:len(game.players[p].hand) for p in others}
+    #most constrained players draw first
+    others.sort(key=lambda p:-len(voids[p]))
+    for attempt in range(max_tries+1):
+        use_voids=attempt<max_tries
+        pool=unseen.copy()
+        rng.shuffle(pool)
+        hands={}
+        for p in others:
+            allowed=[c for c in pool if not use_voids or CARDS[c].suit not in voids[p]]
+            if len(allowed)<sizes[p]:
+                break
+            hands[p]=allowed[:sizes[p]]
+            taken=set(hands[p])
+            pool=[c for c in pool if c not in taken]
+        else:
+            return [game.players[p].get_hand_indices() if p==player_id else hands[p]
+                    for p in range(game.NUM_PLAYERS)]
+    raise RuntimeError("No determinization found")
+
+class _Node:
+    """PUCT statistics of one position (per legal action, values per seat)"""
+
+    __slots__=('actions','prior','visits','value_sum','player')
+
+    def __init__(self,actions:List[int],prior:np.ndarray,player:int):
+        self.actions=actions
+        self.prior=prior
+        self.visits=np.zeros(len(actions))
+        self.value_sum=np.zeros((len(actions),JudgementGame.NUM_PLAYERS))
+        self.player=player
+
+class DeterminizedSearch:
+    """Determinized PUCT over JudgementGame guided by a PolicyValueWeights network"""
+
+    def __init__(self,net:PolicyValueWeights,env:JudgementEnv,num_determinizations:int=4,
+                 simulations:int=32,c_puct:float=1.5,seed:Optional[int]=None):
+        self.net=net
+        self.env=env
+        self.num_determinizations=num_determinizations
+        self.simulations=simulations
+        self.c_puct=c_puct
+        self.rng=random.Random(seed)
+
+    def search(self,game:JudgementGame)->np.ndarray:
+        """Improved (66,) action distribution for the player to move"""
+        player_id=game.current_player_id
+        legal=game.get_legal_actions()
+        visits=np.zeros(NUM_ACTIONS)
+        if len(legal)==1:
+            visits[legal[0]]=1.0
+            return visits
+        hands=[player.hand for player in game.players]
+        round_hands=game.round_hands
+        zobrist=game.zobrist
+        try:
+            for _ in range(self.num_determinizations):
+                for player,hand in zip(game.players,determinize(game,player_id,self.rng)):
+                    player.hand=[CARDS[c] for c in hand]
+                game.hands=[player.hand for player in game.players]
+                game.zobrist=zobrist_hash(game)
+                root=self._run(game)
+                for action,count in zip(root.actions,root.visits):
+                    visits[action]+=count
+        finally:
+            for player,hand in zip(game.players,hands):
+                player.hand=hand
+            game.hands=hands
+            game.round_hands=round_hands
+            game.zobrist=zobrist
+        return visits/visits.sum()
+
+    def _expand(self,game:JudgementGame)->Tuple[_Node,np.ndarray]:
+        """New node for the position plus every seat's value estimate, in one network call"""
+        states=[self.env._extract_state(game.get_state(p)) for p in range(game.NUM_PLAYERS)]
+        mask=np.zeros((len(states),NUM_ACTIONS),dtype=bool)
+        for i,state in enumerate(states):
+            mask[i,list(state['legal_actions'])]=True
+        probs,values=self.net.evaluate(np.stack([s['obs'] for s in states]),mask)
+        player=game.current_player_id
+        actions=list(states[player]['legal_actions'])
+        return _Node(actions,probs[player,actions],player),values
+
+    def _run(self,game:JudgementGame)->_Node:
+        round_number=game.round_number
+        tree:Dict[tuple,_Node]={}
+        root,_=self._expand(game)
+        tree[()]=root
+        for _ in range(self.simulations):
+            path=[]
+            visited=[]
+            node=root
+            while True:
+                if len(node.actions)==1:
+                    idx=0
+                else:
+                    total=node.visits.sum()
+                    q=np.divide(node.value_sum[:,node.player],node.visits,
+                                out=np.zeros(len(node.actions)),where=node.visits>0)
+                    idx=int(np.argmax(q+self.c_puct*node.prior*np.sqrt(total+1)/(1+node.visits)))
+                visited.append((node,idx))
+                path.append(node.actions[idx])
+                game.step(to_game_action(node.actions[idx]))
+                if game.round_number!=round_number:
+                    values=np.array(game.round_log[-1]['payoffs'])/VALUE_SCALE
+                    break
+                child=tree.get(tuple(path))
+                if child is None:
+                    tree[tuple(path)],values=self._expand(game)
+                    break
+                node=child
+            for node_,idx in visited:
+                node_.visits[idx]+=1
+                node_.value_sum[idx]+=values
+            for _ in path:
+                game.step_back()
+        return root
+
+class ExItDataset:
+    """Directory of .npz shards, each holding obs, mask, probs, value arrays"""
+
+    def __init__(self,path:str):
+        self.path=path
+        os.makedirs(path,exist_ok=True)
+        self.num_shards=len(self.shard_paths())
+
+    def shard_paths(self)->List[str]:
+        return sorted(os.path.join(self.path,f) for f in os.listdir(self.path)
+                      if f.startswith('shard_') and f.endswith('.npz'))
+
+    def write_shard(self,arrays:Dict[str,np.ndarray])->str:
+        """Write one shard atomically and return its path"""
+        path=os.path.join(self.path,f'shard_{self.num_shards:06d}.npz')
+        tmp=path+'.tmp'
+        with open(tmp,'wb') as f:
+            np.savez(f,**arrays)
+        os.replace(tmp,path)
+        self.num_shards+=1
+        return path
+
+    @staticmethod
+    def read_shard(path:str)->Dict[str,np.ndarray]:
+        with np.load(path) as data:
+            return {k:data[k] for k in data.files}
+
+def generation_loop(worker_id:int,config:Dict,samples,weights:WeightStore,stop,seed:int):
+    """
+    Self-play worker: play games with the search and push one dict of arrays per
+    finished round into samples (blocking once it is full)
+    Reloads the network whenever the trainer publishes a new version to weights
+    config holds env_config and the DeterminizedSearch settings
+    """
+    rng=np.random.default_rng(seed)
+    env=JudgementEnv(dict(config['env_config'],seed=seed,allow_step_back=True))
+    game=env.game
+    loaded=-1
+    search=None
+    put_wait=0.0
+    while not stop.is_set():
+        game.init_game()
+        rows=[]
+        while not game.is_over() and not stop.is_set():
+            if weights.version!=loaded:
+                loaded,arrays,_=weights.snapshot()
+                search=DeterminizedSearch(PolicyValueWeights(arrays),env,
+                                          config['num_determinizations'],config['simulations'],
+                                          config['c_puct'],seed=int(rng.integers(2**31)))
+            player_id=game.current_player_id
+            legal=game.get_legal_actions()
+            if len(legal)>1:
+                probs=search.search(game)
+                mask=np.zeros(NUM_ACTIONS,dtype=bool)
+                mask[legal]=True
+                obs=env._extract_state(game.get_state(player_id))['obs']
+                rows.append((obs,mask,probs.astype(np.float32),player_id))
+                action=int(rng.choice(NUM_ACTIONS,p=probs))
+            else:
+                action=legal[0]
+            round_number=game.round_number
+            game.step(to_game_action(action))
+            #real moves are never undone, only the search's own steps
+            game.history.clear()
+            if game.round_number!=round_number and rows:
+                payoffs=game.round_log[-1]['payoffs']
+                batch={
+                    'obs':np.stack([r[0] for r in rows]),
+                    'mask':np.stack([r[1] for r in rows]),
+                    'probs':np.stack([r[2] for r in rows]),
+                    'value':np.array([payoffs[r[3]]/VALUE_SCALE for r in rows],dtype=np.float32),
+                    'version':loaded,
+                    'worker_id':worker_id,
+                    'put_wait':put_wait,
+                }
+                rows=[]
+                start=time.perf_counter()
+                while not stop.is_set():
+                    try:
+                        samples.put(batch,timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                put_wait+=time.perf_counter()-start
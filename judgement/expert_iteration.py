@@ -0,0 +1,311 @@
+"""
+Expert iteration: determinized search targets distilled into a policy/value network
+
+Three stages run at the same time and are connected by bounded queues, so a
+slow stage applies backpressure instead of letting memory grow:
+
+    - Generation: worker processes (judgement.exit_search.generation_loop) play
+      self-play games, run DeterminizedSearch at every decision and push the
+      (obs, legal mask, visit distribution, round payoff) rows of each round
+    - Writer: a thread in the trainer process appends the rows to .npz shards
+      on disk (ExItDataset) and hands them on to the trainer
+    - Training: the calling process keeps a replay ring of recent rows and runs
+      large minibatch updates (cross-entropy to the search distribution plus
+      value MSE), capped at max_reuse passes per generated row
+
+Every publish_every updates the network is exported to NumPy and published to
+a shared memory WeightStore (judgement.weight_store); workers see the version
+change, copy the new arrays out of the store and search with the new priors
+from their next decision on.
+"""
+
+from typing import List, Dict, Optional, Callable, Sequence
+import os
+import time
+import queue
+import threading
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from .exit_search import ExItDataset, PolicyValueWeights, generation_loop, NUM_ACTIONS
+from .weight_store import WeightStore
+from .worker_pool import warm_context
+
+class PolicyValueNet(nn.Module):
+    """ReLU trunk with a policy head (66 logits) and a tanh value head"""
+
+    def __init__(self,input_size:int=227,hidden_sizes:Sequence[int]=(256,256)):
+        super().__init__()
+        layers=[]
+        size=input_size
+        for hidden in hidden_sizes:
+            layers+=[nn.Linear(size,hidden),nn.ReLU()]
+            size=hidden
+        self.trunk=nn.Sequential(*layers)
+        self.policy_head=nn.Linear(size,NUM_ACTIONS)
+        self.value_head=nn.Linear(size,1)
+
+    def forward(self,obs:torch.Tensor):
+        x=self.trunk(obs)
+        return self.policy_head(x),torch.tanh(self.value_head(x)).squeeze(-1)
+
+def export_weights(net:PolicyValueNet)->Dict[str,np.ndarray]:
+    """Arrays for exit_search.PolicyValueWeights"""
+    linears=[m for m in net.trunk if isinstance(m,nn.Linear)]
+    arrays={'num_trunk':np.array(len(linears))}
+    for i,layer in enumerate(linears):
+        arrays[f'trunk_w{i}']=layer.weight.detach().cpu().numpy().copy()
+        arrays[f'trunk_b{i}']=layer.bias.detach().cpu().numpy().copy()
+    arrays['policy_w']=net.policy_head.weight.detach().cpu().numpy().copy()
+    arrays['policy_b']=net.policy_head.bias.detach().cpu().numpy().copy()
+    arrays['value_w']=net.value_head.weight.detach().cpu().numpy().copy()
+    arrays['value_b']=net.value_head.bias.detach().cpu().numpy().copy()
+    return arrays
+
+def save_weights(net:PolicyValueNet,path:str):
+    """Write the NumPy export atomically (readers never see a partial file)"""
+    tmp=path+'.tmp'
+    with open(tmp,'wb') as f:
+        np.savez(f,**export_weights(net))
+    os.replace(tmp,path)
+
+def exit_loss(net:PolicyValueNet,obs:torch.Tensor,mask:torch.Tensor,probs:torch.Tensor,
+              value:torch.Tensor,value_weight:float=1.0):
+    """(total, policy, value) losses: masked cross-entropy to the search distribution and value MSE"""
+    logits,predicted=net(obs)
+    log_probs=F.log_softmax(logits.masked_fill(~mask,-1e9),dim=-1)
+    policy_loss=-(probs*log_probs).sum(dim=-1).mean()
+    value_loss=F.mse_loss(predicted,value)
+    return policy_loss+value_weight*value_loss,policy_loss,value_loss
+
+class ReplayRing:
+    """Fixed capacity ring of the most recent training rows"""
+
+    def __init__(self,capacity:int,obs_size:int):
+        self.obs=np.zeros((capacity,obs_size),dtype=np.float32)
+        self.mask=np.zeros((capacity,NUM_ACTIONS),dtype=bool)
+        self.probs=np.zeros((capacity,NUM_ACTIONS),dtype=np.float32)
+        self.value=np.zeros(capacity,dtype=np.float32)
+        self.capacity=capacity
+        self.pos=0
+        self.size=0
+
+    def add(self,batch:Dict[str,np.ndarray]):
+        n=len(batch['value'])
+        idx=(self.pos+np.arange(n))%self.capacity
+        self.obs[idx]=batch['obs']
+        self.mask[idx]=batch['mask']
+        self.probs[idx]=batch['probs']
+        self.value[idx]=batch['value']
+        self.pos=int((self.pos+n)%self.capacity)
+        self.size=min(self.size+n,self.capacity)
+
+    def sample(self,batch_size:int,rng:np.random.Generator)->Dict[str,np.ndarray]:
+        idx=rng.integers(0,self.size,batch_size)
+        return {'obs':self.obs[idx],'mask':self.mask[idx],'probs':self.probs[idx],'value':self.value[idx]}
+
+class ExpertIteration:
+    """
+    Runs num_workers search/generation processes feeding a trainer in this process
+
+    env_config is the JudgementEnv config of the workers (the observation size
+    of the network follows from it), save_dir receives the shard dataset and,
+    on save(), net.pt and its NumPy export weights.npz.
+    """
+
+    def __init__(self,env_config:Dict,save_dir:str,num_workers:int=2,hidden_sizes:Sequence[int]=(256,256),
+                 batch_size:int=512,lr:float=1e-3,value_weight:float=1.0,replay_size:int=100000,
+                 shard_size:int=8192,queue_size:int=64,publish_every:int=50,max_reuse:float=8.0,
+                 num_determinizations:int=4,simulations:int=32,c_puct:float=1.5,seed:int=0):
+        from .env import JudgementEnv
+        self.env_config={k:v for k,v in env_config.items() if k!='seed'}
+        obs_size=JudgementEnv(dict(self.env_config)).state_shape[0][0]
+        self.save_dir=save_dir
+        self.dataset=ExItDataset(os.path.join(save_dir,'dataset'))
+        self.weights_path=os.path.join(save_dir,'weights.npz')
+        self.num_workers=num_workers
+        self.batch_size=batch_size
+        self.value_weight=value_weight
+        self.shard_size=shard_size
+        self.publish_every=publish_every
+        self.max_reuse=max_reuse
+        self.seed=seed
+        self.worker_config={
+            'env_config':self.env_config,
+            'num_determinizations':num_determinizations,
+            'simulations':simulations,
+            'c_puct':c_puct,
+        }
+        torch.manual_seed(seed)
+        self.rng=np.random.default_rng(seed)
+        self.net=PolicyValueNet(obs_size,hidden_sizes)
+        self.optimizer=torch.optim.Adam(self.net.parameters(),lr=lr)
+        self.replay=ReplayRing(replay_size,obs_size)
+        self.ctx=warm_context(['numpy','judgement.exit_search','judgement.weight_store'])
+        self.samples=self.ctx.Queue(maxsize=queue_size)
+        self.stop_event=self.ctx.Event()
+        self.weights=WeightStore.create(export_weights(self.net))
+        self.rows=queue.Queue(maxsize=queue_size)
+        self.workers=[]
+        self.writer=None
+        self._writer_stop=threading.Event()
+        self.version=self.publish()
+        #metrics
+        self.steps=0
+        self.samples_seen=0
+        self.policy_loss=0.0
+        self.value_loss=0.0
+        self.trainer_wait=0.0
+        self.staleness_sum=0
+        self.batches_seen=0
+        self.worker_put_wait=[0.0]*num_workers
+
+    def publish(self)->int:
+        """Export the current network for the workers and return the new version"""
+        self.version=self.weights.publish(export_weights(self.net))
+        return self.version
+
+    def start(self):
+        """Start the generation processes and the shard writer thread"""
+        self.stop_event.clear()
+        self._writer_stop.clear()
+        for worker_id in range(self.num_workers):
+            worker=self.ctx.Process(target=generation_loop,daemon=True,args=(
+                worker_id,self.worker_config,self.samples,self.weights,
+                self.stop_event,self.seed+worker_id+1))
+            worker.start()
+            self.workers.append(worker)
+        self.writer=threading.Thread(target=self._write_loop,daemon=True)
+        self.writer.start()
+
+    def _write_loop(self):
+        """Move worker batches to disk shards and on to the trainer"""
+        pending=[]
+        pending_rows=0
+        while not self._writer_stop.is_set():
+            try:
+                batch=self.samples.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self.worker_put_wait[batch['worker_id']]=batch['put_wait']
+            pending.append(batch)
+            pending_rows+=len(batch['value'])
+            if pending_rows>=self.shard_size:
+                self._flush(pending)
+                pending=[]
+                pending_rows=0
+            while not self._writer_stop.is_set():
+                try:
+                    self.rows.put(batch,timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+        if pending:
+            self._flush(pending)
+
+    def _flush(self,batches:List[Dict]):
+        self.dataset.write_shard({key:np.concatenate([b[key] for b in batches])
+                                  for key in ('obs','mask','probs','value')})
+
+    def _take(self,block:bool)->bool:
+        """Move available batches into the replay ring, waiting for one if block"""
+        taken=False
+        while True:
+            try:
+                if block and not taken:
+                    start=time.perf_counter()
+                    batch=self.rows.get(timeout=1.0)
+                    self.trainer_wait+=time.perf_counter()-start
+                else:
+                    batch=self.rows.get_nowait()
+            except queue.Empty:
+                if block and not taken:
+                    if not any(worker.is_alive() for worker in self.workers):
+                        raise RuntimeError("All generation processes exited")
+                    continue
+                return taken
+            self.replay.add(batch)
+            self.samples_seen+=len(batch['value'])
+            self.staleness_sum+=self.version-batch['version']
+            self.batches_seen+=1
+            taken=True
+
+    def train(self,num_steps:int,on_step:Optional[Callable[[int,Dict],None]]=None):
+        """
+        Run num_steps minibatch updates on whatever the workers produce
+        on_step(step_index, metrics) is called after each one
+        """
+        if not self.workers:
+            self.start()
+        for _ in range(num_steps):
+            self._take(block=False)
+            #wait for fresh rows rather than overfit the few already there
+            while (self.replay.size<self.batch_size or
+                   (self.steps+1)*self.batch_size>self.max_reuse*self.samples_seen):
+                self._take(block=True)
+            batch=self.replay.sample(self.batch_size,self.rng)
+            loss,policy_loss,value_loss=exit_loss(
+                self.net,torch.from_numpy(batch['obs']),torch.from_numpy(batch['mask']),
+                torch.from_numpy(batch['probs']),torch.from_numpy(batch['value']),self.value_weight)
+            self.optimizer.zero_grad()
+            loss.backward()
+            self.optimizer.step()
+            self.policy_loss=policy_loss.item()
+            self.value_loss=value_loss.item()
+            self.steps+=1
+            if self.steps%self.publish_every==0:
+                self.publish()
+            if on_step is not None:
+                on_step(self.steps-1,self.get_metrics())
+
+    def stop(self,timeout:float=10.0):
+        """
+        Stop the workers (draining their queue so none stays blocked), flush the writer
+        and remove the shared weight file
+        """
+        self.stop_event.set()
+        deadline=time.time()+timeout
+        while any(worker.is_alive() for worker in self.workers) and time.time()<deadline:
+            try:
+                self.rows.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        for worker in self.workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+        self.workers=[]
+        if self.writer is not None:
+            self._writer_stop.set()
+            self.writer.join()
+            self.writer=None
+        self.weights.close()
+
+    def policy(self)->PolicyValueWeights:
+        """NumPy copy of the current network (RLCard agent interface)"""
+        return PolicyValueWeights(export_weights(self.net))
+
+    def save(self,path:Optional[str]=None):
+        """Save the torch network and its NumPy export (weights_path)"""
+        torch.save(self.net.state_dict(),path or os.path.join(self.save_dir,'net.pt'))
+        save_weights(self.net,self.weights_path)
+
+    def get_metrics(self)->Dict[str,float]:
+        """Throughput, losses, backpressure and staleness counters"""
+        try:
+            queue_size=self.samples.qsize()
+        except NotImplementedError:
+            queue_size=-1
+        return {
+            'steps':self.steps,
+            'samples':self.samples_seen,
+            'shards':self.dataset.num_shards,
+            'version':self.version,
+            'policy_loss':self.policy_loss,
+            'value_loss':self.value_loss,
+            'queue_size':queue_size,
+            'trainer_wait':self.trainer_wait,
+            'worker_put_wait':sum(self.worker_put_wait),
+            'staleness_mean':self.staleness_sum/self.batches_seen if self.batches_seen else 0.0,
+        }
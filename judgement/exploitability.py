@@ -0,0 +1,314 @@
+"""
+Best response and exploitability of a fixed policy on small Judgement games
+
+For each round of a starting_set_cards game and each seat, a best responder
+plays against three copies of the policy. Rounds are independent subgames (see
+judgement.mccfr), so game level values are sums over rounds.
+
+Sampling: exact best responses need every deal, which is out of reach even for
+one card. Instead num_hands hands are sampled for the responding seat and, for
+each, deals_per_hand deals of the other hands. Within such a group the full
+tree is enumerated and the responder maximizes over its real information sets
+(hand, bids, table and completed tricks, no suit merging since the policy need
+not be symmetric).
+
+The responder's choices are fitted to the same deals they are scored on, so
+the result is an upper-biased estimate: in an information set reached by only
+a few of the sampled deals the responder effectively knows the other hands
+(with deals_per_hand=1 it always does). The bias shrinks as deals_per_hand
+grows and more deals share each information set, so compare policies at the
+same num_hands and deals_per_hand, and do not read small NashConv gaps at low
+deals_per_hand as real.
+
+    - Batching: every decision node of a group is extracted first, then the policy
+      is queried once for all of them (one matrix product chain for network policies)
+    - Parallel: groups are independent and are spread over a WarmPool of workers
+    - Values: the best response is computed bottom-up, level by level, with NumPy
+      over the flat node arrays of the group
+
+Reports per seat BR value, policy value and their gap; nash_conv is the sum of
+gaps and exploitability nash_conv / 4.
+"""
+
+from typing import List, Dict, Tuple, Optional, Union
+import numpy as np
+from .game import JudgementGame, to_game_action
+from .env import JudgementEnv
+from .card import CARDS
+from .canonical import zobrist_hash
+from .frozen_policy import FrozenPolicy
+from .mccfr import MAX_STARTING_CARDS, MCCFRAgent, round_schedule, start_round
+from .worker_pool import WarmPool, worker_policy
+
+def as_policy(agent:Union[str,object]):
+    """
+    Policy object to evaluate
+    NFSP agents and checkpoints become a FrozenPolicy (batched numpy network, torch
+    is only imported for these), .npz paths are loaded as FrozenPolicy exports or
+    MCCFR tables, other agents are used as is
+    """
+    if isinstance(agent,str):
+        if agent.endswith('.npz'):
+            with np.load(agent) as data:
+                is_table='key_bytes' in data
+            return MCCFRAgent.load(agent) if is_table else FrozenPolicy.load(agent)
+        from .policy_export import load_policy_network, fold_layers
+        return FrozenPolicy(*fold_layers(load_policy_network(agent)))
+    if hasattr(agent,'policy_network'):
+        from .policy_export import fold_layers
+        return FrozenPolicy(*fold_layers(agent.policy_network))
+    return agent
+
+def policy_probs(policy,states:List[Dict])->np.ndarray:
+    """
+    (len(states), 66) action probabilities, zero for illegal actions
+    FrozenPolicy runs one batched call, other agents use info['probs'] of eval_step
+    (or a one hot of the returned action when it has none)
+    """
+    probs=np.zeros((len(states),JudgementGame.NUM_ACTIONS),dtype=np.float64)
+    if not states:
+        return probs
+    if isinstance(policy,FrozenPolicy):
+        obs=np.stack([state['obs'] for state in states])
+        mask=np.zeros(probs.shape,dtype=bool)
+        for i,state in enumerate(states):
+            mask[i,list(state['legal_actions'])]=True
+        if policy.greedy:
+            probs[np.arange(len(states)),policy.act_batch(obs,mask)]=1.0
+        else:
+            probs[:]=policy.probs(obs,mask)
+        return probs
+    for i,state in enumerate(states):
+        action,info=policy.eval_step(state)
+        if info.get('probs'):
+            for action_id,p in info['probs'].items():
+                probs[i,action_id]=p
+            probs[i]/=probs[i].sum()
+        else:
+            probs[i,action]=1.0
+    return probs
+
+def _set_hands(game,hands:List[List[int]]):
+    """Replace the dealt hands at the start of a round"""
+    for player,hand in zip(game.players,hands):
+        player.hand=[CARDS[c] for c in hand]
+    game.hands=[player.hand for player in game.players]
+    game.round_hands=[list(hand) for hand in hands]
+    game.zobrist=zobrist_hash(game)
+
+class _GroupTree:
+    """Every deal of one group expanded into flat node arrays (children contiguous)"""
+
+    def __init__(self,game,env:JudgementEnv,br_player:int,round_number:int):
+        self.game=game
+        self.env=env
+        self.br_player=br_player
+        self.round_number=round_number
+        self.parent=[]
+        self.action=[]
+        self.depth=[]
+        self.player=[]
+        self.value=[]
+        self.child_start=[]
+        self.num_children=[]
+        self.infoset=[]
+        self.infosets:Dict[tuple,int]={}
+        self.states=[]
+        self.state_node=[]
+
+    def add_root(self)->int:
+        self._new_nodes(-1,[-1])
+        root=len(self.parent)-1
+        self._fill(root,0)
+        return root
+
+    def _new_nodes(self,parent:int,actions:List[int]):
+        for action in actions:
+            self.parent.append(parent)
+            self.action.append(action)
+            self.depth.append(0)
+            self.player.append(-1)
+            self.value.append(0.0)
+            self.child_start.append(0)
+            self.num_children.append(0)
+            self.infoset.append(-1)
+
+    def _fill(self,node:int,depth:int):
+        game=self.game
+        #forced moves carry no decision, step through them
+        forced=0
+        while game.round_number==self.round_number:
+            legal=game.get_legal_actions()
+            if len(legal)>1:
+                break
+            game.step(to_game_action(legal[0]))
+            forced+=1
+        depth+=forced
+        self.depth[node]=depth
+        if game.round_number!=self.round_number:
+            self.value[node]=game.round_log[-1]['payoffs'][self.br_player]
+        else:
+            player_id=game.current_player_id
+            raw_state=game.get_state(player_id)
+            self.states.append(self.env._extract_state(raw_state))
+            self.state_node.append(node)
+            legal=sorted(legal)
+            start=len(self.parent)
+            self._new_nodes(node,legal)
+            self.player[node]=player_id
+            self.child_start[node]=start
+            self.num_children[node]=len(legal)
+            if player_id==self.br_player:
+                history=raw_state['played_cards_history']
+                key=(tuple(raw_state['bids']),
+                     tuple((pid,c.get_index()) for pid,c in raw_state['current_trick']),
+                     history.data[:len(history)].tobytes())
+                self.infoset[node]=self.infosets.setdefault(key,len(self.infosets))
+            for i,action_id in enumerate(legal):
+                game.step(to_game_action(action_id))
+                self._fill(start+i,depth+1)
+                game.step_back()
+        for _ in range(forced):
+            game.step_back()
+
+    def solve(self,probs:np.ndarray,roots:List[int])->Tuple[float,float]:
+        """Mean best response and policy values of the responder over the roots"""
+        parent=np.array(self.parent)
+        action=np.array(self.action)
+        depth=np.array(self.depth)
+        player=np.array(self.player)
+        child_start=np.array(self.child_start)
+        num_children=np.array(self.num_children)
+        infoset=np.array(self.infoset)
+        v_br=np.array(self.value)
+        v_pol=v_br.copy()
+
+        #probability of the edge into every node under the policy
+        edge=np.ones(len(parent))
+        kids=np.nonzero(parent>=0)[0]
+        row=np.full(len(parent),-1)
+        row[self.state_node]=np.arange(len(self.state_node))
+        edge[kids]=probs[row[parent[kids]],action[kids]]
+        from_br=np.zeros(len(parent),dtype=bool)
+        from_br[kids]=player[parent[kids]]==self.br_player
+
+        #opponents' reach, top down (children are always deeper than their parent)
+        reach=np.zeros(len(parent))
+        reach[roots]=1.0/len(roots)
+        kid_depth=depth[kids]
+        for d in np.unique(kid_depth):
+            level=kids[kid_depth==d]
+            reach[level]=reach[parent[level]]*np.where(from_br[level],1.0,edge[level])
+
+        #values, bottom up one parent depth at a time
+        parent_depth=depth[parent[kids]]
+        max_actions=max(num_children)
+        for d in np.unique(parent_depth)[::-1]:
+            level=kids[parent_depth==d]
+            parents=parent[level]
+            np.add.at(v_pol,parents,edge[level]*v_pol[level])
+            chance=~from_br[level]
+            np.add.at(v_br,parents[chance],edge[level[chance]]*v_br[level[chance]])
+            br_level=level[~chance]
+            if len(br_level):
+                br_parents=parent[br_level]
+                q=np.zeros((len(self.infosets),max_actions))
+                np.add.at(q,(infoset[br_parents],br_level-child_start[br_parents]),
+                          reach[br_parents]*v_br[br_level])
+                counts=np.zeros(len(self.infosets),dtype=int)
+                counts[infoset[br_parents]]=num_children[br_parents]
+                valid=np.arange(max_actions)[None,:]<counts[:,None]
+                best=np.argmax(np.where(valid,q,-np.inf),axis=1)
+                nodes=np.unique(br_parents)
+                v_br[nodes]=v_br[child_start[nodes]+best[infoset[nodes]]]
+        return float(v_br[roots].mean()),float(v_pol[roots].mean())
+
+_worker_envs:Dict[tuple,JudgementEnv]={}
+
+def _worker_env(env_config:Dict)->JudgementEnv:
+    """Env (used for its game and observation encoder), built once per process and config"""
+    key=tuple(sorted(env_config.items()))
+    if key not in _worker_envs:
+        _worker_envs[key]=JudgementEnv(dict(env_config,allow_step_back=True))
+    return _worker_envs[key]
+
+def _evaluate_group(job:Tuple,policy=None)->Tuple[int,int,float,float]:
+    """
+    Best response and policy value of one (round, seat, hand) group
+    In pool workers the policy is the one the WarmPool loaded
+    """
+    round_index,(round_number,num_cards,dealer_id),br_player,deals_per_hand,seed,env_config=job
+    if policy is None:
+        policy=worker_policy()
+    env=_worker_env(env_config)
+    game=env.game
+    rng=np.random.default_rng(seed)
+    deck=rng.permutation(52)
+    hand=deck[:num_cards].tolist()
+    rest=deck[num_cards:]
+    tree=_GroupTree(game,env,br_player,round_number)
+    roots=[]
+    for _ in range(deals_per_hand):
+        others=rng.permutation(rest)[:3*num_cards].tolist()
+        hands=[]
+        for seat in range(game.NUM_PLAYERS):
+            if seat==br_player:
+                hands.append(hand)
+            else:
+                hands.append(others[:num_cards])
+                others=others[num_cards:]
+        start_round(game,round_number,num_cards,dealer_id)
+        _set_hands(game,hands)
+        roots.append(tree.add_root())
+    probs=policy_probs(policy,tree.states)
+    br_value,policy_value=tree.solve(probs,roots)
+    return round_index,br_player,br_value,policy_value
+
+def exploitability(agent=None,starting_set_cards:int=1,num_hands:int=32,deals_per_hand:int=16,
+                   num_workers:int=1,seed:int=0,env_config:Optional[Dict]=None,
+                   pool:Optional[WarmPool]=None)->Dict:
+    """
+    Sampled best response against agent (RLCard agent, NFSPAgent, FrozenPolicy or
+    checkpoint / export path) in every seat and round of a small game
+    With num_workers>1 groups run in a WarmPool made for this call. A long lived
+    WarmPool(policy=...) can be passed as pool instead of agent to skip worker startup.
+    Returns per seat 'br_value', 'policy_value' (game totals, i.e. summed over rounds),
+    'per_round' values and the overall 'nash_conv' and 'exploitability'. Both are
+    biased upward, less so with more deals_per_hand (see the module docstring)
+    """
+    if not 1<=starting_set_cards<=MAX_STARTING_CARDS:
+        raise ValueError(f"Best response is tabular, starting_set_cards must be 1-{MAX_STARTING_CARDS}")
+    if (agent is None)==(pool is None):
+        raise ValueError("Pass either agent or a pool loaded with the policy")
+    env_config=dict(env_config or {},starting_set_cards=starting_set_cards)
+    schedule=round_schedule(starting_set_cards)
+    num_players=JudgementGame.NUM_PLAYERS
+    seeds=np.random.default_rng(seed).integers(2**63,size=(len(schedule),num_players,num_hands))
+    jobs=[(r,schedule[r],p,deals_per_hand,int(seeds[r,p,h]),env_config)
+          for r in range(len(schedule)) for p in range(num_players) for h in range(num_hands)]
+    if pool is not None:
+        results=pool.map(_evaluate_group,jobs,chunksize=max(1,len(jobs)//(4*pool.num_workers)))
+    elif num_workers<=1:
+        policy=as_policy(agent)
+        results=[_evaluate_group(job,policy) for job in jobs]
+    else:
+        #paths are loaded by the workers themselves, agents are converted once here
+        policy=agent if isinstance(agent,str) else as_policy(agent)
+        with WarmPool(num_workers,policy=policy) as pool:
+            results=pool.map(_evaluate_group,jobs,chunksize=max(1,len(jobs)//(4*num_workers)))
+
+    br=np.zeros((len(schedule),num_players))
+    pol=np.zeros((len(schedule),num_players))
+    for round_index,br_player,br_value,policy_value in results:
+        br[round_index,br_player]+=br_value/num_hands
+        pol[round_index,br_player]+=policy_value/num_hands
+    nash_conv=float((br-pol).sum())
+    return {
+        'br_value':br.sum(axis=0).tolist(),
+        'policy_value':pol.sum(axis=0).tolist(),
+        'per_round':[{'round_number':cfg[0],'num_cards':cfg[1],'dealer_id':cfg[2],
+                      'br_value':br[r].tolist(),'policy_value':pol[r].tolist()}
+                     for r,cfg in enumerate(schedule)],
+        'nash_conv':nash_conv,
+        'exploitability':nash_conv/num_players,
+    }
@@ -0,0 +1,74 @@
+"""
+Frozen average policy for CPU inference
+
+A trained NFSP average-policy network exported by judgement.policy_export as
+plain NumPy arrays. Loading and running it needs NumPy only (no torch, no
+NFSP/DQN code, no epsilon logic): BatchNorm is folded into the first layer
+and the 66-action legal mask is applied inside probs().
+
+Exports made with quantize=True store int8 weights with one float32 scale per
+output row (4x smaller files). They are dequantized once at load time, so
+inference runs in float32 with the quantized weights.
+"""
+
+from typing import List, Dict, Tuple
+import numpy as np
+
+class FrozenPolicy:
+    """MLP (ReLU between layers) producing masked action probabilities"""
+
+    def __init__(self,weights:List[np.ndarray],biases:List[np.ndarray],greedy:bool=False):
+        self.use_raw=False
+        self.weights=[np.ascontiguousarray(w.T,dtype=np.float32) for w in weights]
+        self.biases=[np.asarray(b,dtype=np.float32) for b in biases]
+        self.num_actions=self.biases[-1].shape[0]
+        self.greedy=greedy
+
+    @classmethod
+    def load(cls,path:str,greedy:bool=False)->'FrozenPolicy':
+        data=np.load(path)
+        weights=[]
+        biases=[]
+        for i in range(int(data['num_layers'])):
+            w=data[f'w{i}']
+            if w.dtype==np.int8:
+                w=w.astype(np.float32)*data[f's{i}'][:,None]
+            weights.append(w)
+            biases.append(data[f'b{i}'])
+        return cls(weights,biases,greedy=greedy)
+
+    def logits(self,obs:np.ndarray)->np.ndarray:
+        """Raw scores for a (batch, obs) array"""
+        x=np.asarray(obs,dtype=np.float32)
+        for w,b in zip(self.weights[:-1],self.biases[:-1]):
+            x=x@w
+            x+=b
+            np.maximum(x,0,out=x)
+        return x@self.weights[-1]+self.biases[-1]
+
+    def probs(self,obs:np.ndarray,legal_mask:np.ndarray)->np.ndarray:
+        """Action probabilities restricted to legal_mask (batch, 66) bool"""
+        logits=np.where(legal_mask,self.logits(obs),-np.inf)
+        logits-=logits.max(axis=-1,keepdims=True)
+        exp=np.exp(logits)
+        return exp/exp.sum(axis=-1,keepdims=True)
+
+    def act_batch(self,obs:np.ndarray,legal_mask:np.ndarray)->np.ndarray:
+        """Greedy action for every row of a batch"""
+        return np.argmax(np.where(legal_mask,self.logits(obs),-np.inf),axis=-1)
+
+    def eval_step(self,state:Dict)->Tuple[int,Dict]:
+        """RLCard agent interface, samples like NFSPAgent unless greedy"""
+        legal_actions=list(state['legal_actions'].keys())
+        mask=np.zeros((1,self.num_actions),dtype=bool)
+        mask[0,legal_actions]=True
+        probs=self.probs(state['obs'][None,:],mask)[0]
+        if self.greedy:
+            action=int(np.argmax(probs))
+        else:
+            action=int(np.random.choice(len(probs),p=probs))
+        info={'probs':{state['raw_legal_actions'][i]:float(probs[a]) for i,a in enumerate(legal_actions)}}
+        return action,info
+
+    def step(self,state:Dict)->int:
+        return self.eval_step(state)[0]
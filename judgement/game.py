@@ -1,8 +1,15 @@
 from typing import List, Dict, Tuple, Union,Any, Optional,Literal
-from .card import JudgementCard
+from .card import JudgementCard, CARDS
 from .player import JudgementPlayer
 from .dealer import JudgementDealer
-import copy
+from .trick_history import TrickHistory
+from .canonical import zobrist_hash, ZOBRIST_TO_MOVE, ZOBRIST_BID, ZOBRIST_HAND, ZOBRIST_TRICK, ZOBRIST_PLAYED, ZOBRIST_WON, ZOBRIST_PHASE
+
+def to_game_action(action_id:int)->Union[int,JudgementCard]:
+    """Env action id (0-13 bids, 14-65 cards) to what JudgementGame.step takes"""
+    if action_id<14:
+        return action_id
+    return CARDS[action_id-14]
 
 class JudgementGame:
     """
@@ -66,22 +73,39 @@ class JudgementGame:
         #History for tree search. storing hi
         self.history:List[Dict]=[]
         
-        # History of completed tricks for observation
-        self.played_cards_history: List[Dict] = []
+        # History of completed tricks for observation (played_cards_history is the same object)
+        self.tricks:TrickHistory=TrickHistory()
+
+        #Results of completed rounds (deal, bids, tricks) for analysis
+        self.round_log:List[Dict]=[]
+        self.round_hands:List[List[int]]=[]
+
+        #Zobrist hash of the position, updated incrementally by step
+        self.zobrist:int=0
         
+    @property
+    def played_cards_history(self)->TrickHistory:
+        """Completed tricks of the round, also readable as the old list of trick dicts"""
+        return self.tricks
+
+    @played_cards_history.setter
+    def played_cards_history(self,tricks:Union[TrickHistory,List[Dict]]):
+        self.tricks=tricks if isinstance(tricks,TrickHistory) else TrickHistory.from_dicts(tricks)
+
     def init_game(self)->Tuple[ Dict,int]:
         """
         Starts a game and resets everything
         returns a tuple of initial state and first player id
         """
         #RESET
-        self.current_set_cards=self.starting_set_cards
-        self.num_cards
+        self.current_set_start=self.starting_set_cards
+        self.num_cards=self.starting_set_cards
         self.round_number=1
         self.dealer_id=0
         self.cumulative_scores=[0]*4
         self._game_over=False
         self.history=[]
+        self.round_log=[]
 
         return self._init_round()
     
@@ -94,11 +118,9 @@ class JudgementGame:
             player.reset()
 
         #Dealing cards and other setup
-        self.dealer.create_deck()
-        self.dealer.shuffle()
-        for player in self.players:
-            self.dealer.deal_cards(player,self.num_cards)
+        self.dealer.deal_round(self.players,self.num_cards)
         self.hands=[player.hand for player in self.players]
+        self.round_hands=[player.get_hand_indices() for player in self.players]
         self.trump_suit=JudgementDealer.get_trump(self.round_number)
 
         #Bidding phase related code
@@ -112,7 +134,8 @@ class JudgementGame:
         self.current_trick=[]
         self.lead_suit=None
         self.trick_number=0
-        self.played_cards_history = []
+        self.tricks=TrickHistory()
+        self.zobrist=zobrist_hash(self)
 
         state=self.get_state(self.current_player_id)
         return state,self.current_player_id
@@ -125,16 +148,24 @@ class JudgementGame:
         if self.allow_step_back:
             self.history.append(self._snapshot())
 
+        round_number=self.round_number
+        self.zobrist^=ZOBRIST_TO_MOVE[self.current_player_id]
         if self.phase=='bidding':
             self._process_bid(action)
         else:
             self._process_play(action)
+        #a new round rehashes from scratch in _init_round
+        if self.round_number==round_number:
+            self.zobrist^=ZOBRIST_TO_MOVE[self.current_player_id]
+        elif self._game_over:
+            self.zobrist=zobrist_hash(self)
         state=self.get_state(self.current_player_id)
         return state,self.current_player_id
     
     def _snapshot(self)->Dict:
         """
         Get a copy of literally everything in game state so we can step back in algos like MCTS
+        Cards and completed tricks are never mutated, so shallow list copies suffice
         """
         return {
             'phase': self.phase,
@@ -143,7 +174,7 @@ class JudgementGame:
             'bids_made': self.bids_made,
             'bidding_order': self.bidding_order.copy(),
             'tricks_won': self.tricks_won.copy(),
-            'current_trick': copy.deepcopy(self.current_trick),
+            'current_trick': self.current_trick.copy(),
             'lead_suit': self.lead_suit,
             'trick_number': self.trick_number,
             'num_cards': self.num_cards,
@@ -155,13 +186,16 @@ class JudgementGame:
             '_game_over': self._game_over,
             'players': [
                 {
-                    'hand': [copy.copy(c) for c in p.hand],
+                    'hand': p.hand.copy(),
                     'bid': p.bid,
                     'tricks_won': p.tricks_won,
                 }
                 for p in self.players
             ],
-            'played_cards_history': copy.deepcopy(self.played_cards_history),
+            'played_cards_history': self.tricks.copy(),
+            'zobrist': self.zobrist,
+            'round_log_len': len(self.round_log),
+            'round_hands': self.round_hands,
         }
     def _restore(self,snapshot:Dict):
         """Restore game state using snapshot"""
@@ -187,6 +221,9 @@ class JudgementGame:
             self.players[i].tricks_won = p_snap['tricks_won']
         self.hands = [p.hand for p in self.players]
         self.played_cards_history = snapshot.get('played_cards_history', [])
+        self.zobrist = snapshot.get('zobrist', 0)
+        del self.round_log[snapshot.get('round_log_len', len(self.round_log)):]
+        self.round_hands = snapshot.get('round_hands', self.round_hands)
 
     def step_back(self)->bool:
         """
@@ -204,6 +241,7 @@ class JudgementGame:
         player_id=self.current_player_id
         self.bids[player_id]=bid
         self.players[player_id].bid=bid
+        self.zobrist^=ZOBRIST_BID[player_id][bid]
         self.bids_made+=1
         
         #check if done bidding
@@ -214,6 +252,7 @@ class JudgementGame:
     def _start_playing_phase(self):
         """Switch phase to playing from bidding"""
         self.phase='playing'
+        self.zobrist^=ZOBRIST_PHASE
         self.trick_number=1
         self.current_player_id=(self.dealer_id+1)%self.NUM_PLAYERS
         self.current_trick=[]
@@ -225,6 +264,8 @@ class JudgementGame:
         player=self.players[player_id]
         player.play_card(card)#remove from hand
         self.current_trick.append((player_id,card))
+        card_index=card.get_index()
+        self.zobrist^=ZOBRIST_HAND[player_id][card_index]^ZOBRIST_TRICK[player_id][card_index]
         #first player sets lead suit
         self.lead_suit=card.suit if len(self.current_trick)==1 else self.lead_suit
         #check if done
@@ -236,14 +277,16 @@ class JudgementGame:
     def _resolve_trick(self):
         """decid trick winner and update state"""
         winner_id=self._determine_winner()
+        self.zobrist^=ZOBRIST_WON[winner_id][self.tricks_won[winner_id]]
         self.tricks_won[winner_id]+=1
+        self.zobrist^=ZOBRIST_WON[winner_id][self.tricks_won[winner_id]]
+        for player_id,card in self.current_trick:
+            card_index=card.get_index()
+            self.zobrist^=ZOBRIST_TRICK[player_id][card_index]^ZOBRIST_PLAYED[card_index]
         self.players[winner_id].tricks_won+=1
         
         # Record completed trick
-        self.played_cards_history.append({
-            'winner_id': winner_id,
-            'cards': self.current_trick.copy()
-        })
+        self.tricks.add_trick(self.current_trick,winner_id)
         
         self.current_trick=[]
         self.lead_suit=None
@@ -253,6 +296,7 @@ class JudgementGame:
             round_payoffs=self._calculate_round_payoffs()
             for i in range(self.NUM_PLAYERS):
                 self.cumulative_scores[i]+=round_payoffs[i]
+            self._log_round(round_payoffs)
             self._advance_round()
         else:
             self.current_player_id=winner_id#winner resumes play as lead
@@ -295,7 +339,7 @@ class JudgementGame:
             'lead_suit': self.lead_suit,
             'dealer_id': self.dealer_id,
             'num_cards': self.num_cards,
-            'played_cards_history': self.played_cards_history.copy(),
+            'played_cards_history': self.tricks.copy(),
             'legal_actions': self.get_legal_actions(player_id)
         }
     
@@ -340,8 +384,25 @@ class JudgementGame:
         round_payoffs=self._calculate_round_payoffs()
         for i in range(self.NUM_PLAYERS):
             self.cumulative_scores[i]+=round_payoffs[i]
+        self._log_round(round_payoffs)
         self._advance_round()
 
+    def _log_round(self,round_payoffs:List[int]):
+        """Record the finished round before the next deal wipes it"""
+        self.round_log.append({
+            'round_number': self.round_number,
+            'num_cards': self.num_cards,
+            'dealer_id': self.dealer_id,
+            'trump_suit': self.trump_suit,
+            'hands': self.round_hands,
+            'bids': self.bids.copy(),
+            'tricks_won': self.tricks_won.copy(),
+            'trick_winners': self.tricks.winners[:len(self.tricks)].tolist(),
+            'trick_leaders': self.tricks.leaders[:len(self.tricks)].tolist(),
+            'trick_cards': self.tricks.cards[:len(self.tricks)].tolist(),
+            'payoffs': round_payoffs,
+        })
+
     def _calculate_round_payoffs(self)->List[int]:
         payoffs = []
         for player in self.players:
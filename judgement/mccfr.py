@@ -0,0 +1,298 @@
+"""
+Tabular Monte Carlo CFR for small Judgement games
+
+For starting_set_cards up to 3 the information-set space is small enough to
+solve directly, which gives a reference strategy for what NFSP should converge to.
+
+    - External sampling: every iteration deals each round of the game, then for
+      each player walks the tree with JudgementGame.step/step_back, branching on
+      all of that player's actions and sampling everyone else's (and the deal)
+    - Rounds are solved as separate subgames: scores only add up across rounds and
+      observations never carry over, so a round's payoff is its utility
+    - Info sets are canonical_infoset keys with suit isomorphism only, each gets
+      a dense id and a slice of the flat regret/strategy arrays. The played-out
+      merging of canonical_key is left off (played_out=False): it forgets which
+      ranks were played, which would make the solver solve an abstraction
+      instead of the game
+    - solve(num_workers>1) runs iterations in worker processes from a copy of the
+      table and merges their regret/strategy deltas back every merge_every iterations
+
+The average strategy is exported as an RLCard agent with MCCFRAgent.
+"""
+
+from typing import List, Dict, Tuple, Optional
+import numpy as np
+from .game import JudgementGame, to_game_action
+from .canonical import canonical_infoset
+from .worker_pool import WarmPool
+
+MAX_STARTING_CARDS=3
+
+def infoset_key(state:Dict)->Tuple[bytes,List[int]]:
+    """Lossless canonical info set key and legal actions of a get_state dict"""
+    return canonical_infoset(state,played_out=False)
+
+def round_schedule(starting_set_cards:int)->List[Tuple[int,int,int]]:
+    """(round_number, num_cards, dealer_id) of every round of a game, in order"""
+    schedule=[]
+    round_number=1
+    dealer_id=0
+    for set_start in range(starting_set_cards,0,-1):
+        for num_cards in range(set_start,0,-1):
+            schedule.append((round_number,num_cards,dealer_id))
+            round_number+=1
+        dealer_id=(dealer_id+1)%JudgementGame.NUM_PLAYERS
+    return schedule
+
+def start_round(game:JudgementGame,round_number:int,num_cards:int,dealer_id:int):
+    """Put game at the start of the given round with a fresh deal"""
+    game.round_number=round_number
+    game.num_cards=num_cards
+    game.current_set_start=num_cards
+    game.dealer_id=dealer_id
+    game.cumulative_scores=[0]*game.NUM_PLAYERS
+    game._game_over=False
+    game.history=[]
+    game.round_log=[]
+    game._init_round()
+
+class InfoSetTable:
+    """
+    Regrets and average strategy sums for every info set, in flat arrays
+    Info set i owns regrets[offsets[i]:offsets[i+1]], one entry per legal action
+    in canonical order. The key->id dict is only an index, nothing is stored in it.
+    """
+
+    def __init__(self,capacity:int=1024):
+        self.index:Dict[bytes,int]={}
+        self.keys:List[bytes]=[]
+        self.offsets=np.zeros(capacity+1,dtype=np.int64)
+        self.regrets=np.zeros(capacity*4,dtype=np.float64)
+        self.strategy_sum=np.zeros(capacity*4,dtype=np.float64)
+
+    @property
+    def num_infosets(self)->int:
+        return len(self.keys)
+
+    @property
+    def size(self)->int:
+        """Number of (info set, action) entries in use"""
+        return int(self.offsets[self.num_infosets])
+
+    def lookup(self,key:bytes,num_actions:int)->int:
+        """Dense id of an info set, allocated on first sight"""
+        infoset_id=self.index.get(key)
+        if infoset_id is not None:
+            return infoset_id
+        infoset_id=len(self.keys)
+        if infoset_id+1>=len(self.offsets):
+            self.offsets=np.concatenate([self.offsets,np.zeros(len(self.offsets),dtype=np.int64)])
+        end=self.offsets[infoset_id]+num_actions
+        if end>len(self.regrets):
+            new_size=max(2*len(self.regrets),end)
+            self.regrets=np.concatenate([self.regrets,np.zeros(new_size-len(self.regrets))])
+            self.strategy_sum=np.concatenate([self.strategy_sum,np.zeros(new_size-len(self.strategy_sum))])
+        self.offsets[infoset_id+1]=end
+        self.index[key]=infoset_id
+        self.keys.append(key)
+        return infoset_id
+
+    def span(self,infoset_id:int)->slice:
+        return slice(self.offsets[infoset_id],self.offsets[infoset_id+1])
+
+    def current_strategy(self,infoset_id:int)->np.ndarray:
+        """Regret matching"""
+        positive=np.maximum(self.regrets[self.span(infoset_id)],0)
+        total=positive.sum()
+        if total>0:
+            return positive/total
+        return np.full(len(positive),1.0/len(positive))
+
+    def average_strategy(self,infoset_id:int)->np.ndarray:
+        strategy=self.strategy_sum[self.span(infoset_id)]
+        total=strategy.sum()
+        if total>0:
+            return strategy/total
+        return np.full(len(strategy),1.0/len(strategy))
+
+    def get_state(self)->Dict:
+        """Trimmed arrays and keys, picklable and savable"""
+        n=self.num_infosets
+        return {
+            'keys':list(self.keys),
+            'offsets':self.offsets[:n+1].copy(),
+            'regrets':self.regrets[:self.size].copy(),
+            'strategy_sum':self.strategy_sum[:self.size].copy(),
+        }
+
+    @classmethod
+    def from_state(cls,state:Dict)->'InfoSetTable':
+        table=cls(capacity=max(len(state['keys']),1))
+        table.keys=list(state['keys'])
+        table.index={key:i for i,key in enumerate(table.keys)}
+        n=len(table.keys)
+        size=int(state['offsets'][n])
+        table.offsets[:n+1]=state['offsets']
+        table.regrets=np.concatenate([state['regrets'],np.zeros(max(size,4))])
+        table.strategy_sum=np.concatenate([state['strategy_sum'],np.zeros(max(size,4))])
+        return table
+
+    def delta(self,base:Dict)->Dict:
+        """Changes since base (a get_state of this table's starting point)"""
+        n=len(base['keys'])
+        base_size=len(base['regrets'])
+        offsets=self.offsets[n:self.num_infosets+1]
+        return {
+            'base_infosets':n,
+            'regrets':self.regrets[:base_size]-base['regrets'],
+            'strategy_sum':self.strategy_sum[:base_size]-base['strategy_sum'],
+            'new_keys':self.keys[n:],
+            'new_sizes':np.diff(offsets),
+            'new_regrets':self.regrets[base_size:self.size].copy(),
+            'new_strategy_sum':self.strategy_sum[base_size:self.size].copy(),
+        }
+
+    def merge(self,delta:Dict):
+        """Add a worker's delta, info sets it discovered are matched by key"""
+        base_size=len(delta['regrets'])
+        self.regrets[:base_size]+=delta['regrets']
+        self.strategy_sum[:base_size]+=delta['strategy_sum']
+        start=0
+        for key,num_actions in zip(delta['new_keys'],delta['new_sizes']):
+            span=self.span(self.lookup(key,int(num_actions)))
+            self.regrets[span]+=delta['new_regrets'][start:start+num_actions]
+            self.strategy_sum[span]+=delta['new_strategy_sum'][start:start+num_actions]
+            start+=num_actions
+
+    def save(self,path:str):
+        state=self.get_state()
+        key_lengths=np.array([len(key) for key in state['keys']],dtype=np.int64)
+        key_bytes=np.frombuffer(b''.join(state['keys']),dtype=np.uint8)
+        # File handle so np.savez does not append .npz to path
+        with open(path,'wb') as f:
+            np.savez(f,key_bytes=key_bytes,key_lengths=key_lengths,offsets=state['offsets'],
+                     regrets=state['regrets'],strategy_sum=state['strategy_sum'])
+
+    @classmethod
+    def load(cls,path:str)->'InfoSetTable':
+        data=np.load(path)
+        key_bytes=data['key_bytes'].tobytes()
+        ends=np.cumsum(data['key_lengths'])
+        keys=[key_bytes[end-length:end] for end,length in zip(ends,data['key_lengths'])]
+        return cls.from_state({'keys':keys,'offsets':data['offsets'],
+                               'regrets':data['regrets'],'strategy_sum':data['strategy_sum']})
+
+class MCCFRSolver:
+    """External sampling MCCFR over every round of a starting_set_cards game"""
+
+    def __init__(self,starting_set_cards:int=1,seed:Optional[int]=None,table:Optional[InfoSetTable]=None):
+        if not 1<=starting_set_cards<=MAX_STARTING_CARDS:
+            raise ValueError(f"MCCFR is tabular, starting_set_cards must be 1-{MAX_STARTING_CARDS}")
+        self.starting_set_cards=starting_set_cards
+        self.schedule=round_schedule(starting_set_cards)
+        self.table=table if table is not None else InfoSetTable()
+        self.rng=np.random.default_rng(seed)
+        self.game=JudgementGame(allow_step_back=True,starting_set_cards=starting_set_cards)
+        self.game.dealer.seed(int(self.rng.integers(2**32)))
+        self.iterations=0
+
+    def iterate(self,num_iterations:int=1):
+        """num_iterations passes over every round, traversing once per player"""
+        for _ in range(num_iterations):
+            for round_number,num_cards,dealer_id in self.schedule:
+                for traverser in range(self.game.NUM_PLAYERS):
+                    start_round(self.game,round_number,num_cards,dealer_id)
+                    self._traverse(traverser,round_number)
+            self.iterations+=1
+
+    def _traverse(self,traverser:int,round_number:int)->float:
+        game=self.game
+        if game.round_number!=round_number:
+            return game.round_log[-1]['payoffs'][traverser]
+        player_id=game.current_player_id
+        state=game.get_state(player_id)
+        if len(state['legal_actions'])==1:
+            return self._child_value(state['legal_actions'][0],traverser,round_number)
+        key,actions=infoset_key(state)
+        table=self.table
+        infoset_id=table.lookup(key,len(actions))
+        strategy=table.current_strategy(infoset_id)
+        span=table.span(infoset_id)
+        if player_id==traverser:
+            values=np.array([self._child_value(a,traverser,round_number) for a in actions])
+            value=float(strategy@values)
+            table.regrets[span]+=values-value
+            return value
+        table.strategy_sum[span]+=strategy
+        action=actions[self.rng.choice(len(actions),p=strategy)]
+        return self._child_value(action,traverser,round_number)
+
+    def _child_value(self,action_id:int,traverser:int,round_number:int)->float:
+        self.game.step(to_game_action(action_id))
+        value=self._traverse(traverser,round_number)
+        self.game.step_back()
+        return value
+
+    def solve(self,num_iterations:int,num_workers:int=1,merge_every:int=100)->InfoSetTable:
+        """
+        Run num_iterations iterations in total
+        With num_workers>1 each merge cycle runs up to merge_every iterations in
+        every worker (from the current table), then adds all their deltas to the
+        table. The last cycle splits what is left exactly, the first workers
+        taking one extra iteration
+        """
+        if num_workers<=1:
+            self.iterate(num_iterations)
+            return self.table
+        with WarmPool(num_workers) as pool:
+            done=0
+            while done<num_iterations:
+                cycle=min(merge_every*num_workers,num_iterations-done)
+                counts=[cycle//num_workers+(i<cycle%num_workers) for i in range(num_workers)]
+                base=self.table.get_state()
+                seeds=self.rng.integers(2**32,size=num_workers)
+                jobs=[(self.starting_set_cards,base,count,int(s)) for count,s in zip(counts,seeds) if count]
+                for delta in pool.map(_worker_iterations,jobs):
+                    self.table.merge(delta)
+                done+=cycle
+                self.iterations+=cycle
+        return self.table
+
+def _worker_iterations(job:Tuple[int,Dict,int,int])->Dict:
+    starting_set_cards,base,num_iterations,seed=job
+    solver=MCCFRSolver(starting_set_cards,seed=seed,table=InfoSetTable.from_state(base))
+    solver.iterate(num_iterations)
+    return solver.table.delta(base)
+
+class MCCFRAgent:
+    """RLCard agent playing the average strategy of an InfoSetTable"""
+
+    def __init__(self,table:InfoSetTable,greedy:bool=False):
+        self.use_raw=False
+        self.table=table
+        self.greedy=greedy
+
+    @classmethod
+    def load(cls,path:str,greedy:bool=False)->'MCCFRAgent':
+        return cls(InfoSetTable.load(path),greedy=greedy)
+
+    def action_probs(self,raw_state:Dict)->Dict[int,float]:
+        """Average strategy over the legal action ids, uniform for unseen info sets"""
+        key,actions=infoset_key(raw_state)
+        infoset_id=self.table.index.get(key)
+        if infoset_id is None or self.table.offsets[infoset_id+1]-self.table.offsets[infoset_id]!=len(actions):
+            return {a:1.0/len(actions) for a in actions}
+        return dict(zip(actions,self.table.average_strategy(infoset_id).tolist()))
+
+    def eval_step(self,state:Dict)->Tuple[int,Dict]:
+        probs=self.action_probs(state['raw_state'])
+        actions=list(probs)
+        p=np.array([probs[a] for a in actions])
+        if self.greedy:
+            action=actions[int(np.argmax(p))]
+        else:
+            action=actions[np.random.choice(len(actions),p=p/p.sum())]
+        return action,{'probs':probs}
+
+    def step(self,state:Dict)->int:
+        return self.eval_step(state)[0]
@@ -0,0 +1,115 @@
+"""
+Perft: exhaustive move-tree node counts for engine validation and timing
+
+From a seeded deal (plus optional forced opening moves) every legal action is
+expanded with JudgementGame.step/step_back down to a fixed depth, and the
+number of positions reached at every ply is counted. Any other engine
+(bitboards, vectorized env, undo log) must reproduce these counts exactly, and
+the walk doubles as a standard workload for nodes/sec.
+
+The tree stops at the end of the starting round: the next deal comes from the
+dealer's pool, which step_back does not rewind, so counts past it would depend
+on traversal order.
+
+parallel_perft splits the tree at split_depth and counts the subtrees in
+worker processes, each rebuilding the position from the seed and move path.
+"""
+
+from typing import List, Dict, Tuple, Sequence
+import time
+from .game import JudgementGame, to_game_action
+from .worker_pool import WarmPool
+
+def seeded_game(seed:int,starting_set_cards:int,moves:Sequence[int]=())->JudgementGame:
+    """Game dealt from dealer seed, with the given action ids already played"""
+    game=JudgementGame(allow_step_back=True,starting_set_cards=starting_set_cards)
+    game.dealer.seed(seed)
+    game.init_game()
+    for action_id in moves:
+        if action_id not in game.get_legal_actions():
+            raise ValueError(f"Illegal move {action_id} in position {game.get_state(game.current_player_id)}")
+        game.step(to_game_action(action_id))
+    return game
+
+def perft(game:JudgementGame,depth:int)->List[int]:
+    """Number of positions reached after 1..depth plies, within the current round"""
+    counts=[0]*depth
+    if depth>0 and not game.is_over():
+        _count(game,depth,0,game.round_number,counts)
+    return counts
+
+def _count(game:JudgementGame,depth:int,ply:int,round_number:int,counts:List[int]):
+    counts[ply]+=len(game.get_legal_actions())
+    if ply+1==depth:
+        return
+    for action_id in game.get_legal_actions():
+        game.step(to_game_action(action_id))
+        if game.round_number==round_number:
+            _count(game,depth,ply+1,round_number,counts)
+        game.step_back()
+
+def divide(game:JudgementGame,depth:int)->Dict[int,int]:
+    """Leaf count (positions at depth) under every root action, for locating mismatches"""
+    result={}
+    round_number=game.round_number
+    for action_id in game.get_legal_actions():
+        game.step(to_game_action(action_id))
+        if depth==1:
+            result[action_id]=1
+        elif game.round_number==round_number:
+            result[action_id]=perft(game,depth-1)[-1]
+        else:
+            result[action_id]=0
+        game.step_back()
+    return result
+
+def _split(game:JudgementGame,split_depth:int,counts:List[int],path:List[int],paths:List[List[int]]):
+    """Count the top split_depth plies here and collect the paths below them"""
+    ply=len(path)
+    round_number=game.round_number
+    for action_id in game.get_legal_actions():
+        counts[ply]+=1
+        game.step(to_game_action(action_id))
+        if game.round_number==round_number:
+            if ply+1==split_depth:
+                paths.append(path+[action_id])
+            else:
+                _split(game,split_depth,counts,path+[action_id],paths)
+        game.step_back()
+
+def _subtree_job(job:Tuple[int,int,List[int],int])->List[int]:
+    seed,starting_set_cards,moves,depth=job
+    return perft(seeded_game(seed,starting_set_cards,moves),depth)
+
+def parallel_perft(seed:int,starting_set_cards:int,depth:int,moves:Sequence[int]=(),
+                   num_workers:int=2,split_depth:int=2)->List[int]:
+    """perft of seeded_game(seed, starting_set_cards, moves) with subtrees counted in worker processes"""
+    split_depth=max(1,min(split_depth,depth-1))
+    game=seeded_game(seed,starting_set_cards,moves)
+    counts=[0]*depth
+    if depth<2 or game.is_over():
+        return perft(game,depth)
+    paths=[]
+    _split(game,split_depth,counts,[],paths)
+    jobs=[(seed,starting_set_cards,list(moves)+path,depth-split_depth) for path in paths]
+    with WarmPool(num_workers,preload=('numpy','judgement.game')) as pool:
+        for sub in pool.imap_unordered(_subtree_job,jobs,chunksize=max(1,len(jobs)//(8*num_workers))):
+            for i,count in enumerate(sub):
+                counts[split_depth+i]+=count
+    return counts
+
+def timed_perft(seed:int,starting_set_cards:int,depth:int,moves:Sequence[int]=(),
+                num_workers:int=1,split_depth:int=2)->Dict:
+    """Counts per depth plus wall time and nodes/sec"""
+    start=time.perf_counter()
+    if num_workers>1:
+        counts=parallel_perft(seed,starting_set_cards,depth,moves,num_workers,split_depth)
+    else:
+        counts=perft(seeded_game(seed,starting_set_cards,moves),depth)
+    elapsed=time.perf_counter()-start
+    return {
+        'counts':counts,
+        'nodes':sum(counts),
+        'seconds':elapsed,
+        'nodes_per_sec':sum(counts)/elapsed if elapsed>0 else 0.0,
+    }
@@ -0,0 +1,79 @@
+from typing import Dict, Tuple, Any
+from collections import OrderedDict as ODict
+import hashlib
+import numpy as np
+
+class CachedAgent:
+    """
+    LRU cache around an agent's eval_step
+
+    Evaluation keeps running into the same observations (small hand bids, last
+    tricks) so the wrapped agent is only asked once per (obs, legal actions) pair.
+        - Key: 128-bit blake2b digest of the float32 obs bytes and legal action ids
+        - Forced moves (one legal action) never reach the agent at all
+        - If the agent reported 'probs' the action is re-sampled from the cached
+          probabilities on a hit, so stochastic policies stay stochastic
+    step is passed straight through, training must not be served from a cache.
+    Call clear() whenever the wrapped agent's weights change.
+    """
+
+    def __init__(self,agent,maxsize:int=100000):
+        self.agent=agent
+        self.use_raw=agent.use_raw
+        self.maxsize=maxsize
+        self._cache:ODict=ODict()
+        self.hits:int=0
+        self.misses:int=0
+        self.forced:int=0
+
+    @staticmethod
+    def make_key(state:Dict)->bytes:
+        """Digest of the observation and legal action ids"""
+        digest=hashlib.blake2b(digest_size=16)
+        digest.update(np.asarray(state['obs'],dtype=np.float32).tobytes())
+        digest.update(np.fromiter(state['legal_actions'],dtype=np.int8).tobytes())
+        return digest.digest()
+
+    def step(self,state:Dict):
+        return self.agent.step(state)
+
+    def eval_step(self,state:Dict)->Tuple[Any,Dict]:
+        """eval_step of the wrapped agent, answered from cache when possible"""
+        legal_actions=state['legal_actions']
+        if len(legal_actions)==1:
+            self.forced+=1
+            action=next(iter(legal_actions))
+            return action,{'probs':{state['raw_legal_actions'][0]:1.0}}
+
+        key=self.make_key(state)
+        entry=self._cache.get(key)
+        if entry is None:
+            self.misses+=1
+            entry=self.agent.eval_step(state)
+            self._cache[key]=entry
+            if len(self._cache)>self.maxsize:
+                self._cache.popitem(last=False)
+            return entry
+        self.hits+=1
+        self._cache.move_to_end(key)
+        action,info=entry
+        if 'probs' in info:
+            actions=list(info['probs'].keys())
+            probs=np.fromiter(info['probs'].values(),dtype=np.float64)
+            action=actions[np.random.choice(len(actions),p=probs/probs.sum())]
+        return action,info
+
+    def clear(self):
+        """Drop every cached entry (e.g. after a training update)"""
+        self._cache.clear()
+
+    def get_stats(self)->Dict[str,float]:
+        """Hit/miss counters and current cache size"""
+        lookups=self.hits+self.misses
+        return {
+            'hits':self.hits,
+            'misses':self.misses,
+            'forced':self.forced,
+            'size':len(self._cache),
+            'hit_rate':self.hits/lookups if lookups else 0.0,
+        }
@@ -0,0 +1,90 @@
+"""
+Export trained NFSP average policies for inference
+
+Takes a checkpoint written by NFSPAgent.save_checkpoint and produces either
+    - a NumPy .npz for judgement.frozen_policy.FrozenPolicy (optionally with
+      int8 per-row quantized weights)
+    - a TorchScript module taking (obs, legal_mask) and returning masked
+      probabilities (optionally int8 dynamically quantized Linear layers),
+      loadable with torch.jit.load alone
+Both drop the RL branch and fold the input BatchNorm into the first Linear.
+"""
+
+from typing import List, Tuple
+import numpy as np
+import torch
+import torch.nn as nn
+from rlcard.agents.nfsp_agent import AveragePolicyNetwork
+
+def load_policy_network(checkpoint_path:str)->AveragePolicyNetwork:
+    """Average policy network of an NFSPAgent checkpoint, in eval mode on CPU"""
+    checkpoint=torch.load(checkpoint_path,map_location='cpu',weights_only=False)
+    network=AveragePolicyNetwork.from_checkpoint(checkpoint['policy_network'])
+    return network.eval()
+
+def fold_layers(network:AveragePolicyNetwork)->Tuple[List[np.ndarray],List[np.ndarray]]:
+    """Linear weights/biases with the (eval mode) BatchNorm folded into the first one"""
+    weights=[]
+    biases=[]
+    scale=shift=None
+    for module in network.mlp:
+        if isinstance(module,nn.BatchNorm1d):
+            std=torch.sqrt(module.running_var+module.eps)
+            scale=(module.weight/std).detach().double()
+            shift=(module.bias-module.running_mean*module.weight/std).detach().double()
+        elif isinstance(module,nn.Linear):
+            w=module.weight.detach().double()
+            b=module.bias.detach().double()
+            if scale is not None:
+                b=b+w@shift
+                w=w*scale[None,:]
+                scale=shift=None
+            weights.append(w.float().numpy())
+            biases.append(b.float().numpy())
+    return weights,biases
+
+def quantize_rows(w:np.ndarray)->Tuple[np.ndarray,np.ndarray]:
+    """Symmetric int8 quantization with one scale per output row"""
+    scales=np.abs(w).max(axis=1)/127.0
+    scales[scales==0]=1.0
+    return np.round(w/scales[:,None]).astype(np.int8),scales.astype(np.float32)
+
+def export_numpy(checkpoint_path:str,out_path:str,quantize:bool=False):
+    """Write the FrozenPolicy .npz for a checkpoint"""
+    weights,biases=fold_layers(load_policy_network(checkpoint_path))
+    arrays={'num_layers':np.array(len(weights))}
+    for i,(w,b) in enumerate(zip(weights,biases)):
+        if quantize:
+            arrays[f'w{i}'],arrays[f's{i}']=quantize_rows(w)
+        else:
+            arrays[f'w{i}']=w
+        arrays[f'b{i}']=b
+    # File handle so np.savez does not append .npz to out_path
+    with open(out_path,'wb') as f:
+        np.savez(f,**arrays)
+
+class MaskedPolicy(nn.Module):
+    """Folded MLP returning legal-masked action probabilities"""
+
+    def __init__(self,weights:List[np.ndarray],biases:List[np.ndarray]):
+        super().__init__()
+        layers=[]
+        for i,(w,b) in enumerate(zip(weights,biases)):
+            linear=nn.Linear(w.shape[1],w.shape[0])
+            linear.weight.data=torch.from_numpy(w)
+            linear.bias.data=torch.from_numpy(b)
+            layers.append(linear)
+            if i!=len(weights)-1:
+                layers.append(nn.ReLU())
+        self.mlp=nn.Sequential(*layers)
+
+    def forward(self,obs:torch.Tensor,legal_mask:torch.Tensor)->torch.Tensor:
+        logits=self.mlp(obs).masked_fill(~legal_mask,float('-inf'))
+        return torch.softmax(logits,dim=-1)
+
+def export_torchscript(checkpoint_path:str,out_path:str,quantize:bool=False):
+    """Write a TorchScript MaskedPolicy for a checkpoint"""
+    module=MaskedPolicy(*fold_layers(load_policy_network(checkpoint_path))).eval()
+    if quantize:
+        module=torch.ao.quantization.quantize_dynamic(module,{nn.Linear},dtype=torch.qint8)
+    torch.jit.save(torch.jit.script(module),out_path)
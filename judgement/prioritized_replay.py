@@ -0,0 +1,227 @@
+"""
+Prioritized experience replay for the Q-learning branch of NFSPAgent
+
+Most Judgement transitions are forced or near-forced moves with small TD
+errors, the few that decide a bid get drowned out by uniform sampling.
+PrioritizedMemory samples transition i with probability p_i^alpha / sum p^alpha
+(p = |TD error| + eps) and corrects the bias with importance weights
+(N * P(i))^-beta / max w, beta annealed to 1.
+
+    - SumTree: priorities in the leaves of one flat float64 array (a complete
+      binary tree, node k has children 2k and 2k+1). A whole minibatch is
+      drawn in one vectorized descent, so sampling and updating a batch are
+      O(batch * log capacity) NumPy operations
+    - PrioritizedMemory: drop-in for rlcard's replay Memory with ring-buffer
+      arrays instead of a list; .memory is a read/write view in oldest-first
+      order so RunCheckpointer saves and restores it as before (priorities are
+      not checkpointed, restored transitions start at the max priority)
+    - PrioritizedDQNAgent: DQNAgent whose train step uses the importance
+      weights in the loss and writes the new TD errors back as priorities.
+      use_prioritized_replay switches an NFSPAgent's RL branch over in place
+"""
+
+from typing import List, Tuple, Union
+from copy import deepcopy
+import numpy as np
+import torch
+from rlcard.agents.dqn_agent import DQNAgent, Memory, Transition
+from rlcard.agents.nfsp_agent import NFSPAgent
+
+class SumTree:
+    """Binary sum tree over capacity leaves stored in a single array"""
+
+    def __init__(self,capacity:int):
+        self.capacity=capacity
+        self.depth=max(1,int(np.ceil(np.log2(capacity))))
+        self.offset=1<<self.depth
+        self.tree=np.zeros(2*self.offset,dtype=np.float64)
+
+    @property
+    def total(self)->float:
+        return float(self.tree[1])
+
+    def get(self,indices:np.ndarray)->np.ndarray:
+        return self.tree[self.offset+np.asarray(indices)]
+
+    def update(self,indices:np.ndarray,priorities:np.ndarray):
+        """Set leaf priorities and refresh their ancestors, one vectorized pass per level"""
+        nodes=self.offset+np.asarray(indices,dtype=np.int64)
+        self.tree[nodes]=priorities
+        for _ in range(self.depth):
+            nodes=np.unique(nodes>>1)
+            self.tree[nodes]=self.tree[2*nodes]+self.tree[2*nodes+1]
+
+    def find(self,values:np.ndarray)->np.ndarray:
+        """Leaf index of each prefix-sum value in [0, total)"""
+        values=np.array(values,dtype=np.float64)
+        nodes=np.ones(len(values),dtype=np.int64)
+        for _ in range(self.depth):
+            left=2*nodes
+            left_sum=self.tree[left]
+            #never step into an empty subtree, float round off could otherwise reach unused leaves
+            right=(values>=left_sum)&(self.tree[left+1]>0)
+            values-=np.where(right,left_sum,0.0)
+            nodes=left+right
+        return nodes-self.offset
+
+    def sample(self,batch_size:int,rng:np.random.Generator)->np.ndarray:
+        """Stratified sample: one leaf from each of batch_size equal slices of the total"""
+        bounds=np.arange(batch_size)*(self.total/batch_size)
+        return self.find(bounds+rng.random(batch_size)*(self.total/batch_size))
+
+class _RingView:
+    """Oldest-first sequence view of a PrioritizedMemory, like rlcard's Memory.memory list"""
+
+    def __init__(self,memory:'PrioritizedMemory'):
+        self._memory=memory
+
+    def __len__(self)->int:
+        return self._memory.size
+
+    def __getitem__(self,i:Union[int,slice])->Union[Transition,List[Transition]]:
+        memory=self._memory
+        if isinstance(i,slice):
+            return [memory.transition(memory.slot(j)) for j in range(*i.indices(memory.size))]
+        if i<0:
+            i+=memory.size
+        if not 0<=i<memory.size:
+            raise IndexError("replay index out of range")
+        return memory.transition(memory.slot(i))
+
+    def __iter__(self):
+        return iter(self[:])
+
+class PrioritizedMemory(Memory):
+    """Replay memory sampling in proportion to priority^alpha"""
+
+    def __init__(self,memory_size:int,batch_size:int,alpha:float=0.6,eps:float=1e-3,seed=None):
+        super().__init__(memory_size,batch_size)
+        self.alpha=alpha
+        self.eps=eps
+        self.tree=SumTree(memory_size)
+        self.max_priority=1.0
+        self.rng=np.random.default_rng(seed)
+        self.pos=0
+        self.size=0
+        self.states=None
+        self.next_states=None
+        self.actions=np.zeros(memory_size,dtype=np.int64)
+        self.rewards=np.zeros(memory_size,dtype=np.float32)
+        self.dones=np.zeros(memory_size,dtype=bool)
+        self.legal_actions=[None]*memory_size
+        #slots and importance weights of the last sample()
+        self.last_indices=None
+        self.last_weights=None
+
+    @property
+    def memory(self)->_RingView:
+        return _RingView(self)
+
+    @memory.setter
+    def memory(self,transitions:List[Transition]):
+        self.pos=self.size=0
+        self.tree=SumTree(self.memory_size)
+        for t in transitions:
+            self.save(t.state,t.action,t.reward,t.next_state,t.legal_actions,t.done)
+
+    def slot(self,i:int)->int:
+        """Ring slot of the i-th oldest transition"""
+        return (self.pos-self.size+i)%self.memory_size
+
+    def transition(self,slot:int)->Transition:
+        return Transition(self.states[slot],int(self.actions[slot]),float(self.rewards[slot]),
+                          self.next_states[slot],bool(self.dones[slot]),self.legal_actions[slot])
+
+    def save(self,state,action,reward,next_state,legal_actions,done):
+        if self.states is None:
+            self.states=np.zeros((self.memory_size,)+np.shape(state),dtype=np.float32)
+            self.next_states=np.zeros_like(self.states)
+        slot=self.pos
+        self.states[slot]=state
+        self.next_states[slot]=next_state
+        self.actions[slot]=action
+        self.rewards[slot]=reward
+        self.dones[slot]=done
+        self.legal_actions[slot]=legal_actions
+        self.tree.update([slot],[self.max_priority**self.alpha])
+        self.pos=(self.pos+1)%self.memory_size
+        self.size=min(self.size+1,self.memory_size)
+
+    def sample(self,beta:float=0.4)->Tuple:
+        """Same batch tuple as Memory.sample, importance weights go to last_weights"""
+        indices=self.tree.sample(self.batch_size,self.rng)
+        probs=self.tree.get(indices)/self.tree.total
+        weights=(self.size*probs)**-beta
+        self.last_indices=indices
+        self.last_weights=(weights/weights.max()).astype(np.float32)
+        return (self.states[indices],self.actions[indices],self.rewards[indices],self.next_states[indices],
+                self.dones[indices],tuple(self.legal_actions[i] for i in indices))
+
+    def update_priorities(self,indices:np.ndarray,td_errors:np.ndarray):
+        priorities=np.abs(td_errors)+self.eps
+        self.max_priority=max(self.max_priority,float(priorities.max()))
+        self.tree.update(indices,priorities**self.alpha)
+
+    def checkpoint_attributes(self):
+        return {
+            'memory_size':self.memory_size,
+            'batch_size':self.batch_size,
+            'memory':list(self.memory),
+        }
+
+class PrioritizedDQNAgent(DQNAgent):
+    """DQNAgent training on a PrioritizedMemory with importance weighted TD loss"""
+
+    beta_start=0.4
+    beta_steps=100000
+
+    def beta(self)->float:
+        return min(1.0,self.beta_start+(1.0-self.beta_start)*self.train_t/self.beta_steps)
+
+    def train(self):
+        state_batch,action_batch,reward_batch,next_state_batch,done_batch,legal_actions_batch=self.memory.sample(self.beta())
+        weights=self.memory.last_weights
+
+        # Double DQN target, masked to the legal next actions
+        q_values_next=self.q_estimator.predict_nograd(next_state_batch)
+        mask=np.zeros((self.batch_size,self.num_actions),dtype=bool)
+        for b,legal in enumerate(legal_actions_batch):
+            mask[b,legal]=True
+        best_actions=np.argmax(np.where(mask,q_values_next,-np.inf),axis=1)
+        q_values_next_target=self.target_estimator.predict_nograd(next_state_batch)
+        target_batch=reward_batch+np.invert(done_batch).astype(np.float32)*\
+            self.discount_factor*q_values_next_target[np.arange(self.batch_size),best_actions]
+
+        estimator=self.q_estimator
+        estimator.optimizer.zero_grad()
+        estimator.qnet.train()
+        s=torch.from_numpy(np.asarray(state_batch,dtype=np.float32)).to(self.device)
+        a=torch.from_numpy(action_batch).long().to(self.device)
+        y=torch.from_numpy(target_batch.astype(np.float32)).to(self.device)
+        w=torch.from_numpy(weights).to(self.device)
+        q=torch.gather(estimator.qnet(s),dim=-1,index=a.unsqueeze(-1)).squeeze(-1)
+        td_errors=q-y
+        loss=(w*td_errors.pow(2)).mean()
+        loss.backward()
+        estimator.optimizer.step()
+        estimator.qnet.eval()
+        self.loss=loss.item()
+        self.memory.update_priorities(self.memory.last_indices,td_errors.detach().cpu().numpy())
+
+        if self.train_t%self.update_target_estimator_every==0:
+            self.target_estimator=deepcopy(self.q_estimator)
+        self.train_t+=1
+        if self.save_path and self.train_t%self.save_every==0:
+            self.save_checkpoint(self.save_path)
+
+def use_prioritized_replay(agent:NFSPAgent,alpha:float=0.6,beta_start:float=0.4,beta_steps:int=100000,
+                           eps:float=1e-3,seed=None)->NFSPAgent:
+    """Switch agent's RL branch to prioritized replay, keeping what its memory already holds"""
+    rl=agent._rl_agent
+    memory=PrioritizedMemory(rl.memory.memory_size,rl.memory.batch_size,alpha,eps,seed)
+    memory.memory=list(rl.memory.memory)
+    rl.memory=memory
+    rl.__class__=PrioritizedDQNAgent
+    rl.beta_start=beta_start
+    rl.beta_steps=beta_steps
+    return agent
@@ -0,0 +1,40 @@
+"""
+Append-only JSON line records shared by several processes
+
+Training runs append one JSON object per evaluation to a results file that a
+sweep (or a human with jq) reads while the runs are still going. Each line is
+written with a single O_APPEND write under an exclusive flock where the
+platform has one, so concurrent writers never interleave, and readers skip a
+last line that is still incomplete.
+"""
+
+from typing import List, Dict
+import os
+import json
+
+try:
+    import fcntl
+except ImportError:
+    fcntl=None
+
+def append_record(path:str,record:Dict):
+    """Append one JSON line, safe with many processes writing the same file"""
+    line=(json.dumps(record)+'\n').encode()
+    fd=os.open(path,os.O_WRONLY|os.O_APPEND|os.O_CREAT,0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd,fcntl.LOCK_EX)
+        os.write(fd,line)
+    finally:
+        os.close(fd)
+
+def read_records(path:str)->List[Dict]:
+    """All complete lines of a results file"""
+    if not os.path.exists(path):
+        return []
+    records=[]
+    with open(path) as f:
+        for line in f:
+            if line.endswith('\n'):
+                records.append(json.loads(line))
+    return records
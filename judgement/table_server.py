@@ -0,0 +1,532 @@
+"""
+Asyncio server hosting many Judgement tables against trained bots
+
+One event loop runs every table as a coroutine over its own JudgementGame, so
+thousands of concurrent tables cost a task each instead of a thread each.
+
+    - Transport: newline-delimited JSON over TCP (asyncio streams, stdlib
+      only). If the optional websockets package is installed the same
+      messages are also served over WebSocket, one JSON object per message
+    - Seats: a join claims one seat of a table, the seats nobody claims are
+      bots. A connection can sit at any number of tables, one seat at each
+      (messages carry the table id). Remote moves are checked against
+      get_legal_actions and an illegal one is answered with an error and
+      the same turn again. If a client disconnects or lets move_timeout
+      pass, a bot plays for it. A table with no connected client left is
+      abandoned, not played out
+    - Bots: PolicyBatcher queues the bot decisions of all tables and answers
+      them with one batched policy call per event loop pass (or after
+      max_wait), forced moves skip the policy
+    - Writes: every connection has an outbox drained by a single task, a
+      client that stops reading is dropped once max_outbox messages pile up
+
+Protocol (client -> server):
+    {"type": "join", "table": optional id, "players": remote seats (default 1), "cards": optional}
+    {"type": "move", "table": id, "action": action id}
+    {"type": "stats"}
+server -> client: joined, turn (with the seat's view and legal actions),
+error, round_over, game_over, stats. Cards are indices (suit*13+rank,
+suits S D H C, ranks 2..A) and card actions are 14+index, as in JudgementEnv.
+"""
+
+from typing import List, Dict, Optional, Callable, Awaitable, Any
+import json
+import time
+import asyncio
+import itertools
+import numpy as np
+from .game import JudgementGame, to_game_action
+from .env import JudgementEnv
+from .exploitability import as_policy, policy_probs
+from .agents import BASELINE_AGENTS
+
+try:
+    import websockets
+except ImportError:
+    websockets=None
+
+#result of a pending move when the client left or timed out, anything a client sends is validated
+_ABSENT=object()
+
+def encode(message:Dict)->str:
+    return json.dumps(message,separators=(',',':'))
+
+def seat_view(game:JudgementGame,seat:int)->Dict:
+    """What seat may see, in JSON types"""
+    return {
+        'hand':game.players[seat].get_hand_indices(),
+        'phase':game.phase,
+        'trump_suit':game.trump_suit,
+        'lead_suit':game.lead_suit,
+        'bids':list(game.bids),
+        'tricks_won':list(game.tricks_won),
+        'current_trick':[[player_id,card.get_index()] for player_id,card in game.current_trick],
+        'dealer_id':game.dealer_id,
+        'num_cards':game.num_cards,
+        'round':game.round_number,
+        'legal_actions':game.get_legal_actions(seat),
+    }
+
+class PolicyBatcher:
+    """
+    Collects act() calls from many tables and answers them with one policy call
+
+    policy is anything judgement.exploitability.policy_probs accepts (a
+    FrozenPolicy runs as one batched forward pass). A batch is flushed when
+    max_batch states are waiting, or once the event loop has run every other
+    ready task (max_wait=0) or after max_wait seconds.
+    """
+
+    def __init__(self,policy,max_batch:int=512,max_wait:float=0.0,greedy:bool=False,seed=None):
+        self.policy=policy
+        self.max_batch=max_batch
+        self.max_wait=max_wait
+        self.greedy=greedy
+        self.rng=np.random.default_rng(seed)
+        self._pending=[]
+        self._handle=None
+        self.batches=0
+        self.rows=0
+
+    async def act(self,state:Dict)->int:
+        """Action for an env state (obs, legal_actions, raw_legal_actions)"""
+        future=asyncio.get_running_loop().create_future()
+        self._pending.append((state,future))
+        if len(self._pending)>=self.max_batch:
+            self._flush()
+        elif self._handle is None:
+            loop=asyncio.get_running_loop()
+            self._handle=loop.call_later(self.max_wait,self._flush) if self.max_wait>0 else loop.call_soon(self._flush)
+        return await future
+
+    def _flush(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle=None
+        pending,self._pending=self._pending,[]
+        if not pending:
+            return
+        try:
+            probs=policy_probs(self.policy,[state for state,_ in pending])
+        except Exception as error:
+            for _,future in pending:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        if self.greedy:
+            actions=probs.argmax(axis=1)
+        else:
+            cumulative=probs.cumsum(axis=1)
+            draws=self.rng.random(len(pending))*cumulative[:,-1]
+            actions=(cumulative>draws[:,None]).argmax(axis=1)
+        self.batches+=1
+        self.rows+=len(pending)
+        for (_,future),action in zip(pending,actions):
+            if not future.done():
+                future.set_result(int(action))
+
+class Connection:
+    """One client, messages go out through an outbox drained by a single task"""
+
+    _ids=itertools.count()
+
+    def __init__(self,send_text:Callable[[str],Awaitable[Any]],close:Callable[[],Awaitable[Any]],max_outbox:int):
+        self.id=next(self._ids)
+        self._send_text=send_text
+        self._close=close
+        self.max_outbox=max_outbox
+        self.outbox=asyncio.Queue()
+        self.closed=False
+        #table id -> seat
+        self.seats={}
+        self._writer=asyncio.ensure_future(self._write_loop())
+
+    def send(self,message:Dict):
+        if self.closed:
+            return
+        if self.outbox.qsize()>=self.max_outbox:
+            #slow consumer, its seats fall back to bots
+            self.close()
+            return
+        self.outbox.put_nowait(encode(message))
+
+    async def _write_loop(self):
+        try:
+            while True:
+                await self._send_text(await self.outbox.get())
+        except (ConnectionError,asyncio.CancelledError):
+            pass
+        except Exception:
+            if not self.closed:
+                raise
+        finally:
+            self.closed=True
+
+    def close(self):
+        if not self.closed:
+            self.closed=True
+            self._writer.cancel()
+            asyncio.ensure_future(self._close())
+
+class Seat:
+    """A remote player at a table, pending holds the future of the move asked for"""
+
+    def __init__(self,connection:Connection):
+        self.connection=connection
+        self.pending:Optional[asyncio.Future]=None
+
+    @property
+    def active(self)->bool:
+        return self.connection is not None and not self.connection.closed
+
+class Table:
+    def __init__(self,table_id:str,game:JudgementGame,players:int):
+        self.id=table_id
+        self.game=game
+        self.players=players
+        self.seats:List[Optional[Seat]]=[None]*game.NUM_PLAYERS
+        self.joined=0
+        self.started=False
+        self.ready=asyncio.Event()
+        self.task=None
+
+class TableServer:
+    """
+    Hosts tables for remote clients, bot seats are played by policy
+
+    policy is a BASELINE_AGENTS name, a policy path or agent (judgement.exploitability.as_policy),
+    env_config the JudgementEnv config used to encode bot observations (e.g.
+    bid_features) and to set the default number of cards.
+    """
+
+    def __init__(self,policy='random',env_config:Optional[Dict]=None,max_batch:int=512,max_wait:float=0.0,
+                 greedy:bool=False,move_timeout:Optional[float]=None,max_outbox:int=10000,seed=None):
+        env_config=dict(env_config or {},allow_step_back=False)
+        self.encoder=JudgementEnv(env_config)
+        self.default_cards=env_config.get('starting_set_cards',13)
+        if isinstance(policy,str) and policy in BASELINE_AGENTS:
+            policy=BASELINE_AGENTS[policy](num_actions=self.encoder.num_actions)
+        self.batcher=PolicyBatcher(as_policy(policy),max_batch,max_wait,greedy,seed)
+        self.move_timeout=move_timeout
+        self.max_outbox=max_outbox
+        self.seed=seed
+        self.tables:Dict[str,Table]={}
+        self._table_ids=itertools.count()
+        self.tables_created=0
+        self.servers=[]
+        #metrics
+        self.connections=0
+        self.open_connections=0
+        self.tables_finished=0
+        self.tables_abandoned=0
+        self.tables_failed=0
+        self.moves=0
+        self.bot_moves=0
+        self.remote_moves=0
+        self.illegal_moves=0
+        self.timeouts=0
+
+    async def start(self,host:str='127.0.0.1',port:int=8765,websocket_port:Optional[int]=None):
+        """Listen for TCP clients (and WebSocket clients when websocket_port is set)"""
+        server=await asyncio.start_server(self._serve_tcp,host,port)
+        self.servers.append(server)
+        if websocket_port is not None:
+            if websockets is None:
+                raise RuntimeError("WebSocket transport needs the websockets package, TCP works without it")
+            self.servers.append(await websockets.serve(self._serve_websocket,host,websocket_port))
+        return server
+
+    @property
+    def port(self)->int:
+        """Port of the TCP listener (useful with port=0)"""
+        return self.servers[0].sockets[0].getsockname()[1]
+
+    async def close(self):
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+        self.servers=[]
+        for table in list(self.tables.values()):
+            if table.task is not None:
+                table.task.cancel()
+
+    async def _serve_tcp(self,reader:asyncio.StreamReader,writer:asyncio.StreamWriter):
+        async def send_text(text:str):
+            writer.write(text.encode()+b'\n')
+            await writer.drain()
+        async def close():
+            writer.close()
+        connection=self._connect(send_text,close)
+        try:
+            while not connection.closed:
+                line=await reader.readline()
+                if not line:
+                    break
+                self._dispatch(connection,line)
+        except ConnectionError:
+            pass
+        finally:
+            self._disconnect(connection)
+            writer.close()
+
+    async def _serve_websocket(self,websocket,path=None):
+        connection=self._connect(websocket.send,websocket.close)
+        try:
+            async for message in websocket:
+                self._dispatch(connection,message)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._disconnect(connection)
+
+    def _connect(self,send_text,close)->Connection:
+        self.connections+=1
+        self.open_connections+=1
+        return Connection(send_text,close,self.max_outbox)
+
+    def _dispatch(self,connection:Connection,raw):
+        try:
+            message=json.loads(raw)
+            kind=message['type']
+        except (ValueError,KeyError,TypeError):
+            connection.send({'type':'error','reason':'malformed message'})
+            return
+        if kind=='join':
+            self._join(connection,message)
+        elif kind=='move':
+            self._move(connection,message)
+        elif kind=='stats':
+            connection.send(dict(self.get_stats(),type='stats'))
+        else:
+            connection.send({'type':'error','reason':f'unknown message type {kind!r}'})
+
+    def _join(self,connection:Connection,message:Dict):
+        table_id=message.get('table')
+        table=self.tables.get(str(table_id)) if table_id is not None else None
+        if table is None:
+            players=message.get('players',1)
+            cards=message.get('cards',self.default_cards)
+            if not (isinstance(players,int) and 1<=players<=JudgementGame.NUM_PLAYERS
+                    and isinstance(cards,int) and 1<=cards<=13):
+                connection.send({'type':'error','reason':'players must be 1-4 and cards 1-13'})
+                return
+            while table_id is None or str(table_id) in self.tables:
+                #automatic ids skip the ones clients picked themselves
+                table_id=f't{next(self._table_ids)}'
+            table=self._create_table(str(table_id),players,cards)
+        if table.id in connection.seats:
+            #moves name a table, not a seat, so a connection holds one seat per table
+            connection.send({'type':'error','table':table.id,'reason':'already seated at this table'})
+            return
+        if table.started or table.joined>=table.players:
+            connection.send({'type':'error','table':table.id,'reason':'table is full'})
+            return
+        seat=table.joined
+        table.seats[seat]=Seat(connection)
+        table.joined+=1
+        connection.seats[table.id]=seat
+        connection.send({'type':'joined','table':table.id,'seat':seat,'players':table.players,
+                         'cards':table.game.starting_set_cards})
+        if table.joined==table.players:
+            table.ready.set()
+
+    def _create_table(self,table_id:str,players:int,cards:int)->Table:
+        game=JudgementGame(allow_step_back=False,starting_set_cards=cards)
+        if self.seed is not None:
+            game.dealer.seed(self.seed+self.tables_created)
+        self.tables_created+=1
+        table=Table(table_id,game,players)
+        self.tables[table_id]=table
+        table.task=asyncio.ensure_future(self._play(table))
+        return table
+
+    def _move(self,connection:Connection,message:Dict):
+        table=self.tables.get(str(message.get('table')))
+        seat=connection.seats.get(table.id) if table is not None else None
+        if seat is None:
+            connection.send({'type':'error','table':message.get('table'),'reason':'not seated at this table'})
+            return
+        pending=table.seats[seat].pending
+        if pending is None or pending.done() or table.game.current_player_id!=seat:
+            connection.send({'type':'error','table':table.id,'reason':'not your turn'})
+            return
+        pending.set_result(message.get('action'))
+
+    def _disconnect(self,connection:Connection):
+        self.open_connections-=1
+        connection.close()
+        for table_id,seat in connection.seats.items():
+            table=self.tables.get(table_id)
+            if table is None:
+                continue
+            pending=table.seats[seat].pending
+            if pending is not None and not pending.done():
+                pending.set_result(_ABSENT)
+            if not table.started:
+                #nobody else will ever fill this table
+                table.ready.set()
+        connection.seats={}
+
+    async def _bot_action(self,game:JudgementGame,legal:List[int])->int:
+        if len(legal)==1:
+            return legal[0]
+        return await self.batcher.act(self.encoder._extract_state(game.get_state(game.current_player_id)))
+
+    async def _remote_action(self,table:Table,seat:Seat,legal:List[int])->Optional[int]:
+        """The client's legal move, None if it left or timed out"""
+        game=table.game
+        while seat.active:
+            seat.pending=asyncio.get_running_loop().create_future()
+            seat.connection.send({'type':'turn','table':table.id,'seat':game.current_player_id,
+                                  'state':seat_view(game,game.current_player_id)})
+            try:
+                action=await asyncio.wait_for(seat.pending,self.move_timeout)
+            except asyncio.TimeoutError:
+                self.timeouts+=1
+                action=_ABSENT
+            finally:
+                seat.pending=None
+            if action is _ABSENT:
+                return None
+            if type(action) is int and action in legal:
+                self.remote_moves+=1
+                return action
+            self.illegal_moves+=1
+            seat.connection.send({'type':'error','table':table.id,'reason':f'illegal action {action!r}',
+                                  'legal_actions':legal})
+        return None
+
+    @staticmethod
+    def _has_clients(table:Table)->bool:
+        return any(seat is not None and seat.active for seat in table.seats)
+
+    def _broadcast(self,table:Table,message:Dict):
+        for seat in table.seats:
+            if seat is not None and seat.active:
+                seat.connection.send(message)
+
+    async def _play(self,table:Table):
+        game=table.game
+        try:
+            await table.ready.wait()
+            table.started=True
+            game.init_game()
+            while not game.is_over():
+                if not self._has_clients(table):
+                    #nobody left to play for
+                    self.tables_abandoned+=1
+                    return
+                legal=game.get_legal_actions()
+                seat=table.seats[game.current_player_id]
+                action=None
+                if seat is not None and seat.active:
+                    action=await self._remote_action(table,seat,legal)
+                bot=action is None
+                if bot:
+                    action=await self._bot_action(game,legal)
+                round_number=game.round_number
+                game.step(to_game_action(action))
+                self.moves+=1
+                self.bot_moves+=bot
+                if game.round_number!=round_number:
+                    last=game.round_log[-1]
+                    self._broadcast(table,{'type':'round_over','table':table.id,'bids':last['bids'],
+                                           'tricks_won':last['tricks_won'],'payoffs':last['payoffs']})
+            self._broadcast(table,{'type':'game_over','table':table.id,'payoffs':list(game.get_payoffs())})
+            self.tables_finished+=1
+        except Exception as error:
+            #e.g. the bot policy raised, tell the clients instead of leaving them waiting
+            self.tables_failed+=1
+            self._broadcast(table,{'type':'error','table':table.id,'reason':f'table stopped: {error!r}'})
+        finally:
+            for seat in table.seats:
+                if seat is not None and seat.connection is not None:
+                    seat.connection.seats.pop(table.id,None)
+            if self.tables.get(table.id) is table:
+                del self.tables[table.id]
+
+    def get_stats(self)->Dict[str,float]:
+        """Table, move and batching counters"""
+        return {
+            'connections':self.connections,
+            'open_connections':self.open_connections,
+            'tables_active':len(self.tables),
+            'tables_finished':self.tables_finished,
+            'tables_abandoned':self.tables_abandoned,
+            'tables_failed':self.tables_failed,
+            'moves':self.moves,
+            'bot_moves':self.bot_moves,
+            'remote_moves':self.remote_moves,
+            'illegal_moves':self.illegal_moves,
+            'timeouts':self.timeouts,
+            'policy_batches':self.batcher.batches,
+            'mean_batch':self.batcher.rows/self.batcher.batches if self.batcher.batches else 0.0,
+        }
+
+def percentiles(samples:List[float],points=(50,90,99))->Dict[str,float]:
+    """p50/p90/p99/max in milliseconds of latencies in seconds"""
+    if not samples:
+        return {}
+    values=np.percentile(np.asarray(samples)*1000.0,list(points)+[100])
+    return dict(zip([f'p{p}' for p in points]+['max'],values.tolist()))
+
+async def _load_connection(host:str,port:int,num_tables:int,cards:Optional[int],seed:int,
+                           latencies:List[float],counters:Dict[str,int]):
+    """One client connection playing num_tables tables with random legal moves"""
+    rng=np.random.default_rng(seed)
+    reader,writer=await asyncio.open_connection(host,port)
+    sent={}
+    join={'type':'join','players':1}
+    if cards is not None:
+        join['cards']=cards
+    writer.write(b''.join((encode(join)+'\n').encode() for _ in range(num_tables)))
+    remaining=num_tables
+    while remaining:
+        line=await reader.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        message=json.loads(line)
+        kind=message['type']
+        table_id=message.get('table')
+        if kind in ('turn','game_over') and table_id in sent:
+            latencies.append(time.perf_counter()-sent.pop(table_id))
+        if kind=='turn':
+            action=int(rng.choice(message['state']['legal_actions']))
+            sent[table_id]=time.perf_counter()
+            writer.write((encode({'type':'move','table':table_id,'action':action})+'\n').encode())
+            counters['moves']+=1
+        elif kind=='game_over':
+            counters['games']+=1
+            remaining-=1
+        elif kind=='error':
+            raise RuntimeError(f"server error: {message}")
+        await writer.drain()
+    writer.close()
+
+async def run_load(host:str,port:int,num_tables:int,connections:int=8,cards:Optional[int]=None,
+                   seed:int=0)->Dict:
+    """
+    Play num_tables one-client tables spread over connections connections and
+    report per-move latency (move sent until the next turn or game over of that
+    table, i.e. including the bots' moves) with the server's counters
+    """
+    latencies=[]
+    counters={'moves':0,'games':0}
+    start=time.perf_counter()
+    shares=[num_tables//connections+(i<num_tables%connections) for i in range(connections)]
+    await asyncio.gather(*(_load_connection(host,port,share,cards,seed+i,latencies,counters)
+                           for i,share in enumerate(shares) if share))
+    elapsed=time.perf_counter()-start
+    reader,writer=await asyncio.open_connection(host,port)
+    writer.write((encode({'type':'stats'})+'\n').encode())
+    server_stats=json.loads(await reader.readline())
+    writer.close()
+    server_stats.pop('type',None)
+    return {
+        'games':counters['games'],
+        'moves':counters['moves'],
+        'seconds':elapsed,
+        'moves_per_second':counters['moves']/elapsed if elapsed else 0.0,
+        'latency_ms':percentiles(latencies),
+        'server':server_stats,
+    }
@@ -0,0 +1,110 @@
+"""
+Completed tricks of a round in fixed size arrays
+
+One (13, 6) int8 buffer holds, per trick, the four card indices in play order,
+the leader and the winner (-1 for unused rows), next to a 52-bit mask of played
+cards and a trick counter. Copies share the buffer copy-on-write: a history only
+duplicates its 78 bytes when it records a trick while shared, so the copies
+made by get_state and step_back snapshots are O(1) at any point of the round.
+
+TrickHistory also behaves like the old list of
+{'winner_id': int, 'cards': [(player_id, JudgementCard), ...]} dicts (len,
+indexing, iteration), so existing callers keep working.
+"""
+
+from typing import List, Dict, Tuple, Iterator, Union
+import numpy as np
+from .card import JudgementCard, CARDS
+
+MAX_TRICKS=13
+NUM_PLAYERS=4
+
+class TrickHistory:
+    """Completed tricks in play order, with a dict view for compatibility"""
+
+    __slots__=('data','played_mask','num_tricks','_shared')
+
+    def __init__(self):
+        self.data=np.full((MAX_TRICKS,NUM_PLAYERS+2),-1,dtype=np.int8)
+        self.played_mask=0
+        self.num_tricks=0
+        self._shared=False
+
+    @property
+    def cards(self)->np.ndarray:
+        """(13, 4) card indices in play order"""
+        return self.data[:,:NUM_PLAYERS]
+
+    @property
+    def leaders(self)->np.ndarray:
+        return self.data[:,NUM_PLAYERS]
+
+    @property
+    def winners(self)->np.ndarray:
+        return self.data[:,NUM_PLAYERS+1]
+
+    def add_trick(self,trick:List[Tuple[int,JudgementCard]],winner_id:int):
+        """Record a completed trick, trick is the (player_id, card) list in play order"""
+        if self._shared:
+            self.data=self.data.copy()
+            self._shared=False
+        row=self.data[self.num_tricks]
+        for i,(_,card) in enumerate(trick):
+            card_index=card.get_index()
+            row[i]=card_index
+            self.played_mask|=1<<card_index
+        row[NUM_PLAYERS]=trick[0][0]
+        row[NUM_PLAYERS+1]=winner_id
+        self.num_tricks+=1
+
+    def copy(self)->'TrickHistory':
+        other=TrickHistory.__new__(TrickHistory)
+        other.data=self.data
+        other.played_mask=self.played_mask
+        other.num_tricks=self.num_tricks
+        other._shared=self._shared=True
+        return other
+
+    def played_cards(self)->np.ndarray:
+        """Indices of every card played so far"""
+        return self.cards[:self.num_tricks].ravel()
+
+    @classmethod
+    def from_dicts(cls,tricks:List[Dict])->'TrickHistory':
+        history=cls()
+        for trick in tricks:
+            history.add_trick(trick['cards'],trick['winner_id'])
+        return history
+
+    def _trick(self,i:int)->Dict:
+        leader=int(self.leaders[i])
+        return {
+            'winner_id':int(self.winners[i]),
+            'cards':[((leader+j)%NUM_PLAYERS,CARDS[c]) for j,c in enumerate(self.cards[i].tolist())],
+        }
+
+    def __len__(self)->int:
+        return self.num_tricks
+
+    def __getitem__(self,i:Union[int,slice])->Union[Dict,List[Dict]]:
+        if isinstance(i,slice):
+            return [self._trick(j) for j in range(*i.indices(self.num_tricks))]
+        if i<0:
+            i+=self.num_tricks
+        if not 0<=i<self.num_tricks:
+            raise IndexError("trick index out of range")
+        return self._trick(i)
+
+    def __iter__(self)->Iterator[Dict]:
+        return (self._trick(i) for i in range(self.num_tricks))
+
+    def __eq__(self,other)->bool:
+        if isinstance(other,TrickHistory):
+            return self.num_tricks==other.num_tricks and np.array_equal(
+                self.data[:self.num_tricks],other.data[:other.num_tricks])
+        if isinstance(other,list):
+            return list(self)==other
+        return NotImplemented
+
+    def __repr__(self)->str:
+        return f"TrickHistory({list(self)})"
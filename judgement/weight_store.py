@@ -0,0 +1,181 @@
+"""
+Versioned weight broadcast through one memory-mapped file (NumPy only)
+
+A learner publishes a fixed set of named arrays (flattened network weights)
+and any number of worker processes read them without pickling or per-worker
+transfers. The file lives in /dev/shm (POSIX shared memory) unless a path is
+given, every process maps the same pages, so a host holds num_slots copies of
+the weights however many workers there are.
+
+    - Layout: magic, a JSON header (field names, dtypes, shapes, offsets), an
+      int64 control block (latest version, version held by each slot, and
+      per-slot integer counters published with the weights), then num_slots
+      data slots of 64-byte aligned fields
+    - Publish: version v goes to slot v % num_slots, the slot is marked as
+      being written (-1) first and the latest version is bumped last, so a
+      reader never picks a half written slot. Single writer
+    - Read: checking for news is one int64 load (store.version). latest()
+      returns zero-copy views into the newest slot, torch.from_numpy on them
+      maps the weights straight into a CPU network. A slot is only rewritten
+      num_slots publishes later, intact(version) tells a reader whether the
+      slot it is using was reclaimed; snapshot() copies instead and retries
+      until the copy is consistent
+    - Pickling a store pickles its path, a worker re-maps the file on unpickle
+"""
+
+from typing import Dict, Optional, Sequence, Tuple
+import os
+import json
+import mmap
+import tempfile
+import weakref
+import numpy as np
+
+MAGIC=b'JDGWTS01'
+ALIGN=64
+
+def _align(n:int)->int:
+    return (n+ALIGN-1)//ALIGN*ALIGN
+
+def _unlink(path:str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+class WeightStore:
+    """num_slots versions of a fixed set of named arrays in a shared memory-mapped file"""
+
+    def __init__(self,path:str):
+        """Map an existing store (use WeightStore.create to make one)"""
+        self.path=path
+        with open(path,'r+b') as f:
+            self._mmap=mmap.mmap(f.fileno(),0)
+        if self._mmap[:8]!=MAGIC:
+            raise ValueError(f"{path} is not a weight store")
+        header_len=int(np.frombuffer(self._mmap,dtype=np.int64,count=1,offset=8)[0])
+        header=json.loads(bytes(self._mmap[16:16+header_len]))
+        self.num_slots=header['num_slots']
+        self.num_counters=header['num_counters']
+        self.slot_bytes=header['slot_bytes']
+        self.fields=[(name,np.dtype(dtype),tuple(shape),offset) for name,dtype,shape,offset in header['fields']]
+        control=_align(16+header_len)
+        #[latest version, version in each slot]
+        self._control=np.frombuffer(self._mmap,dtype=np.int64,count=1+self.num_slots,offset=control)
+        self._counters=np.frombuffer(self._mmap,dtype=np.int64,count=self.num_slots*max(1,self.num_counters),
+                                     offset=_align(control+8*(1+self.num_slots))).reshape(self.num_slots,-1)
+        self.data_offset=header['data_offset']
+        self._slots=[self._slot_views(slot) for slot in range(self.num_slots)]
+
+    @classmethod
+    def create(cls,arrays:Dict[str,np.ndarray],path:Optional[str]=None,num_slots:int=3,
+               num_counters:int=0)->'WeightStore':
+        """
+        New store shaped like arrays (their values are not published)
+        Without a path a temporary file in /dev/shm is used and removed again
+        when the creating store is closed or garbage collected
+        """
+        if num_slots<2:
+            raise ValueError("a weight store needs at least 2 slots")
+        fields=[]
+        offset=0
+        for name,value in arrays.items():
+            value=np.asarray(value)
+            fields.append([name,value.dtype.str,list(value.shape),offset])
+            offset=_align(offset+value.nbytes)
+        slot_bytes=max(offset,ALIGN)
+        header={'num_slots':num_slots,'num_counters':num_counters,'slot_bytes':slot_bytes,'fields':fields}
+        #data_offset depends on the header length, settle it before writing
+        header['data_offset']=0
+        for _ in range(2):
+            header_len=len(json.dumps(header).encode())
+            control=_align(16+header_len)
+            counters=_align(control+8*(1+num_slots))
+            header['data_offset']=_align(counters+8*num_slots*max(1,num_counters))
+        encoded=json.dumps(header).encode()
+        temporary=path is None
+        if temporary:
+            fd,path=tempfile.mkstemp(prefix='judgement_weights_',suffix='.bin',
+                                     dir='/dev/shm' if os.path.isdir('/dev/shm') else None)
+        else:
+            fd=os.open(path,os.O_RDWR|os.O_CREAT|os.O_TRUNC,0o600)
+        try:
+            os.ftruncate(fd,header['data_offset']+num_slots*slot_bytes)
+            os.pwrite(fd,MAGIC+np.int64(len(encoded)).tobytes()+encoded,0)
+        finally:
+            os.close(fd)
+        store=cls(path)
+        store._control[1:]=-1
+        if temporary:
+            store._finalizer=weakref.finalize(store,_unlink,path)
+        return store
+
+    def _slot_views(self,slot:int)->Dict[str,np.ndarray]:
+        base=self.data_offset+slot*self.slot_bytes
+        return {name:np.frombuffer(self._mmap,dtype=dtype,count=int(np.prod(shape)),offset=base+offset).reshape(shape)
+                for name,dtype,shape,offset in self.fields}
+
+    @property
+    def version(self)->int:
+        """Latest published version (0 before the first publish)"""
+        return int(self._control[0])
+
+    @property
+    def nbytes(self)->int:
+        return self.data_offset+self.num_slots*self.slot_bytes
+
+    def publish(self,arrays:Dict[str,np.ndarray],counters:Sequence[int]=())->int:
+        """Copy arrays (and counters) into the next slot and return the new version"""
+        version=self.version+1
+        slot=version%self.num_slots
+        self._control[1+slot]=-1
+        views=self._slots[slot]
+        for name,_,_,_ in self.fields:
+            views[name][...]=arrays[name]
+        self._counters[slot]=0
+        self._counters[slot,:len(counters)]=counters
+        self._control[1+slot]=version
+        self._control[0]=version
+        return version
+
+    def intact(self,version:int)->bool:
+        """Whether the slot of version still holds it (views from latest() are unchanged)"""
+        return version>0 and int(self._control[1+version%self.num_slots])==version
+
+    def latest(self)->Tuple[int,Dict[str,np.ndarray],np.ndarray]:
+        """(version, zero-copy arrays, counters) of the newest publish"""
+        while True:
+            version=self.version
+            if version==0:
+                raise RuntimeError("nothing published yet")
+            slot=version%self.num_slots
+            if self.intact(version):
+                return version,self._slots[slot],self._counters[slot,:self.num_counters]
+
+    def snapshot(self)->Tuple[int,Dict[str,np.ndarray],np.ndarray]:
+        """Like latest() but private copies, retried if the slot was rewritten while copying"""
+        while True:
+            version,views,counters=self.latest()
+            arrays={name:view.copy() for name,view in views.items()}
+            counters=counters.copy()
+            if self.intact(version):
+                return version,arrays,counters
+
+    def close(self):
+        """Unmap (once no views are left) and remove a temporary file this store created"""
+        self._slots=[]
+        self._control=self._counters=None
+        try:
+            self._mmap.close()
+        except BufferError:
+            #arrays or tensors still map the file, the mapping goes with them
+            pass
+        finalizer=getattr(self,'_finalizer',None)
+        if finalizer is not None:
+            finalizer()
+
+    def __getstate__(self):
+        return {'path':self.path}
+
+    def __setstate__(self,state):
+        self.__init__(state['path'])
@@ -0,0 +1,94 @@
+"""
+Pre-warmed process pools for short-lived simulation and evaluation jobs
+
+Spawned workers re-import NumPy, rlcard (and torch, when a module pulls it in)
+one by one, which can dwarf a short job. WarmPool uses the forkserver start
+method instead: the server imports the preload modules once and every worker is
+forked from it with those modules already in memory. Each worker then loads
+the policy once in its initializer (worker_policy() returns it inside tasks),
+and the pool waits until every worker has finished that before returning,
+so the first batch of tasks does not pay any startup cost.
+
+Platforms without forkserver fall back to spawn with the same interface.
+"""
+
+from typing import List, Dict, Tuple, Optional, Callable, Iterable, Sequence
+import threading
+import multiprocessing as mp
+
+DEFAULT_PRELOAD=('numpy','judgement.game','judgement.env','judgement.frozen_policy')
+
+_policy=None
+
+def worker_policy():
+    """Policy loaded by this worker's initializer (None if the pool has none)"""
+    return _policy
+
+def init_worker(policy=None,initializer:Optional[Callable]=None,initargs:Tuple=(),barrier=None):
+    """
+    Worker initializer: load the policy, run the user initializer, then wait for
+    the other workers so the pool is fully warm when the constructor returns
+    policy is anything judgement.exploitability.as_policy accepts (agent or path)
+    """
+    global _policy
+    if policy is not None:
+        from .exploitability import as_policy
+        _policy=as_policy(policy)
+    if initializer is not None:
+        initializer(*initargs)
+    if barrier is not None:
+        try:
+            barrier.wait()
+        except threading.BrokenBarrierError:
+            #workers replacing dead ones after warm up find the barrier aborted
+            pass
+
+def warm_context(preload:Sequence[str]=DEFAULT_PRELOAD):
+    """forkserver context preloading preload (spawn where there is no forkserver)"""
+    if 'forkserver' in mp.get_all_start_methods():
+        ctx=mp.get_context('forkserver')
+        #only takes effect if this process has not started its forkserver yet
+        ctx.set_forkserver_preload(list(preload))
+        return ctx
+    return mp.get_context('spawn')
+
+def _ready(_)->bool:
+    return True
+
+class WarmPool:
+    """multiprocessing.Pool whose workers start with the heavy modules and the policy loaded"""
+
+    def __init__(self,num_workers:int,policy=None,preload:Sequence[str]=DEFAULT_PRELOAD,
+                 initializer:Optional[Callable]=None,initargs:Tuple=()):
+        self.ctx=warm_context(preload)
+        self.num_workers=num_workers
+        barrier=self.ctx.Barrier(num_workers)
+        self.pool=self.ctx.Pool(num_workers,initializer=init_worker,
+                                initargs=(policy,initializer,initargs,barrier))
+        #every worker is past the barrier once it can run a task
+        self.pool.map(_ready,range(num_workers),chunksize=1)
+        barrier.abort()
+
+    def map(self,func:Callable,iterable:Iterable,chunksize:Optional[int]=None)->List:
+        return self.pool.map(func,iterable,chunksize)
+
+    def imap_unordered(self,func:Callable,iterable:Iterable,chunksize:int=1):
+        return self.pool.imap_unordered(func,iterable,chunksize)
+
+    def apply_async(self,func:Callable,args:Tuple=(),kwds:Optional[Dict]=None):
+        return self.pool.apply_async(func,args,kwds or {})
+
+    def close(self):
+        """Let queued tasks finish, then stop the workers"""
+        self.pool.close()
+        self.pool.join()
+
+    def terminate(self):
+        self.pool.terminate()
+        self.pool.join()
+
+    def __enter__(self)->'WarmPool':
+        return self
+
+    def __exit__(self,*exc):
+        self.terminate()
@@ -0,0 +1,50 @@
+import argparse
+import asyncio
+import json
+
+from judgement.table_server import run_load
+from serve_tables import make_server
+
+async def run(args):
+    server = None
+    host, port = args.host, args.port
+    if args.local:
+        # Server in this process and event loop, a self-contained benchmark
+        server = make_server(args)
+        await server.start('127.0.0.1', 0)
+        host, port = '127.0.0.1', server.port
+    print(f"Playing {args.tables} tables over {args.connections} connections against {host}:{port}...")
+    result = await run_load(host, port, args.tables, args.connections, args.cards, args.seed or 0)
+    if server is not None:
+        await server.close()
+    latency = result['latency_ms']
+    print(f"  >> Games: {result['games']} | client moves: {result['moves']} in {result['seconds']:.1f}s ({result['moves_per_second']:.0f}/s)")
+    print(f"  >> Move latency: p50 {latency['p50']:.1f}ms | p90 {latency['p90']:.1f}ms | p99 {latency['p99']:.1f}ms | max {latency['max']:.1f}ms")
+    stats = result['server']
+    print(f"  >> Server: {stats['moves']} moves ({stats['bot_moves']} bot) | {stats['policy_batches']} policy batches, mean size {stats['mean_batch']:.1f}")
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(result, f, indent=2)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Load generator for serve_tables.py, reports per-move latency percentiles")
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--tables', type=int, default=1000)
+    parser.add_argument('--connections', type=int, default=16)
+    parser.add_argument('--cards', type=int, default=None, help="starting cards per table (server default if unset)")
+    parser.add_argument('--out', type=str, default=None, help="write the results as JSON")
+    parser.add_argument('--local', action='store_true', help="start a server in this process instead of connecting")
+    # Server options, used with --local
+    parser.add_argument('--policy', type=str, default='random')
+    parser.add_argument('--greedy', action='store_true')
+    parser.add_argument('--bid_features', action='store_true')
+    parser.add_argument('--max_batch', type=int, default=512)
+    parser.add_argument('--max_wait_ms', type=float, default=0.0)
+    parser.add_argument('--move_timeout', type=float, default=None)
+    parser.add_argument('--seed', type=int, default=None)
+
+    args = parser.parse_args()
+    if args.local and args.cards is None:
+        args.cards = 13
+    asyncio.run(run(args))
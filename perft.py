@@ -0,0 +1,24 @@
+import argparse
+
+from judgement.perft import timed_perft
+
+def run(args):
+    moves = [int(m) for m in args.moves.split(',')] if args.moves else []
+    result = timed_perft(args.seed, args.cards, args.depth, moves,
+                         num_workers=args.workers, split_depth=args.split_depth)
+    print(f"Perft seed={args.seed} cards={args.cards} moves={moves} depth={args.depth}")
+    for ply, count in enumerate(result['counts'], start=1):
+        print(f"  >> depth {ply:2d}: {count}")
+    print(f"  >> {result['nodes']} nodes in {result['seconds']:.2f}s ({result['nodes_per_sec']:.0f} nodes/sec)")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Perft node counts for JudgementGame")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cards', type=int, default=3)
+    parser.add_argument('--depth', type=int, default=10)
+    parser.add_argument('--moves', type=str, default='', help="comma separated action ids played before counting")
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--split_depth', type=int, default=2)
+
+    args = parser.parse_args()
+    run(args)
@@ -0,0 +1,43 @@
+import argparse
+import asyncio
+
+from judgement.table_server import TableServer
+
+def make_server(args):
+    """--policy is a baseline agent name, or an exported policy / NFSP checkpoint path"""
+    env_config = {'starting_set_cards': args.cards, 'bid_features': args.bid_features}
+    return TableServer(args.policy, env_config, max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000.0,
+                       greedy=args.greedy, move_timeout=args.move_timeout, seed=args.seed)
+
+async def serve(args):
+    server = make_server(args)
+    await server.start(args.host, args.port, websocket_port=args.websocket_port)
+    print(f"Serving Judgement tables on {args.host}:{server.port} (JSON lines over TCP)"
+          + (f", WebSocket on {args.websocket_port}" if args.websocket_port else ""))
+    while True:
+        await asyncio.sleep(args.report_every)
+        stats = server.get_stats()
+        print(f"  >> Tables: {stats['tables_active']} active | {stats['tables_finished']} finished | {stats['tables_abandoned']} abandoned | {stats['tables_failed']} failed | connections {stats['open_connections']}")
+        print(f"  >> Moves: {stats['moves']} ({stats['bot_moves']} bot, {stats['illegal_moves']} illegal, {stats['timeouts']} timeouts) | mean policy batch {stats['mean_batch']:.1f}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Multi-table Judgement server for remote players against bots")
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--websocket_port', type=int, default=None, help="also serve WebSocket (needs the websockets package)")
+    parser.add_argument('--policy', type=str, default='random',
+                        help="random, follow_low, bid_tracking, an exported .npz policy or an NFSP checkpoint")
+    parser.add_argument('--greedy', action='store_true', help="bots play their most likely action")
+    parser.add_argument('--cards', type=int, default=13, help="default starting cards of new tables")
+    parser.add_argument('--bid_features', action='store_true', help="policy was trained with bidding table features")
+    parser.add_argument('--max_batch', type=int, default=512)
+    parser.add_argument('--max_wait_ms', type=float, default=0.0, help="extra wait to fill bot batches")
+    parser.add_argument('--move_timeout', type=float, default=None, help="seconds before a bot plays for a silent client")
+    parser.add_argument('--report_every', type=float, default=10.0)
+    parser.add_argument('--seed', type=int, default=None)
+
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
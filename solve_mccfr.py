@@ -0,0 +1,26 @@
+import argparse
+import time
+
+from judgement.mccfr import MCCFRSolver
+
+def solve(args):
+    solver = MCCFRSolver(starting_set_cards=args.cards, seed=args.seed)
+    start = time.time()
+    solver.solve(args.iterations, num_workers=args.workers, merge_every=args.merge_every)
+    table = solver.table
+    print(f"Ran {solver.iterations} iterations in {time.time() - start:.1f}s")
+    print(f"  >> {table.num_infosets} info sets | {table.size} (info set, action) entries")
+    table.save(args.out)
+    print(f"Strategy saved to {args.out} (load with MCCFRAgent.load)")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Tabular MCCFR for small Judgement games")
+    parser.add_argument('--cards', type=int, default=2)
+    parser.add_argument('--iterations', type=int, default=10000)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--merge_every', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', type=str, default='mccfr_2cards.npz')
+
+    args = parser.parse_args()
+    solve(args)
@@ -0,0 +1,42 @@
+import argparse
+import json
+import os
+
+from judgement.sweep import SweepRunner, expand_spec
+
+def sweep(args):
+    with open(args.spec) as f:
+        spec = json.load(f)
+    configs = expand_spec(spec)
+    for config in configs:
+        # Enough evaluations inside the first rung to rank the configs on
+        config.setdefault('evaluate_every', max(1, args.min_episodes // 5))
+    runner = SweepRunner(configs, args.script, args.out_dir, args.min_episodes, args.max_episodes,
+                         eta=args.eta, threads_per_run=args.threads, max_parallel=args.parallel or None,
+                         score_window=args.score_window, overwrite=args.overwrite)
+    print(f"Sweeping {len(configs)} configs | {runner.num_slots} concurrent runs x {args.threads} threads")
+    print(f"  >> Rung budgets (episodes): {runner.budgets}")
+    print(f"  >> Results: {runner.results}")
+    summary = runner.run()
+    for result in summary[:args.top]:
+        score = 'failed' if result['score'] is None else f"{result['score']:.3f}"
+        print(f"  >> {result['run_id']}: {score} after {result['episodes']} episodes | {result['config']}")
+    with open(os.path.join(args.out_dir, 'summary.json'), 'w') as f:
+        json.dump(summary, f, indent=2)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Parallel train_nfsp.py hyperparameter sweep with successive halving")
+    parser.add_argument('--spec', type=str, required=True, help="JSON grid/random sweep spec (see judgement/sweep.py)")
+    parser.add_argument('--out_dir', type=str, default='sweeps/nfsp')
+    parser.add_argument('--script', type=str, default='train_nfsp.py')
+    parser.add_argument('--min_episodes', type=int, default=2000, help="episodes every config trains before the first cut")
+    parser.add_argument('--max_episodes', type=int, default=50000)
+    parser.add_argument('--eta', type=int, default=3, help="keep the best 1/eta at every rung (1 = no early stopping)")
+    parser.add_argument('--threads', type=int, default=1, help="cores (torch intra-op threads) per run")
+    parser.add_argument('--parallel', type=int, default=0, help="max concurrent runs (0 = cores // threads)")
+    parser.add_argument('--score_window', type=int, default=3, help="evaluations averaged into a run's score")
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--overwrite', action='store_true', help="clear the results and runs of an earlier sweep in --out_dir")
+
+    args = parser.parse_args()
+    sweep(args)
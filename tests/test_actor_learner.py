@@ -0,0 +1,88 @@
+import os
+import pytest
+import torch
+from rlcard.agents.nfsp_agent import NFSPAgent
+from judgement.actor_learner import ActorLearner, SharedWeights
+
+AGENT_KWARGS = dict(
+    num_actions=66,
+    hidden_layers_sizes=[16, 16],
+    q_mlp_layers=[16, 16],
+    min_buffer_size_to_learn=8,
+    q_replay_memory_init_size=8,
+    batch_size=8,
+    q_batch_size=8,
+)
+
+def _agents():
+    return [NFSPAgent(state_shape=[227], device=torch.device('cpu'), **AGENT_KWARGS) for _ in range(4)]
+
+def test_shared_weights_versioned_pull():
+    learner, actor, other = _agents(), _agents(), _agents()
+    weights = SharedWeights(learner)
+    version = weights.publish(learner)
+    assert weights.pull(actor, -1) == version
+    assert weights.pull(other, -1) == version
+    for a, b in zip(learner, actor):
+        for p, q in zip(a.policy_network.parameters(), b.policy_network.parameters()):
+            assert torch.equal(p, q)
+        assert b._rl_agent.total_t == a._rl_agent.total_t
+    # Actors map the same shared slot instead of holding copies
+    for a, b in zip(actor, other):
+        for p, q in zip(a._rl_agent.q_estimator.qnet.state_dict().values(),
+                        b._rl_agent.q_estimator.qnet.state_dict().values()):
+            assert p.data_ptr() == q.data_ptr()
+    # Nothing new published, nothing reloaded
+    with torch.no_grad():
+        next(actor[0].policy_network.parameters()).add_(1.0)
+    assert weights.pull(actor, version) == version
+    assert not torch.equal(next(actor[0].policy_network.parameters()),
+                           next(learner[0].policy_network.parameters()))
+    # A new publish is mapped in and the old slot survives until the store wraps around
+    with torch.no_grad():
+        next(learner[0].policy_network.parameters()).mul_(2.0)
+    new_version = weights.publish(learner)
+    assert weights.pull(actor, version) == new_version
+    assert torch.equal(next(actor[0].policy_network.parameters()), next(learner[0].policy_network.parameters()))
+    assert weights.intact(version)
+    for _ in range(3):
+        weights.publish(learner)
+    assert not weights.intact(version) and weights.intact(new_version + 3)
+
+def test_actor_learner_trains_from_actors():
+    agents = _agents()
+    learner = ActorLearner(agents, AGENT_KWARGS, {'starting_set_cards': 1},
+                           num_actors=2, queue_size=4, publish_every=2, seed=0)
+    path = learner.weights.store.path
+    seen = []
+    try:
+        learner.learn(12, on_episode=lambda i, payoffs: seen.append(i))
+    finally:
+        learner.stop()
+    assert seen == list(range(12))
+    metrics = learner.get_metrics()
+    assert metrics['episodes'] == 12
+    assert metrics['version'] == 7
+    assert metrics['transitions'] == sum(a.total_t for a in agents)
+    assert all(a.total_t > 0 for a in agents)
+    assert metrics['staleness_max'] >= 0
+    assert metrics['torn_episodes'] >= 0 and 0 <= metrics['torn_rate'] < 1
+    assert not learner.actors
+    assert not os.path.exists(path)
+
+def test_weight_slots_grow_with_actors():
+    agents = _agents()
+    sizes = []
+    for num_actors, publish_every, num_slots in [(2, 10, None), (64, 10, None), (64, 10, 5)]:
+        learner = ActorLearner(agents, AGENT_KWARGS, {'starting_set_cards': 1}, num_actors=num_actors,
+                               publish_every=publish_every, num_slots=num_slots)
+        sizes.append(learner.weights.store.num_slots)
+        if num_slots is not None:
+            # most episodes torn, one warning
+            learner.episodes, learner.actor_torn = 600, [10] * 64
+            with pytest.warns(RuntimeWarning, match='torn'):
+                learner._check_torn()
+            learner._check_torn()
+        learner.stop()
+    # a slot must outlive the ~num_actors / publish_every publishes of one actor episode
+    assert sizes == [4, 9, 5]
@@ -0,0 +1,69 @@
+import pytest
+import random
+from judgement.env import JudgementEnv
+from judgement.game import JudgementGame
+from judgement.card import JudgementCard
+from judgement.agents import (FollowLowAgent, BidTrackingAgent, winning_mask, cards_to_mask,
+                              dealer_aware_bid, lowest_rank_card, highest_rank_card)
+
+@pytest.mark.parametrize('agent_cls', [FollowLowAgent, BidTrackingAgent])
+def test_heuristic_agents_play_legal_games(agent_cls):
+    env = JudgementEnv(config={'starting_set_cards': 5, 'seed': 3})
+    env.set_agents([agent_cls(env.num_actions) for _ in range(env.num_players)])
+    for _ in range(3):
+        trajectories, payoffs = env.run(is_training=False)
+        assert len(payoffs) == 4
+
+def test_winning_mask_matches_game_rules():
+    """Cards flagged as winning are exactly those the game would let win."""
+    rng = random.Random(0)
+    for _ in range(200):
+        game = JudgementGame(starting_set_cards=5)
+        game.init_game()
+        for _ in range(4):
+            game.step(game.get_legal_actions()[0])
+        for _ in range(rng.randint(1, 3)):
+            action = rng.choice(game.get_legal_actions())
+            game.step(JudgementCard.make_from_index(action - 14))
+        player = game.players[game.current_player_id]
+        legal = game._get_playable_cards(player)
+        trump = JudgementCard.SUITS.index(game.trump_suit)
+        wins = winning_mask(cards_to_mask(legal), game.current_trick, trump)
+        for card in legal:
+            winner = max([c for _, c in game.current_trick] + [card],
+                         key=lambda c: (c.suit == game.trump_suit, c.suit == game.lead_suit, c.get_rank()))
+            assert bool(wins >> card.get_index() & 1) == (winner == card)
+
+def test_dealer_aware_bid_avoids_forbidden_total():
+    game = JudgementGame(starting_set_cards=3)
+    game.init_game()
+    for bid in (1, 1, 0):
+        game.step(bid)
+    state = game.get_state(game.dealer_id)
+    bid = dealer_aware_bid(state, game.get_legal_actions())
+    assert bid in game.get_legal_actions()
+    assert bid != 1
+
+def test_bid_tracking_ducks_after_making_bid():
+    game = JudgementGame(starting_set_cards=2)
+    game.init_game()
+    side = next(s for s in JudgementCard.SUITS if s != game.trump_suit)
+    state = {
+        'player_id': 1, 'bids': [0, 0, 1, 1], 'tricks_won': [0, 0, 0, 0],
+        'current_trick': [(0, JudgementCard(side, '9'))], 'trump_suit': game.trump_suit,
+    }
+    legal = cards_to_mask([JudgementCard(side, '5'), JudgementCard(side, '8'), JudgementCard(side, 'K')])
+    trump = JudgementCard.SUITS.index(game.trump_suit)
+    card = BidTrackingAgent().play_card(state, legal, trump)
+    # Highest card that still loses to the 9
+    assert card == JudgementCard(side, '8').get_index()
+    state['bids'][1] = 1
+    card = BidTrackingAgent().play_card(state, legal, trump)
+    assert card == JudgementCard(side, 'K').get_index()
+
+def test_rank_helpers():
+    mask = cards_to_mask([JudgementCard('S', '9'), JudgementCard('D', '3'), JudgementCard('H', 'A')])
+    assert lowest_rank_card(mask) == JudgementCard('D', '3').get_index()
+    assert highest_rank_card(mask) == JudgementCard('H', 'A').get_index()
+    spades = cards_to_mask([JudgementCard('S', '2')]) | ((1 << 13) - 1)
+    assert lowest_rank_card(mask, avoid=spades) == JudgementCard('D', '3').get_index()
@@ -0,0 +1,94 @@
+import random
+import numpy as np
+import pytest
+from judgement.game import JudgementGame, to_game_action
+from judgement.card import CARDS
+from judgement.bidding import get_seat
+from judgement.analytics import (RoundLogWriter, chunk_paths, load_rounds, round_stats, merge_stats,
+                                 analyze, build_report, format_report)
+
+def _play_games(num_games, cards=4, seed=0):
+    game = JudgementGame(allow_step_back=False, starting_set_cards=cards)
+    game.dealer.seed(seed)
+    rng = random.Random(seed)
+    logs = []
+    for _ in range(num_games):
+        game.init_game()
+        while not game.is_over():
+            game.step(to_game_action(rng.choice(game.get_legal_actions())))
+        logs.append(game.round_log)
+    return logs
+
+def _naive(logs):
+    exact, rounds, constrained, trump, tricks, totals = {}, {}, {}, 0, 0, []
+    for log in logs:
+        total = [0] * 4
+        for r in log:
+            n = r['num_cards']
+            for p in range(4):
+                key = (n, get_seat(p, r['dealer_id']))
+                rounds[key] = rounds.get(key, 0) + 1
+                exact[key] = exact.get(key, 0) + (r['bids'][p] == r['tricks_won'][p])
+                total[p] += r['payoffs'][p]
+            others = sum(r['bids']) - r['bids'][r['dealer_id']]
+            constrained[n] = constrained.get(n, 0) + (0 <= n - others <= n)
+            for leader, winner, cards in zip(r['trick_leaders'], r['trick_winners'], r['trick_cards']):
+                trump += CARDS[cards[(winner - leader) % 4]].suit == r['trump_suit']
+                tricks += 1
+        totals.extend(total)
+    return exact, rounds, constrained, trump / tricks, np.mean(totals)
+
+def test_round_log_records_trick_cards():
+    log = _play_games(1, cards=3)[0]
+    for r in log:
+        assert len(r['trick_cards']) == len(r['trick_leaders']) == r['num_cards']
+        played = sorted(c for trick in r['trick_cards'] for c in trick)
+        assert played == sorted(c for hand in r['hands'] for c in hand)
+
+def test_stats_match_python_loop(tmp_path):
+    logs = _play_games(30)
+    writer = RoundLogWriter(str(tmp_path), chunk_rounds=50)
+    for log in logs:
+        writer.add_game(log)
+    writer.close()
+    paths = chunk_paths(str(tmp_path))
+    assert len(paths) > 1
+    stats = merge_stats(round_stats(load_rounds(path)) for path in paths)
+    exact, rounds, constrained, trump_ratio, mean_total = _naive(logs)
+    for (n, seat), count in rounds.items():
+        assert stats['bid_rounds'][n, seat] == count
+        assert stats['bid_exact'][n, seat] == exact[(n, seat)]
+    for n, count in constrained.items():
+        assert stats['dealer_constrained'][n] == count
+    report = build_report(stats)
+    assert report['games'] == 30 and report['rounds'] == sum(len(log) for log in logs)
+    assert report['num_cards'] == [1, 2, 3, 4]
+    assert np.average(report['trump_trick_ratio'], weights=np.array(report['rounds_by_cards'])
+                      * np.array(report['num_cards'])) == pytest.approx(trump_ratio)
+    assert report['game_score']['mean'] == pytest.approx(mean_total)
+    assert report['mean_tricks'] == pytest.approx([n / 4 for n in report['num_cards']])
+    assert 'bid accuracy by seat' in format_report(report)
+
+def test_reopened_writer_continues_game_ids(tmp_path):
+    logs = _play_games(6, cards=2, seed=1)
+    for part in (logs[:4], logs[4:]):
+        writer = RoundLogWriter(str(tmp_path), chunk_rounds=10)
+        for log in part:
+            writer.add_game(log)
+        writer.close()
+    game_ids = np.concatenate([load_rounds(path)['game_id'] for path in chunk_paths(str(tmp_path))])
+    assert np.unique(game_ids).tolist() == list(range(6))
+    assert build_report(analyze(chunk_paths(str(tmp_path))))['games'] == 6
+
+def test_parallel_analysis_matches_serial(tmp_path):
+    writer = RoundLogWriter(str(tmp_path), chunk_rounds=40)
+    for log in _play_games(12, seed=3):
+        writer.add_game(log)
+    writer.close()
+    paths = chunk_paths(str(tmp_path))
+    serial = analyze(paths)
+    parallel = analyze(paths, num_workers=2)
+    for key in serial:
+        assert np.array_equal(serial[key], parallel[key])
+    with pytest.raises(ValueError):
+        analyze([])
@@ -0,0 +1,57 @@
+import pytest
+import numpy as np
+from judgement.card import JudgementCard
+from judgement.env import JudgementEnv
+from judgement.bidding import (hand_bucket, build_table, save_table, load_table, trick_distribution,
+                               expected_tricks, TableBidAgent, NUM_BUCKETS, NUM_BID_FEATURES)
+
+@pytest.fixture(scope='module')
+def table():
+    return build_table(5, starting_set_cards=4, seed=0)
+
+def test_hand_bucket_range_and_side_suit_symmetry():
+    hand = [JudgementCard('S', 'A'), JudgementCard('D', 'K'), JudgementCard('H', '2')]
+    swapped = [JudgementCard('S', 'A'), JudgementCard('H', 'K'), JudgementCard('D', '2')]
+    assert 0 <= hand_bucket(hand, 'S') < NUM_BUCKETS
+    assert hand_bucket(hand, 'S') == hand_bucket(swapped, 'S')
+    assert hand_bucket(hand, 'S') != hand_bucket(hand, 'D')
+
+def test_build_table_counts_every_dealt_hand(table):
+    # Sets of 4, 3, 2 and 1 cards: 10 rounds per game, 4 hands each
+    assert table.sum() == 5 * 10 * 4
+    # A hand never takes more tricks than it has cards
+    for num_cards in range(1, 5):
+        assert table[num_cards, :, :, num_cards + 1:].sum() == 0
+
+def test_table_roundtrip_and_lookup(table, tmp_path):
+    path = str(tmp_path / 'bid_table.npy')
+    save_table(table, path)
+    loaded = load_table(path)
+    assert isinstance(loaded, np.memmap)
+    assert np.array_equal(loaded, table)
+    assert load_table(str(tmp_path / 'missing.npy')) is None
+
+    hand = [JudgementCard('S', 'A')]
+    dist = trick_distribution(hand, 'S', 1, 0, loaded)
+    if dist is not None:
+        assert dist.sum() == pytest.approx(1.0)
+    assert 0.0 <= expected_tricks(hand, 'S', 1, 0, loaded) <= 1.0
+
+def test_env_bid_features(table, tmp_path):
+    path = str(tmp_path / 'bid_table.npy')
+    save_table(table, path)
+    env = JudgementEnv(config={'starting_set_cards': 4, 'bid_features': True, 'bid_table': path})
+    assert env.state_shape[0] == [227 + NUM_BID_FEATURES]
+    state, _ = env.reset()
+    assert state['obs'].shape == (227 + NUM_BID_FEATURES,)
+    with pytest.raises(FileNotFoundError):
+        JudgementEnv(config={'bid_features': True, 'bid_table': str(tmp_path / 'missing.npy')})
+
+def test_table_bid_agent_plays_legal_game(table):
+    env = JudgementEnv(config={'starting_set_cards': 4, 'seed': 1})
+    agent = TableBidAgent(env.num_actions, table=table)
+    state, _ = env.reset()
+    while not env.is_over():
+        action, _ = agent.eval_step(state)
+        assert action in state['legal_actions']
+        state, _ = env.step(action)
@@ -0,0 +1,117 @@
+import pytest
+import random
+from judgement.game import JudgementGame
+from judgement.card import JudgementCard
+from judgement.canonical import zobrist_hash, canonical_key, canonical_game_key, canonical_infoset
+
+def _to_action(game: JudgementGame, action_id: int):
+    if game.phase == 'playing':
+        return JudgementCard.make_from_index(action_id - 14)
+    return action_id
+
+def _swap_suits(card: JudgementCard, a: str, b: str) -> JudgementCard:
+    suit = {a: b, b: a}.get(card.suit, card.suit)
+    return JudgementCard(suit, card.rank)
+
+def test_zobrist_incremental_matches_full_hash():
+    """The incrementally kept hash equals a from-scratch hash, also after step_back."""
+    rng = random.Random(3)
+    game = JudgementGame(allow_step_back=True, starting_set_cards=3)
+    game.init_game()
+    hashes = [game.zobrist]
+    while not game.is_over():
+        assert game.zobrist == zobrist_hash(game)
+        action_id = rng.choice(game.get_legal_actions())
+        game.step(_to_action(game, action_id))
+        hashes.append(game.zobrist)
+    assert game.zobrist == zobrist_hash(game)
+
+    # Walk back to the start, hashes must retrace
+    hashes.pop()
+    while game.step_back():
+        assert game.zobrist == hashes.pop()
+        assert game.zobrist == zobrist_hash(game)
+
+def test_zobrist_distinguishes_bids():
+    game = JudgementGame(allow_step_back=True, starting_set_cards=3)
+    game.init_game()
+    game.step(0)
+    h0 = game.zobrist
+    game.step_back()
+    game.step(1)
+    assert game.zobrist != h0
+
+def test_canonical_key_suit_isomorphism():
+    """Swapping two non-trump suits everywhere leaves the keys unchanged."""
+    rng = random.Random(5)
+    game = JudgementGame(starting_set_cards=5)
+    game.init_game()
+    trump = game.trump_suit
+    a, b = [s for s in JudgementCard.SUITS if s != trump][:2]
+
+    mirror = JudgementGame(starting_set_cards=5)
+    mirror.init_game()
+    for p, q in zip(game.players, mirror.players):
+        q.hand = [_swap_suits(c, a, b) for c in p.hand]
+
+    for _ in range(4 + 4 * 5):
+        assert canonical_game_key(game) == canonical_game_key(mirror)
+        for pid in range(4):
+            assert canonical_key(game.get_state(pid)) == canonical_key(mirror.get_state(pid))
+        action = _to_action(game, rng.choice(game.get_legal_actions()))
+        mirrored = _swap_suits(action, a, b) if isinstance(action, JudgementCard) else action
+        game.step(action)
+        mirror.step(mirrored)
+
+def test_canonical_key_separates_trump_from_side_suit():
+    """Moving a card between trump and a side suit changes the key."""
+    game = JudgementGame(starting_set_cards=1)
+    game.init_game()
+    trump = game.trump_suit
+    side = next(s for s in JudgementCard.SUITS if s != trump)
+    game.players[1].hand = [JudgementCard(trump, 'A')]
+    trump_key = canonical_key(game.get_state(1))
+    game.players[1].hand = [JudgementCard(side, 'A')]
+    assert canonical_key(game.get_state(1)) != trump_key
+
+def test_canonical_key_played_out_equivalence():
+    """Holding the 7 after the 6 was played equals holding the 6 after the 7."""
+    keys, lossless = [], []
+    for held, gone in (('7', '6'), ('6', '7')):
+        game = JudgementGame(starting_set_cards=2)
+        game.init_game()
+        side = next(s for s in JudgementCard.SUITS if s != game.trump_suit)
+        game.phase = 'playing'
+        game.bids = [0, 0, 0, 0]
+        game.players[0].hand = [JudgementCard(side, held)]
+        game.played_cards_history = [{
+            'winner_id': 1,
+            'cards': [(1, JudgementCard(side, gone)), (2, JudgementCard(side, '2')),
+                      (3, JudgementCard(side, '3')), (0, JudgementCard(side, '4'))],
+        }]
+        keys.append(canonical_key(game.get_state(0)))
+        lossless.append(canonical_infoset(game.get_state(0), played_out=False)[0])
+    assert keys[0] == keys[1]
+    # which rank player 1 chose to play is information, the lossless key keeps it
+    assert lossless[0] != lossless[1]
+
+def test_canonical_infoset_aligns_actions_across_suit_swap():
+    """Legal actions of mirrored states line up position by position."""
+    game = JudgementGame(starting_set_cards=4)
+    game.init_game()
+    trump = game.trump_suit
+    a, b = [s for s in JudgementCard.SUITS if s != trump][:2]
+    for _ in range(4):
+        game.step(0)
+    mirror_state = game.get_state(game.current_player_id)
+    mirror_state['hand'] = [_swap_suits(c, a, b) for c in mirror_state['hand']]
+    mirror_state['legal_actions'] = [14 + c.get_index() for c in mirror_state['hand']]
+
+    key, actions = canonical_infoset(game.get_state(game.current_player_id))
+    mirror_key, mirror_actions = canonical_infoset(mirror_state)
+    assert key == mirror_key
+    for action, mirrored in zip(actions, mirror_actions):
+        card = JudgementCard.make_from_index(action - 14)
+        assert _swap_suits(card, a, b).get_index() == mirrored - 14
+    assert (canonical_infoset(game.get_state(game.current_player_id), played_out=False)[0]
+            == canonical_infoset(mirror_state, played_out=False)[0])
@@ -0,0 +1,119 @@
+import pytest
+import os
+import sys
+import json
+import random
+import subprocess
+import numpy as np
+import torch
+from rlcard.agents.nfsp_agent import NFSPAgent
+from rlcard.utils import reorganize
+from judgement.env import JudgementEnv
+from judgement.checkpoint import RunCheckpointer, TrackedReservoirBuffer
+
+def _setup(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+    env = JudgementEnv(config={'starting_set_cards': 2, 'allow_step_back': False, 'seed': seed})
+    agents = [NFSPAgent(num_actions=env.num_actions, state_shape=env.state_shape[i],
+                        hidden_layers_sizes=[16], q_mlp_layers=[16], anticipatory_param=0.5,
+                        batch_size=4, q_batch_size=4, min_buffer_size_to_learn=4,
+                        q_replay_memory_init_size=4, q_replay_memory_size=30,
+                        reservoir_buffer_capacity=12, q_update_target_estimator_every=5,
+                        device=torch.device('cpu'))
+              for i in range(env.num_players)]
+    env.set_agents(agents)
+    return env, agents
+
+def _train(env, agents, start, end, checkpointer=None):
+    for episode in range(start, end):
+        for agent in agents:
+            agent.sample_episode_policy()
+        trajectories, payoffs = env.run(is_training=True)
+        trajectories = reorganize(trajectories, payoffs)
+        for i in range(env.num_players):
+            for ts in trajectories[i]:
+                agents[i].feed(ts)
+        if checkpointer is not None and episode % 3 == 2:
+            checkpointer.save(episode)
+
+def _params(agents):
+    return [torch.cat([p.detach().flatten() for p in list(a.policy_network.parameters())
+                       + list(a._rl_agent.q_estimator.qnet.parameters())
+                       + list(a._rl_agent.target_estimator.qnet.parameters())]) for a in agents]
+
+def test_tracked_reservoir_buffer_marks_written_slots():
+    np.random.seed(0)
+    buffer = TrackedReservoirBuffer(3)
+    for i in range(3):
+        buffer.add(i)
+    assert buffer.dirty == {0, 1, 2}
+    buffer.dirty = set()
+    for i in range(20):
+        buffer.add(i)
+    assert buffer.dirty and buffer.dirty <= {0, 1, 2}
+
+def test_resume_is_exact(tmp_path):
+    save_dir = str(tmp_path / 'run')
+    env, agents = _setup(0)
+    checkpointer = RunCheckpointer(save_dir, agents, envs=[env])
+    _train(env, agents, 0, 12, checkpointer)
+    checkpointer.flush()
+    # Keep a copy of the checkpoint taken after episode 11, then continue
+    _train(env, agents, 12, 18)
+    expected = _params(agents)
+    expected_memory = [[t.state for t in a._rl_agent.memory.memory] for a in agents]
+    checkpointer.close()
+
+    # Different seed on purpose: everything must come from the checkpoint
+    env2, agents2 = _setup(123)
+    checkpointer2 = RunCheckpointer(save_dir, agents2, envs=[env2])
+    assert checkpointer2.restore() == 11
+    _train(env2, agents2, 12, 18)
+    checkpointer2.close()
+    for p, q in zip(expected, _params(agents2)):
+        assert torch.equal(p, q)
+    for mem, agent in zip(expected_memory, agents2):
+        assert len(mem) == len(agent._rl_agent.memory.memory)
+        for a, b in zip(mem, agent._rl_agent.memory.memory):
+            assert np.array_equal(a, b.state)
+
+def test_old_segments_are_pruned(tmp_path):
+    save_dir = str(tmp_path / 'run')
+    env, agents = _setup(1)
+    checkpointer = RunCheckpointer(save_dir, agents, envs=[env])
+    _train(env, agents, 0, 36, checkpointer)
+    checkpointer.close()
+    files = os.listdir(save_dir)
+    assert sum(f.startswith('state_') for f in files) == 1
+    for i in range(4):
+        memory_size = agents[i]._rl_agent.memory.memory_size
+        covered = sum(seg['end'] - seg['start'] for seg in checkpointer.rl_segments[i])
+        # Only segments still overlapping the replay window are kept
+        assert covered < memory_size + max(seg['end'] - seg['start'] for seg in checkpointer.rl_segments[i])
+        assert sum(f.startswith(f'agent{i}_rl_') for f in files) == len(checkpointer.rl_segments[i])
+
+def test_restore_without_checkpoint(tmp_path):
+    env, agents = _setup(2)
+    checkpointer = RunCheckpointer(str(tmp_path / 'empty'), agents, envs=[env])
+    assert checkpointer.restore() is None
+    checkpointer.close()
+
+def _run_script(tmp_path, name, *extra):
+    script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'train_nfsp.py')
+    results = str(tmp_path / f'{name}.jsonl')
+    subprocess.run([sys.executable, script, '--cards', '2', '--evaluate_every', '3', '--evaluate_num', '20',
+                    '--checkpoint_every', '2', '--hidden', '16', '--q_mlp', '16', '--replay_size', '100',
+                    '--reservoir_size', '100', '--save_dir', str(tmp_path / name), '--results', results,
+                    '--threads', '1', *extra], check=True, capture_output=True)
+    with open(results) as f:
+        return {r['episode']: (r['payoff'], r['self_play_payoff']) for r in map(json.loads, f)}
+
+def test_script_resume_matches_uninterrupted_run(tmp_path):
+    # episode 3 is both evaluated and checkpointed, the resumed run must replay from after the evaluation
+    full = _run_script(tmp_path, 'full', '--episodes', '8')
+    first = _run_script(tmp_path, 'split', '--episodes', '4')
+    resumed = _run_script(tmp_path, 'split', '--episodes', '8', '--resume')
+    assert sorted(full) == [0, 3, 6] and sorted(first) == [0, 3]
+    assert resumed == full
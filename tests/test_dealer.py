@@ -0,0 +1,47 @@
+import pytest
+import numpy as np
+from judgement.dealer import JudgementDealer, deal_permutations, deal_hands, hands_to_masks
+from judgement.player import JudgementPlayer
+from judgement.env import JudgementEnv
+
+def test_deal_permutations_are_full_decks():
+    """Every pooled deal is a permutation of the 52 card indices."""
+    rng = np.random.default_rng(0)
+    decks = deal_permutations(rng, 64)
+    assert decks.shape == (64, 52)
+    assert decks.dtype == np.int8
+    for row in decks:
+        assert sorted(row.tolist()) == list(range(52))
+
+def test_deal_hands_batch_and_masks():
+    """Batched hands are disjoint per deal and masks match the indices."""
+    rng = np.random.default_rng(1)
+    hands = deal_hands(rng, 16, 13)
+    assert hands.shape == (16, 4, 13)
+    masks = hands_to_masks(hands)
+    assert masks.shape == (16, 4, 52)
+    assert np.all(masks.sum(axis=-1) == 13)
+    # Four 13-card hands cover the whole deck exactly once
+    assert np.all(masks.sum(axis=1) == 1)
+    assert masks[3, 2, hands[3, 2, 5]]
+
+def test_deal_round_refills_pool():
+    """The dealer refills its pool once every pooled deck has been used."""
+    dealer = JudgementDealer(pool_size=2)
+    players = [JudgementPlayer(i) for i in range(4)]
+    for _ in range(5):
+        dealer.deal_round(players, 5)
+        indices = [c for p in players for c in p.get_hand_indices()]
+        assert all(len(p.hand) == 5 for p in players)
+        assert len(set(indices)) == 20
+    assert dealer._pool.shape == (2, 52)
+    assert dealer._pool_pos == 1
+
+def test_seeded_env_deals_reproducibly():
+    """Seeding the env seeds the dealer, so deals repeat."""
+    hands = []
+    for _ in range(2):
+        env = JudgementEnv(config={'seed': 7, 'starting_set_cards': 5})
+        env.reset()
+        hands.append([p.get_hand_indices() for p in env.game.players])
+    assert hands[0] == hands[1]
@@ -0,0 +1,106 @@
+import os
+import random
+import numpy as np
+import pytest
+import torch
+from judgement.env import JudgementEnv
+from judgement.game import to_game_action
+from judgement.card import CARDS
+from judgement.exit_search import PolicyValueWeights, DeterminizedSearch, ExItDataset, determinize, _voids
+from judgement.expert_iteration import ExpertIteration, PolicyValueNet, export_weights, exit_loss
+
+def _env(cards=3, seed=0):
+    env = JudgementEnv(config={'starting_set_cards': cards, 'seed': seed})
+    env.game.init_game()
+    return env
+
+def _play_to_trick(game, plies):
+    for _ in range(plies):
+        game.step(to_game_action(game.get_legal_actions()[0]))
+
+def test_numpy_forward_matches_torch():
+    torch.manual_seed(0)
+    net = PolicyValueNet(227, (32, 16))
+    weights = PolicyValueWeights(export_weights(net))
+    obs = np.random.default_rng(0).random((5, 227), dtype=np.float32)
+    mask = np.zeros((5, 66), dtype=bool)
+    mask[:, 14:30] = True
+    probs, values = weights.evaluate(obs, mask)
+    logits, expected_values = net(torch.from_numpy(obs))
+    expected = torch.softmax(logits.masked_fill(~torch.from_numpy(mask), -1e9), dim=-1).detach().numpy()
+    assert np.allclose(probs, expected, atol=1e-5)
+    assert np.allclose(values, expected_values.detach().numpy(), atol=1e-5)
+    assert probs[:, :14].sum() == 0
+
+def test_determinize_respects_information_set():
+    env = _env(cards=5, seed=3)
+    game = env.game
+    _play_to_trick(game, 4 + 9)
+    player_id = game.current_player_id
+    voids = _voids(game)
+    played = {card.get_index() for trick in game.played_cards_history for _, card in trick['cards']}
+    played |= {card.get_index() for _, card in game.current_trick}
+    for seed in range(20):
+        hands = determinize(game, player_id, random.Random(seed))
+        assert hands[player_id] == game.players[player_id].get_hand_indices()
+        dealt = [c for hand in hands for c in hand]
+        assert len(dealt) == len(set(dealt))
+        assert not set(dealt) & played
+        for p, hand in enumerate(hands):
+            assert len(hand) == len(game.players[p].hand)
+            assert all(CARDS[c].suit not in voids[p] for c in hand)
+
+def test_search_restores_game_and_returns_legal_distribution():
+    env = _env(cards=3, seed=1)
+    game = env.game
+    weights = PolicyValueWeights(export_weights(PolicyValueNet(227, (16,))))
+    search = DeterminizedSearch(weights, env, num_determinizations=2, simulations=12, seed=0)
+    for _ in range(8):
+        hands = [p.get_hand_indices() for p in game.players]
+        zobrist, history_len, log_len = game.zobrist, len(game.history), len(game.round_log)
+        probs = search.search(game)
+        legal = game.get_legal_actions()
+        assert probs.sum() == pytest.approx(1.0)
+        assert set(np.flatnonzero(probs)) <= set(legal)
+        assert [p.get_hand_indices() for p in game.players] == hands
+        assert (game.zobrist, len(game.history), len(game.round_log)) == (zobrist, history_len, log_len)
+        game.step(to_game_action(int(np.argmax(probs))))
+
+def test_exit_loss_fits_targets():
+    torch.manual_seed(0)
+    net = PolicyValueNet(227, (32,))
+    rng = np.random.default_rng(0)
+    obs = torch.from_numpy(rng.random((64, 227), dtype=np.float32))
+    mask = torch.zeros((64, 66), dtype=torch.bool)
+    mask[:, :4] = True
+    probs = torch.zeros((64, 66))
+    probs[:, 2] = 1.0
+    value = torch.full((64,), 0.5)
+    optimizer = torch.optim.Adam(net.parameters(), lr=1e-2)
+    first = exit_loss(net, obs, mask, probs, value)[0].item()
+    for _ in range(50):
+        loss = exit_loss(net, obs, mask, probs, value)[0]
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+    assert loss.item() < first / 4
+
+def test_pipeline_writes_shards_and_publishes(tmp_path):
+    run = ExpertIteration({'starting_set_cards': 2}, str(tmp_path), num_workers=2, hidden_sizes=(32,),
+                          batch_size=16, shard_size=32, publish_every=5,
+                          num_determinizations=2, simulations=4, seed=0)
+    try:
+        run.train(15)
+    finally:
+        run.stop()
+    assert not os.path.exists(run.weights.path)
+    metrics = run.get_metrics()
+    assert metrics['steps'] == 15
+    assert metrics['version'] == 4
+    assert metrics['samples'] * 8 >= 15 * 16
+    dataset = ExItDataset(str(tmp_path / 'dataset'))
+    shard = ExItDataset.read_shard(dataset.shard_paths()[0])
+    assert shard['obs'].shape[1] == 227
+    assert np.allclose(shard['probs'].sum(axis=1), 1.0)
+    assert (shard['probs'][~shard['mask']] == 0).all()
+    assert (np.abs(shard['value']) <= 1).all()
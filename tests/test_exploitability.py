@@ -0,0 +1,50 @@
+import pytest
+import numpy as np
+import torch
+from rlcard.agents.nfsp_agent import NFSPAgent
+from rlcard.agents.random_agent import RandomAgent
+from rlcard.utils.utils import remove_illegal
+from judgement.env import JudgementEnv
+from judgement.agents import BidTrackingAgent
+from judgement.frozen_policy import FrozenPolicy
+from judgement.exploitability import exploitability, as_policy, policy_probs
+
+def test_best_response_never_below_policy():
+    result = exploitability(RandomAgent(num_actions=66), starting_set_cards=1, num_hands=4, deals_per_hand=4)
+    assert len(result['per_round']) == 1
+    for br, value in zip(result['br_value'], result['policy_value']):
+        assert br >= value - 1e-9
+    assert result['nash_conv'] > 0
+    assert result['exploitability'] == pytest.approx(result['nash_conv'] / 4)
+
+def test_deterministic_agent_and_rounds_add_up():
+    """Game totals are the sums over the rounds of a 2-card game (2, 1 and 1 cards)."""
+    result = exploitability(BidTrackingAgent(num_actions=66), starting_set_cards=2, num_hands=2, deals_per_hand=1)
+    assert [r['num_cards'] for r in result['per_round']] == [2, 1, 1]
+    per_round = np.array([r['br_value'] for r in result['per_round']])
+    np.testing.assert_allclose(per_round.sum(axis=0), result['br_value'])
+    assert result['nash_conv'] >= 0
+
+def test_parallel_matches_serial():
+    kwargs = dict(starting_set_cards=1, num_hands=4, deals_per_hand=2, seed=3)
+    serial = exploitability(RandomAgent(num_actions=66), **kwargs)
+    parallel = exploitability(RandomAgent(num_actions=66), num_workers=2, **kwargs)
+    assert parallel['nash_conv'] == pytest.approx(serial['nash_conv'])
+    np.testing.assert_allclose(parallel['br_value'], serial['br_value'])
+
+def test_nfsp_agent_batched_probs_match_act():
+    torch.manual_seed(0)
+    env = JudgementEnv(config={'starting_set_cards': 2, 'seed': 0})
+    agent = NFSPAgent(num_actions=env.num_actions, state_shape=env.state_shape[0],
+                      hidden_layers_sizes=[32], q_mlp_layers=[16], device=torch.device('cpu'))
+    agent.policy_network.eval()
+    states = []
+    state, _ = env.reset()
+    while not env.is_over():
+        states.append(state)
+        state, _ = env.step(list(state['legal_actions'])[-1])
+
+    policy = as_policy(agent)
+    assert isinstance(policy, FrozenPolicy)
+    expected = np.stack([remove_illegal(agent._act(s['obs']), list(s['legal_actions'])) for s in states])
+    np.testing.assert_allclose(policy_probs(policy, states), expected, atol=1e-5)
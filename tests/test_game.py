@@ -135,3 +135,24 @@ def test_full_game_flow():
     
     assert game.round_number == 16 # 5+4+3+2+1 completed rounds = 15, round_number increments after each
     assert game.is_over()
+
+def test_init_game_restarts_from_starting_cards():
+    """A second init_game starts over from starting_set_cards."""
+    game = JudgementGame(starting_set_cards=3)
+    for _ in range(2):
+        game.init_game()
+        assert game.num_cards == 3
+        assert game.current_set_start == 3
+        assert all(len(p.hand) == 3 for p in game.players)
+        while not game.is_over():
+            action = game.get_legal_actions()[0]
+            if game.phase == 'playing':
+                action = JudgementCard.make_from_index(action - 14)
+            game.step(action)
+        assert len(game.round_log) == 6
+
+def test_env_state_carries_raw_game_state():
+    """Heuristic agents read the raw game state next to the encoded one."""
+    env = JudgementEnv(config={'starting_set_cards': 2})
+    state, player_id = env.reset()
+    assert state['raw_state'] == env.game.get_state(player_id)
@@ -0,0 +1,61 @@
+import pytest
+import numpy as np
+from judgement.env import JudgementEnv
+from judgement.mccfr import MCCFRSolver, MCCFRAgent, InfoSetTable, round_schedule
+
+def test_round_schedule_matches_game():
+    """Rounds, card counts and dealers follow JudgementGame's set structure."""
+    assert round_schedule(3) == [(1, 3, 0), (2, 2, 0), (3, 1, 0), (4, 2, 1), (5, 1, 1), (6, 1, 2)]
+
+def test_rejects_large_games():
+    with pytest.raises(ValueError):
+        MCCFRSolver(starting_set_cards=4)
+
+def test_strategies_are_distributions():
+    solver = MCCFRSolver(starting_set_cards=2, seed=0)
+    solver.iterate(10)
+    table = solver.table
+    assert table.num_infosets > 0
+    assert table.size == table.offsets[table.num_infosets]
+    for infoset_id in range(table.num_infosets):
+        for strategy in (table.current_strategy(infoset_id), table.average_strategy(infoset_id)):
+            assert np.all(strategy >= 0)
+            assert strategy.sum() == pytest.approx(1.0)
+
+def test_merge_equals_sequential_updates():
+    """Merging a worker delta reproduces the worker's table, new info sets included."""
+    solver = MCCFRSolver(starting_set_cards=2, seed=1)
+    solver.iterate(3)
+    base = solver.table.get_state()
+
+    worker = MCCFRSolver(starting_set_cards=2, seed=2, table=InfoSetTable.from_state(base))
+    worker.iterate(3)
+    solver.table.merge(worker.table.delta(base))
+
+    assert solver.table.keys == worker.table.keys
+    size = worker.table.size
+    np.testing.assert_allclose(solver.table.regrets[:size], worker.table.regrets[:size])
+    np.testing.assert_allclose(solver.table.strategy_sum[:size], worker.table.strategy_sum[:size])
+
+def test_parallel_solve_and_save_load(tmp_path):
+    solver = MCCFRSolver(starting_set_cards=1, seed=0)
+    solver.solve(8, num_workers=2, merge_every=2)
+    assert solver.iterations == 8
+    # remainders that do not divide evenly over the workers are not rounded up
+    solver.solve(10, num_workers=4, merge_every=3)
+    assert solver.iterations == 18
+    path = str(tmp_path / 'mccfr.npz')
+    solver.table.save(path)
+
+    loaded = InfoSetTable.load(path)
+    assert loaded.keys == solver.table.keys
+    np.testing.assert_array_equal(loaded.strategy_sum[:loaded.size], solver.table.strategy_sum[:solver.table.size])
+
+def test_agent_plays_legal_games():
+    solver = MCCFRSolver(starting_set_cards=2, seed=0)
+    solver.iterate(5)
+    env = JudgementEnv({'starting_set_cards': 2, 'seed': 3})
+    env.set_agents([MCCFRAgent(solver.table) for _ in range(4)])
+    for _ in range(5):
+        trajectories, payoffs = env.run(is_training=False)
+        assert len(payoffs) == 4
@@ -0,0 +1,53 @@
+import pytest
+import copy
+from judgement.game import to_game_action
+from judgement.perft import seeded_game, perft, divide, parallel_perft
+
+# (dealer seed, starting cards, opening moves, depth) -> positions per ply
+# Any engine change must reproduce these exactly
+PERFT_REFERENCE = {
+    (0, 1, (), 8): [2, 4, 8, 12, 12, 12, 12, 12],
+    (7, 2, (), 12): [3, 9, 27, 71, 142, 284, 568, 1136, 1136, 1136, 1136, 1136],
+    (1, 3, (), 11): [4, 16, 64, 236, 708, 1180, 1652, 4248, 8496, 15104, 22656],
+    (0, 5, (1, 1, 1, 1), 6): [5, 5, 23, 26, 104, 320],
+    (0, 13, (0, 0, 0, 1), 5): [13, 37, 131, 1208, 14496],
+}
+
+def _perft_by_copy(game, depth, counts=None, ply=0):
+    """Reference walk that copies the game instead of using step_back."""
+    counts = [0] * depth if counts is None else counts
+    for action_id in game.get_legal_actions():
+        counts[ply] += 1
+        child = copy.deepcopy(game, {id(game.dealer): game.dealer})
+        child.allow_step_back = False
+        child.step(to_game_action(action_id))
+        if ply + 1 < depth and child.round_number == game.round_number:
+            _perft_by_copy(child, depth, counts, ply + 1)
+    return counts
+
+@pytest.mark.parametrize('key', sorted(PERFT_REFERENCE))
+def test_reference_counts(key):
+    seed, cards, moves, depth = key
+    assert perft(seeded_game(seed, cards, moves), depth) == PERFT_REFERENCE[key]
+
+def test_step_back_walk_matches_copy_walk():
+    game = seeded_game(3, 3)
+    assert perft(game, 8) == _perft_by_copy(game, 8)
+
+def test_perft_leaves_game_unchanged():
+    game = seeded_game(0, 5, (1, 1, 1, 1))
+    before = game.get_state(game.current_player_id)
+    perft(game, 4)
+    assert game.get_state(game.current_player_id) == before
+    assert len(game.history) == 4
+
+def test_divide_sums_to_perft():
+    game = seeded_game(0, 13, (0, 0, 0, 1))
+    assert sum(divide(game, 4).values()) == perft(game, 4)[-1]
+
+def test_parallel_matches_serial():
+    assert parallel_perft(7, 2, 12, num_workers=2, split_depth=3) == PERFT_REFERENCE[(7, 2, (), 12)]
+
+def test_illegal_opening_move_raises():
+    with pytest.raises(ValueError):
+        seeded_game(0, 1, (5,))
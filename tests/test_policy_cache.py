@@ -0,0 +1,71 @@
+import pytest
+import numpy as np
+from rlcard.agents.random_agent import RandomAgent
+from judgement.env import JudgementEnv
+from judgement.policy_cache import CachedAgent
+
+class CountingAgent:
+    """Deterministic agent that counts how often it is queried."""
+    use_raw = False
+
+    def __init__(self):
+        self.calls = 0
+
+    def step(self, state):
+        return list(state['legal_actions'].keys())[0]
+
+    def eval_step(self, state):
+        self.calls += 1
+        return list(state['legal_actions'].keys())[-1], {}
+
+@pytest.fixture
+def env():
+    return JudgementEnv(config={'starting_set_cards': 3, 'seed': 0})
+
+def test_cache_hits_on_repeated_state(env):
+    state, _ = env.reset()
+    inner = CountingAgent()
+    agent = CachedAgent(inner)
+    first = agent.eval_step(state)
+    second = agent.eval_step(state)
+    assert first[0] == second[0]
+    assert inner.calls == 1
+    stats = agent.get_stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1
+
+def test_forced_move_skips_agent(env):
+    state, _ = env.reset()
+    state = dict(state)
+    only = list(state['legal_actions'].keys())[0]
+    state['legal_actions'] = {only: None}
+    state['raw_legal_actions'] = [only]
+    inner = CountingAgent()
+    agent = CachedAgent(inner)
+    action, info = agent.eval_step(state)
+    assert action == only
+    assert info['probs'] == {only: 1.0}
+    assert inner.calls == 0
+    assert agent.get_stats()['forced'] == 1
+
+def test_lru_eviction(env):
+    state, _ = env.reset()
+    agent = CachedAgent(CountingAgent(), maxsize=2)
+    states = []
+    for bid in range(3):
+        s = dict(state)
+        s['obs'] = state['obs'].copy()
+        s['obs'][-1] = bid
+        states.append(s)
+        agent.eval_step(s)
+    assert agent.get_stats()['size'] == 2
+    # Oldest entry was evicted, so it misses again
+    agent.eval_step(states[0])
+    assert agent.get_stats()['misses'] == 4
+
+def test_stochastic_policy_resampled_on_hit(env):
+    state, _ = env.reset()
+    agent = CachedAgent(RandomAgent(num_actions=env.num_actions))
+    np.random.seed(0)
+    actions = {agent.eval_step(state)[0] for _ in range(50)}
+    assert len(actions) > 1
+    assert actions <= set(state['legal_actions'])
@@ -0,0 +1,76 @@
+import pytest
+import numpy as np
+import torch
+from rlcard.agents.nfsp_agent import NFSPAgent
+from rlcard.utils.utils import remove_illegal
+from judgement.env import JudgementEnv
+from judgement.frozen_policy import FrozenPolicy
+from judgement.policy_export import export_numpy, export_torchscript
+
+@pytest.fixture
+def trained(tmp_path):
+    """Checkpoint of an agent whose BatchNorm statistics are not the defaults."""
+    torch.manual_seed(0)
+    env = JudgementEnv(config={'starting_set_cards': 3, 'seed': 0})
+    agent = NFSPAgent(num_actions=env.num_actions, state_shape=env.state_shape[0],
+                      hidden_layers_sizes=[32, 32], q_mlp_layers=[16], device=torch.device('cpu'))
+    states = []
+    for _ in range(3):
+        state, _ = env.reset()
+        while not env.is_over():
+            states.append(state)
+            state, _ = env.step(list(state['legal_actions'])[0])
+    agent.policy_network.train()
+    with torch.no_grad():
+        agent.policy_network(torch.from_numpy(np.stack([s['obs'] for s in states])))
+    agent.policy_network.eval()
+    agent.save_checkpoint(str(tmp_path), filename='agent.pt')
+    return agent, states, str(tmp_path / 'agent.pt')
+
+def _masks(states):
+    masks = np.zeros((len(states), 66), dtype=bool)
+    for i, s in enumerate(states):
+        masks[i, list(s['legal_actions'])] = True
+    return masks
+
+def _reference(agent, states):
+    return np.stack([remove_illegal(agent._act(s['obs']), list(s['legal_actions'])) for s in states])
+
+def test_numpy_export_matches_agent(trained, tmp_path):
+    agent, states, path = trained
+    out = str(tmp_path / 'policy.npz')
+    export_numpy(path, out)
+    policy = FrozenPolicy.load(out)
+    obs = np.stack([s['obs'] for s in states])
+    probs = policy.probs(obs, _masks(states))
+    np.testing.assert_allclose(probs, _reference(agent, states), atol=1e-5)
+    action, info = policy.eval_step(states[0])
+    assert action in states[0]['legal_actions']
+    assert sum(info['probs'].values()) == pytest.approx(1.0)
+
+def test_quantized_exports_agree(trained, tmp_path):
+    agent, states, path = trained
+    obs = np.stack([s['obs'] for s in states])
+    masks = _masks(states)
+    expected = np.argmax(_reference(agent, states), axis=-1)
+
+    export_numpy(path, str(tmp_path / 'q.npz'), quantize=True)
+    assert np.load(str(tmp_path / 'q.npz'))['w0'].dtype == np.int8
+    actions = FrozenPolicy.load(str(tmp_path / 'q.npz')).act_batch(obs, masks)
+    assert np.mean(actions == expected) >= 0.95
+
+    export_torchscript(path, str(tmp_path / 'q.pt'), quantize=True)
+    module = torch.jit.load(str(tmp_path / 'q.pt'))
+    with torch.no_grad():
+        probs = module(torch.from_numpy(obs), torch.from_numpy(masks)).numpy()
+    assert np.all(probs[~masks] == 0)
+    assert np.mean(np.argmax(probs, axis=-1) == expected) >= 0.95
+
+def test_torchscript_export_matches_agent(trained, tmp_path):
+    agent, states, path = trained
+    export_torchscript(path, str(tmp_path / 'policy.pt'))
+    module = torch.jit.load(str(tmp_path / 'policy.pt'))
+    obs = torch.from_numpy(np.stack([s['obs'] for s in states]))
+    with torch.no_grad():
+        probs = module(obs, torch.from_numpy(_masks(states))).numpy()
+    np.testing.assert_allclose(probs, _reference(agent, states), atol=1e-5)
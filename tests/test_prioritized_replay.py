@@ -0,0 +1,89 @@
+import random
+import numpy as np
+import torch
+from rlcard.agents.nfsp_agent import NFSPAgent
+from rlcard.utils import reorganize
+from judgement.env import JudgementEnv
+from judgement.checkpoint import RunCheckpointer
+from judgement.prioritized_replay import SumTree, PrioritizedMemory, PrioritizedDQNAgent, use_prioritized_replay
+
+def _agents(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+    env = JudgementEnv(config={'starting_set_cards': 2, 'allow_step_back': False, 'seed': seed})
+    agents = [use_prioritized_replay(
+                  NFSPAgent(num_actions=env.num_actions, state_shape=env.state_shape[i],
+                            hidden_layers_sizes=[16], q_mlp_layers=[16], anticipatory_param=0.5,
+                            batch_size=4, q_batch_size=4, min_buffer_size_to_learn=4,
+                            q_replay_memory_init_size=4, q_replay_memory_size=30,
+                            reservoir_buffer_capacity=12, device=torch.device('cpu')),
+                  beta_steps=50, seed=i)
+              for i in range(env.num_players)]
+    env.set_agents(agents)
+    return env, agents
+
+def _train(env, agents, episodes):
+    for _ in range(episodes):
+        for agent in agents:
+            agent.sample_episode_policy()
+        trajectories, payoffs = env.run(is_training=True)
+        trajectories = reorganize(trajectories, payoffs)
+        for i in range(env.num_players):
+            for ts in trajectories[i]:
+                agents[i].feed(ts)
+
+def test_sum_tree_sampling_matches_priorities():
+    rng = np.random.default_rng(0)
+    tree = SumTree(11)
+    priorities = rng.random(11)
+    tree.update(np.arange(11), priorities)
+    tree.update([3, 3, 7], [0.0, 2.0, 0.5])
+    priorities[3], priorities[7] = 2.0, 0.5
+    assert np.isclose(tree.total, priorities.sum())
+    counts = np.bincount(tree.sample(100000, rng), minlength=11)
+    assert np.allclose(counts / counts.sum(), priorities / priorities.sum(), atol=0.01)
+
+def test_sum_tree_never_samples_empty_leaves():
+    rng = np.random.default_rng(1)
+    tree = SumTree(1000)
+    tree.update(np.arange(5), [1e-12, 1.0, 1e-12, 3.0, 1e-12])
+    leaves = tree.find(np.linspace(0, tree.total, 10001))
+    assert leaves.max() < 5
+
+def test_memory_ring_view_and_weights():
+    memory = PrioritizedMemory(5, 3, seed=0)
+    for i in range(8):
+        memory.save(np.full(2, i), i, float(i), np.full(2, i + 1), [i], i == 7)
+    assert len(memory.memory) == 5
+    assert [t.action for t in memory.memory] == [3, 4, 5, 6, 7]
+    assert memory.memory[-1].done and memory.memory[0].next_state.tolist() == [4, 4]
+    memory.update_priorities(np.array([0, 1]), np.array([10.0, 0.0]))
+    states, actions, rewards, next_states, dones, legal = memory.sample(beta=1.0)
+    assert states.shape == (3, 2) and len(legal) == 3
+    assert memory.last_weights.max() == 1.0
+    copy = PrioritizedMemory(5, 3)
+    copy.memory = list(memory.memory)
+    assert [t.action for t in copy.memory] == [3, 4, 5, 6, 7]
+
+def test_prioritized_agent_trains_and_updates_priorities():
+    env, agents = _agents(0)
+    rl = agents[0]._rl_agent
+    assert isinstance(rl, PrioritizedDQNAgent)
+    _train(env, agents, 20)
+    assert rl.train_t > 0 and np.isfinite(rl.loss)
+    assert 0.4 < rl.beta() <= 1.0
+    assert rl.memory.max_priority != 1.0
+
+def test_checkpoint_restores_prioritized_memory(tmp_path):
+    env, agents = _agents(0)
+    checkpointer = RunCheckpointer(str(tmp_path / 'run'), agents, envs=[env])
+    _train(env, agents, 15)
+    checkpointer.save(14)
+    checkpointer.close()
+    saved = [[t.action for t in agent._rl_agent.memory.memory] for agent in agents]
+    env2, agents2 = _agents(1)
+    restorer = RunCheckpointer(str(tmp_path / 'run'), agents2, envs=[env2])
+    assert restorer.restore() == 14
+    assert [[t.action for t in agent._rl_agent.memory.memory] for agent in agents2] == saved
+    restorer.close()
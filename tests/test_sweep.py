@@ -0,0 +1,89 @@
+import json
+import multiprocessing as mp
+import pytest
+from judgement.sweep import SweepRunner, expand_spec, rung_budgets, core_slots, build_command
+from judgement.records import append_record, read_records
+
+# Stands in for train_nfsp.py: evaluates every 10 episodes with payoff = --sl_lr
+STUB_SCRIPT = r'''
+import argparse, json, os
+parser = argparse.ArgumentParser()
+for name in ('sl_lr', 'episodes', 'save_dir', 'results', 'run_id', 'threads', 'checkpoint_every', 'cards'):
+    parser.add_argument('--' + name)
+parser.add_argument('--resume', action='store_true')
+args = parser.parse_args()
+os.makedirs(args.save_dir, exist_ok=True)
+marker = os.path.join(args.save_dir, 'last')
+start = int(open(marker).read()) + 1 if args.resume else 0
+assert os.environ['OMP_NUM_THREADS'] == args.threads
+for episode in range(start, int(args.episodes)):
+    if episode % 10 == 0:
+        with open(args.results, 'a') as f:
+            f.write(json.dumps({'run_id': args.run_id, 'episode': episode, 'payoff': float(args.sl_lr)}) + '\n')
+open(marker, 'w').write(str(int(args.episodes) - 1))
+'''
+
+def _append_many(path, worker):
+    for i in range(200):
+        append_record(path, {'worker': worker, 'i': i, 'pad': 'x' * 200})
+
+def test_expand_grid_and_random():
+    grid = expand_spec({'params': {'sl_lr': [0.1, 0.2], 'hidden': ['64', '128,128']}, 'fixed': {'cards': 3}})
+    assert len(grid) == 4
+    assert {(c['sl_lr'], c['hidden']) for c in grid} == {(a, b) for a in (0.1, 0.2) for b in ('64', '128,128')}
+    assert all(c['cards'] == 3 for c in grid)
+    spec = {'mode': 'random', 'num_samples': 20, 'seed': 1,
+            'params': {'sl_lr': {'log_uniform': [1e-4, 1e-2]}, 'replay_size': {'int': [10, 20]}, 'hidden': ['64']}}
+    configs = expand_spec(spec)
+    assert configs == expand_spec(spec)
+    assert all(1e-4 <= c['sl_lr'] <= 1e-2 and 10 <= c['replay_size'] <= 20 for c in configs)
+    with pytest.raises(ValueError):
+        expand_spec({'mode': 'random', 'num_samples': 1, 'params': {'x': {'normal': [0, 1]}}})
+
+def test_rungs_slots_and_command():
+    assert rung_budgets(100, 1000, 3) == [100, 300, 900, 1000]
+    assert rung_budgets(100, 1000, 1) == [1000]
+    assert core_slots(2, num_cores=5) == [[0, 1], [2, 3]]
+    assert core_slots(8, num_cores=4) == [[0, 1, 2, 3]]
+    command = build_command('train_nfsp.py', {'hidden': [64, 64], 'sl_lr': 0.01, 'resume': False},
+                            300, 'out/run000', 'out/results.jsonl', 'run000', 2, True, 100)
+    assert command[2:6] == ['--hidden', '64,64', '--sl_lr', '0.01']
+    assert command[-1] == '--resume' and '--threads' in command
+
+def test_append_record_from_many_processes(tmp_path):
+    path = str(tmp_path / 'results.jsonl')
+    workers = [mp.Process(target=_append_many, args=(path, w)) for w in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    records = read_records(path)
+    assert len(records) == 800
+    assert {(r['worker'], r['i']) for r in records} == {(w, i) for w in range(4) for i in range(200)}
+
+def test_successive_halving_keeps_best(tmp_path):
+    script = tmp_path / 'stub_train.py'
+    script.write_text(STUB_SCRIPT)
+    configs = [{'sl_lr': lr, 'cards': 1} for lr in (0.1, 0.5, 0.3, 0.9, 0.2, 0.7, 0.4, 0.8, 0.6)]
+    runner = SweepRunner(configs, str(script), str(tmp_path / 'sweep'), min_episodes=20, max_episodes=60,
+                         eta=3, threads_per_run=1, max_parallel=3, num_cores=3)
+    summary = runner.run()
+    assert runner.budgets == [20, 60]
+    assert [r['config']['sl_lr'] for r in summary[:3]] == [0.9, 0.8, 0.7]
+    assert [r['episodes'] for r in summary] == [60] * 3 + [20] * 6
+    records = read_records(runner.results)
+    stopped = {r['run_id'] for r in records if r.get('event') == 'stopped'}
+    assert len(stopped) == 6
+    # survivors resumed where the first rung stopped instead of starting over
+    best = summary[0]['run_id']
+    assert sorted(r['episode'] for r in records if r.get('run_id') == best and 'episode' in r) == [0, 10, 20, 30, 40, 50]
+    with open(tmp_path / 'sweep' / 'sweep.json') as f:
+        assert len(json.load(f)['runs']) == 9
+    # a second sweep in the same directory must not score the first one's evaluations
+    with pytest.raises(FileExistsError):
+        SweepRunner(configs, str(script), str(tmp_path / 'sweep'), min_episodes=20, max_episodes=60)
+    rerun = SweepRunner([{'sl_lr': 0.05, 'cards': 1}], str(script), str(tmp_path / 'sweep'),
+                        min_episodes=20, max_episodes=20, num_cores=1, overwrite=True)
+    assert not (tmp_path / 'sweep' / best).exists()
+    assert rerun.run()[0]['score'] == pytest.approx(0.05)
+    assert {r['run_id'] for r in read_records(rerun.results)} == {'run000'}
@@ -0,0 +1,228 @@
+import asyncio
+import json
+import numpy as np
+from judgement.env import JudgementEnv
+from judgement.frozen_policy import FrozenPolicy
+from judgement.table_server import TableServer, PolicyBatcher, run_load
+
+def _policy(seed=0, cls=FrozenPolicy):
+    rng = np.random.default_rng(seed)
+    return cls([rng.standard_normal((16, 227)), rng.standard_normal((66, 16))],
+                        [np.zeros(16), np.zeros(66)])
+
+class _Counting(FrozenPolicy):
+    calls = 0
+
+    def probs(self, obs, legal_mask):
+        _Counting.calls += 1
+        return super().probs(obs, legal_mask)
+
+async def _send(writer, message):
+    writer.write((json.dumps(message) + '\n').encode())
+    await writer.drain()
+
+async def _receive_any(reader):
+    return json.loads(await asyncio.wait_for(reader.readline(), 10))
+
+async def _receive(reader, kind):
+    # skip round summaries and the like until the wanted message arrives
+    while True:
+        message = await _receive_any(reader)
+        if message['type'] == kind:
+            return message
+
+def test_batcher_answers_concurrent_requests_in_one_call():
+    policy = _policy(cls=_Counting)
+    env = JudgementEnv({'starting_set_cards': 5, 'seed': 0})
+    states = []
+    for _ in range(40):
+        state, _ = env.reset()
+        states.append(state)
+
+    async def main():
+        batcher = PolicyBatcher(policy, seed=0)
+        return await asyncio.gather(*(batcher.act(state) for state in states)), batcher
+
+    actions, batcher = asyncio.run(main())
+    assert _Counting.calls == 1 and batcher.batches == 1 and batcher.rows == 40
+    assert all(action in state['legal_actions'] for action, state in zip(actions, states))
+
+def test_shared_table_validates_remote_moves():
+    async def main():
+        server = TableServer(_policy(), seed=0)
+        await server.start('127.0.0.1', 0)
+        clients = [await asyncio.open_connection('127.0.0.1', server.port) for _ in range(2)]
+        for reader, writer in clients:
+            await _send(writer, {'type': 'join', 'table': 'duo', 'players': 2, 'cards': 1})
+            assert (await _receive(reader, 'joined'))['table'] == 'duo'
+        # dealer is seat 0, seat 1 bids first
+        reader, writer = clients[1]
+        turn = await _receive(reader, 'turn')
+        assert turn['seat'] == 1 and turn['state']['num_cards'] == 1
+        # the other seat may not move now, and illegal actions are refused
+        await _send(clients[0][1], {'type': 'move', 'table': 'duo', 'action': 0})
+        assert (await _receive(clients[0][0], 'error'))['reason'] == 'not your turn'
+        await _send(writer, {'type': 'move', 'table': 'duo', 'action': 65})
+        error = await _receive(reader, 'error')
+        assert error['legal_actions'] == turn['state']['legal_actions']
+        turn = await _receive(reader, 'turn')
+        # a move without an action is illegal too, not a reason to hand the seat to a bot
+        await _send(writer, {'type': 'move', 'table': 'duo'})
+        assert (await _receive(reader, 'error'))['reason'] == 'illegal action None'
+        turn = await _receive(reader, 'turn')
+        # play both seats out with their first legal action
+        finished = []
+
+        async def play(reader, writer, turn=None):
+            while True:
+                if turn is None:
+                    message = await _receive_any(reader)
+                    if message['type'] == 'game_over':
+                        finished.append(message['payoffs'])
+                        return
+                    if message['type'] != 'turn':
+                        continue
+                    turn = message
+                await _send(writer, {'type': 'move', 'table': 'duo', 'action': turn['state']['legal_actions'][0]})
+                turn = None
+
+        await asyncio.gather(play(reader, writer, turn), play(*clients[0]))
+        stats = server.get_stats()
+        for _, writer in clients:
+            writer.close()
+        await server.close()
+        return finished, stats
+
+    finished, stats = asyncio.run(main())
+    assert len(finished) == 2 and finished[0] == finished[1] and len(finished[0]) == 4
+    assert stats['illegal_moves'] == 2 and stats['tables_finished'] == 1
+    assert stats['remote_moves'] == stats['moves'] // 2 and stats['bot_moves'] == stats['moves'] // 2
+
+def test_automatic_ids_skip_client_ids():
+    async def main():
+        server = TableServer('random', {'starting_set_cards': 1}, seed=0)
+        await server.start('127.0.0.1', 0)
+        clients = [await asyncio.open_connection('127.0.0.1', server.port) for _ in range(2)]
+        await _send(clients[0][1], {'type': 'join', 'table': 't0', 'players': 2})
+        await _send(clients[1][1], {'type': 'join'})
+        joined = [await _receive(reader, 'joined') for reader, _ in clients]
+        tables = sorted(server.tables)
+        for _, writer in clients:
+            writer.close()
+        await server.close()
+        return joined, tables
+
+    joined, tables = asyncio.run(main())
+    assert joined[0]['table'] == 't0' and joined[1]['table'] != 't0'
+    assert joined[1]['seat'] == 0 and tables == sorted(['t0', joined[1]['table']])
+
+def test_second_join_of_a_table_is_refused():
+    async def main():
+        server = TableServer('random', {'starting_set_cards': 1}, seed=0)
+        await server.start('127.0.0.1', 0)
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        await _send(writer, {'type': 'join', 'table': 'x', 'players': 2})
+        assert (await _receive(reader, 'joined'))['seat'] == 0
+        await _send(writer, {'type': 'join', 'table': 'x'})
+        error = await _receive(reader, 'error')
+        seats = server.tables['x'].joined
+        writer.close()
+        await server.close()
+        return error, seats
+
+    error, seats = asyncio.run(main())
+    assert error['reason'] == 'already seated at this table' and seats == 1
+
+def test_bot_takes_over_after_disconnect():
+    async def main():
+        server = TableServer('random', {'starting_set_cards': 2}, seed=0)
+        await server.start('127.0.0.1', 0)
+        clients = [await asyncio.open_connection('127.0.0.1', server.port) for _ in range(3)]
+        # a pair where one player hangs up mid-game, and a lone player who leaves
+        await _send(clients[0][1], {'type': 'join', 'table': 'pair', 'players': 2})
+        await _send(clients[1][1], {'type': 'join', 'table': 'pair'})
+        await _send(clients[2][1], {'type': 'join', 'table': 'solo'})
+        await _receive(clients[1][0], 'turn')
+        clients[1][1].close()
+        await _receive(clients[2][0], 'turn')
+        clients[2][1].close()
+        reader, writer = clients[0]
+        while True:
+            message = await _receive_any(reader)
+            if message['type'] == 'game_over':
+                break
+            if message['type'] == 'turn':
+                await _send(writer, {'type': 'move', 'table': 'pair', 'action': message['state']['legal_actions'][0]})
+        for _ in range(200):
+            if not server.tables:
+                break
+            await asyncio.sleep(0.01)
+        stats = server.get_stats()
+        writer.close()
+        await server.close()
+        return stats
+
+    stats = asyncio.run(main())
+    assert stats['tables_finished'] == 1 and stats['tables_abandoned'] == 1 and stats['tables_active'] == 0
+    # the pair's game ran to the end with a bot in the empty seat, the solo table stopped at once
+    assert stats['bot_moves'] > stats['remote_moves'] > 0
+
+def test_table_left_before_start_is_not_played():
+    async def main():
+        server = TableServer('random', {'starting_set_cards': 13}, seed=0)
+        await server.start('127.0.0.1', 0)
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        await _send(writer, {'type': 'join', 'table': 'quad', 'players': 4})
+        await _receive(reader, 'joined')
+        writer.close()
+        for _ in range(200):
+            if not server.tables:
+                break
+            await asyncio.sleep(0.01)
+        stats = server.get_stats()
+        await server.close()
+        return stats
+
+    stats = asyncio.run(main())
+    assert stats['tables_abandoned'] == 1 and stats['tables_active'] == 0 and stats['moves'] == 0
+
+class _Broken(FrozenPolicy):
+    def probs(self, obs, legal_mask):
+        raise ValueError('bad weights')
+
+def test_policy_error_stops_table_and_tells_client():
+    async def main():
+        server = TableServer(_policy(cls=_Broken), {'starting_set_cards': 3}, seed=0)
+        await server.start('127.0.0.1', 0)
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        await _send(writer, {'type': 'join'})
+        error = await _receive(reader, 'error')
+        for _ in range(200):
+            if not server.tables:
+                break
+            await asyncio.sleep(0.01)
+        stats = server.get_stats()
+        writer.close()
+        await server.close()
+        return error, stats
+
+    error, stats = asyncio.run(main())
+    assert 'bad weights' in error['reason'] and error['table'] == 't0'
+    assert stats['tables_failed'] == 1 and stats['tables_active'] == 0
+
+def test_load_generator_reports_latency():
+    async def main():
+        server = TableServer(_policy(), {'starting_set_cards': 3}, seed=0)
+        await server.start('127.0.0.1', 0)
+        result = await run_load('127.0.0.1', server.port, 60, connections=3, seed=1)
+        await server.close()
+        return result
+
+    result = asyncio.run(main())
+    assert result['games'] == 60
+    assert set(result['latency_ms']) == {'p50', 'p90', 'p99', 'max'}
+    assert result['latency_ms']['p50'] <= result['latency_ms']['max']
+    server = result['server']
+    # every seat makes the same number of moves in a game
+    assert server['moves'] == 4 * result['moves'] and server['tables_finished'] == 60
+    assert server['mean_batch'] > 1
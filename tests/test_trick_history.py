@@ -0,0 +1,72 @@
+import pytest
+import random
+import numpy as np
+from judgement.game import JudgementGame
+from judgement.env import JudgementEnv
+from judgement.card import JudgementCard
+from judgement.trick_history import TrickHistory
+
+def _play_random(game: JudgementGame, rng: random.Random, num_steps: int):
+    for _ in range(num_steps):
+        if game.is_over():
+            return
+        action_id = rng.choice(game.get_legal_actions())
+        game.step(action_id if game.phase == 'bidding' else JudgementCard.make_from_index(action_id - 14))
+
+def test_dict_view_round_trip():
+    tricks = [
+        {'winner_id': 2, 'cards': [(1, JudgementCard('S', 'A')), (2, JudgementCard('S', '2')),
+                                   (3, JudgementCard('H', '5')), (0, JudgementCard('S', '10'))]},
+        {'winner_id': 0, 'cards': [(2, JudgementCard('D', 'K')), (3, JudgementCard('D', '3')),
+                                   (0, JudgementCard('C', '4')), (1, JudgementCard('D', '9'))]},
+    ]
+    history = TrickHistory.from_dicts(tricks)
+    assert len(history) == 2
+    assert list(history) == tricks
+    assert history[-1] == tricks[1]
+    assert history[:1] == tricks[:1]
+    assert history == tricks
+    assert bin(history.played_mask).count('1') == 8
+    with pytest.raises(IndexError):
+        history[2]
+
+def test_copy_is_independent():
+    history = TrickHistory()
+    trick = [(p, JudgementCard('S', r)) for p, r in enumerate(['2', '3', '4', '5'])]
+    history.add_trick(trick, 3)
+    snapshot = history.copy()
+    history.add_trick([(p, JudgementCard('H', r)) for p, r in enumerate(['2', '3', '4', '5'])], 0)
+    assert len(snapshot) == 1
+    assert snapshot.played_mask != history.played_mask
+    assert snapshot[0]['winner_id'] == 3
+    # writing to the copy does not leak back either (copy-on-write both ways)
+    snapshot.add_trick([(p, JudgementCard('C', r)) for p, r in enumerate(['2', '3', '4', '5'])], 1)
+    assert history[1]['winner_id'] == 0
+    assert snapshot[1]['winner_id'] == 1
+
+def test_game_states_keep_their_history():
+    """States and step_back snapshots are unaffected by later tricks and rounds."""
+    rng = random.Random(0)
+    game = JudgementGame(allow_step_back=True, starting_set_cards=3)
+    game.init_game()
+    seen = []
+    while not game.is_over():
+        seen.append((game.get_state(game.current_player_id), list(game.played_cards_history)))
+        _play_random(game, rng, 1)
+    for state, tricks in seen:
+        assert list(state['played_cards_history']) == tricks
+    # walk back through every round boundary
+    for state, tricks in reversed(seen):
+        assert game.step_back()
+        assert list(game.played_cards_history) == tricks
+
+def test_observation_matches_dict_history():
+    """Observations from a list of trick dicts equal those from the arrays."""
+    env = JudgementEnv(config={'starting_set_cards': 3, 'seed': 1})
+    state, _ = env.reset()
+    rng = random.Random(1)
+    while not env.is_over():
+        raw = state['raw_state']
+        as_dicts = dict(raw, played_cards_history=list(raw['played_cards_history']))
+        np.testing.assert_array_equal(env._extract_state(as_dicts)['obs'], state['obs'])
+        state, _ = env.step(rng.choice(list(state['legal_actions'])))
@@ -0,0 +1,75 @@
+import os
+import pickle
+import multiprocessing as mp
+import numpy as np
+import pytest
+from judgement.weight_store import WeightStore
+
+def _arrays(value):
+    return {'w': np.full((64, 33), value, dtype=np.float32), 'b': np.full(33, value, dtype=np.float32),
+            'steps': np.array(int(value))}
+
+def _read_until(store, last, started, results):
+    # every snapshot must come from a single publish, whatever the writer does meanwhile
+    seen = []
+    started.set()
+    while True:
+        version, arrays, counters = store.snapshot()
+        assert np.all(arrays['w'] == version) and np.all(arrays['b'] == version)
+        assert arrays['steps'] == version and counters[0] == 10 * version
+        seen.append(version)
+        if version == last:
+            break
+    results.put(seen)
+
+def test_publish_and_zero_copy_views():
+    store = WeightStore.create(_arrays(0), num_slots=3, num_counters=2)
+    assert store.version == 0 and not store.intact(0)
+    with pytest.raises(RuntimeError):
+        store.latest()
+    version = store.publish(_arrays(1), [5, 6])
+    reader = pickle.loads(pickle.dumps(store))
+    latest, views, counters = reader.latest()
+    assert (latest, counters.tolist()) == (version, [5, 6])
+    assert views['w'].dtype == np.float32 and views['steps'].shape == ()
+    assert np.all(views['w'] == 1)
+    # both mappings are the same memory
+    views['b'][0] = 7.0
+    assert store.latest()[1]['b'][0] == 7.0
+    store.publish(_arrays(2))
+    assert reader.latest()[2].tolist() == [0, 0]
+    assert reader.intact(version)
+    store.publish(_arrays(3))
+    store.publish(_arrays(4))
+    assert not reader.intact(version) and np.all(views['w'] == 4)
+    path = store.path
+    store.close()
+    assert not os.path.exists(path)
+
+def test_explicit_path_outlives_store(tmp_path):
+    path = str(tmp_path / 'weights.bin')
+    store = WeightStore.create(_arrays(0), path=path)
+    store.publish(_arrays(3))
+    store.close()
+    reopened = WeightStore(path)
+    assert reopened.version == 1 and np.all(reopened.snapshot()[1]['w'] == 3)
+    (tmp_path / 'other.bin').write_bytes(b'\0' * 64)
+    with pytest.raises(ValueError):
+        WeightStore(str(tmp_path / 'other.bin'))
+
+def test_concurrent_reader_sees_consistent_versions():
+    store = WeightStore.create(_arrays(0), num_slots=2, num_counters=1)
+    store.publish(_arrays(1), [10])
+    ctx = mp.get_context('spawn')
+    results, started = ctx.Queue(), ctx.Event()
+    last = 300
+    reader = ctx.Process(target=_read_until, args=(store, last, started, results))
+    reader.start()
+    assert started.wait(60)
+    for version in range(2, last + 1):
+        store.publish(_arrays(version), [10 * version])
+    seen = results.get(timeout=60)
+    reader.join(timeout=10)
+    assert reader.exitcode == 0
+    assert seen == sorted(seen) and seen[-1] == last
+    store.close()
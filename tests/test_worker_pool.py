@@ -0,0 +1,46 @@
+import pytest
+import os
+import sys
+import subprocess
+import judgement
+from judgement.worker_pool import WarmPool, worker_policy
+from judgement.mccfr import MCCFRSolver
+from judgement.exploitability import exploitability
+
+def _policy_info(_):
+    policy = worker_policy()
+    return os.getpid(), type(policy).__name__, 'rlcard' in sys.modules
+
+def test_game_import_stays_light():
+    """Importing the game alone does not pull in rlcard or torch."""
+    code = ("import sys; from judgement.game import JudgementGame; "
+            "print('rlcard' in sys.modules, 'torch' in sys.modules)")
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert out.stdout.split() == ['False', 'False']
+
+def test_lazy_package_attributes():
+    assert judgement.JudgementGame.__name__ == 'JudgementGame'
+    assert 'JudgementEnv' in dir(judgement)
+    with pytest.raises(AttributeError):
+        judgement.NotAThing
+
+def test_warm_pool_loads_policy_and_preload(tmp_path):
+    solver = MCCFRSolver(starting_set_cards=1, seed=0)
+    solver.iterate(5)
+    path = str(tmp_path / 'table.npz')
+    solver.table.save(path)
+    with WarmPool(2, policy=path) as pool:
+        infos = pool.map(_policy_info, range(4))
+        assert {name for _, name, _ in infos} == {'MCCFRAgent'}
+        assert all(preloaded for _, _, preloaded in infos)
+        # the same warm pool serves repeated evaluation jobs
+        first = exploitability(pool=pool, starting_set_cards=1, num_hands=2, deals_per_hand=2)
+        second = exploitability(pool=pool, starting_set_cards=1, num_hands=2, deals_per_hand=2)
+    assert first['nash_conv'] == pytest.approx(second['nash_conv'])
+    serial = exploitability(path, starting_set_cards=1, num_hands=2, deals_per_hand=2)
+    assert serial['nash_conv'] == pytest.approx(first['nash_conv'])
+
+def test_exploitability_needs_agent_or_pool():
+    with pytest.raises(ValueError):
+        exploitability(starting_set_cards=1)
@@ -0,0 +1,64 @@
+import argparse
+import os
+
+from rlcard.utils import set_seed, tournament
+from judgement.env import JudgementEnv
+from judgement.agents import BASELINE_AGENTS
+from judgement.expert_iteration import ExpertIteration
+
+def train(args):
+    set_seed(args.seed)
+    env_config = {'starting_set_cards': args.cards}
+    eval_env = JudgementEnv(dict(env_config, allow_step_back=False))
+    opponent = BASELINE_AGENTS[args.eval_opponent](num_actions=eval_env.num_actions)
+
+    exit_run = ExpertIteration(env_config, args.save_dir, num_workers=args.workers,
+                               batch_size=args.batch_size, lr=args.lr, replay_size=args.replay_size,
+                               shard_size=args.shard_size, queue_size=args.queue_size,
+                               publish_every=args.publish_every, max_reuse=args.max_reuse,
+                               num_determinizations=args.determinizations,
+                               simulations=args.simulations, c_puct=args.c_puct, seed=args.seed)
+
+    def after_step(step, metrics):
+        if step % args.evaluate_every == 0:
+            eval_env.set_agents([exit_run.policy(), opponent, opponent, opponent])
+            rewards = tournament(eval_env, args.evaluate_num)
+            print(f"Step: {step}")
+            print(f"  >> Payoff vs {args.eval_opponent}: {rewards[0]:.3f}")
+            print(f"  >> Policy-Loss: {metrics['policy_loss']:.4f} | Value-Loss: {metrics['value_loss']:.4f}")
+            print(f"  >> Samples: {metrics['samples']} in {metrics['shards']} shards | weights v{metrics['version']} | staleness {metrics['staleness_mean']:.2f}")
+            print(f"  >> Waits: trainer {metrics['trainer_wait']:.1f}s | workers blocked {metrics['worker_put_wait']:.1f}s | queue {metrics['queue_size']}")
+            print("-" * 40)
+
+    print(f"Expert iteration with {args.workers} search workers for {args.steps} steps...")
+    try:
+        exit_run.train(args.steps, on_step=after_step)
+    finally:
+        exit_run.stop()
+    exit_run.save()
+    print(f"Training complete. Network saved to {os.path.join(args.save_dir, 'net.pt')} "
+          f"(NumPy export {exit_run.weights_path})")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Expert iteration training in Judgement Env")
+    parser.add_argument('--steps', type=int, default=20000)
+    parser.add_argument('--cards', type=int, default=13)
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument('--batch_size', type=int, default=512)
+    parser.add_argument('--lr', type=float, default=1e-3)
+    parser.add_argument('--replay_size', type=int, default=200000)
+    parser.add_argument('--shard_size', type=int, default=8192)
+    parser.add_argument('--queue_size', type=int, default=64)
+    parser.add_argument('--publish_every', type=int, default=50)
+    parser.add_argument('--max_reuse', type=float, default=8.0, help="max training passes per generated sample")
+    parser.add_argument('--determinizations', type=int, default=4)
+    parser.add_argument('--simulations', type=int, default=32, help="PUCT simulations per determinization")
+    parser.add_argument('--c_puct', type=float, default=1.5)
+    parser.add_argument('--evaluate_every', type=int, default=500)
+    parser.add_argument('--evaluate_num', type=int, default=100)
+    parser.add_argument('--eval_opponent', type=str, default='random', choices=sorted(BASELINE_AGENTS))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--save_dir', type=str, default='exit_checkpoints')
+
+    args = parser.parse_args()
+    train(args)
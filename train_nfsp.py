@@ -1,81 +1,159 @@
 import argparse
 import os
+import time
 import torch
 import numpy as np
 
 from rlcard.agents.nfsp_agent import NFSPAgent
-from rlcard.agents.random_agent import RandomAgent
 from rlcard.utils import set_seed, tournament, reorganize
 from judgement.env import JudgementEnv
+from judgement.policy_cache import CachedAgent
+from judgement.agents import BASELINE_AGENTS
+from judgement.actor_learner import ActorLearner
+from judgement.checkpoint import RunCheckpointer
+from judgement.records import append_record
+from judgement.prioritized_replay import use_prioritized_replay
+from judgement.analytics import RoundLogWriter
 
 def train(args):
     device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
     set_seed(args.seed)
+    if args.threads > 0:
+        # Several runs share the host (see sweep_nfsp.py), keep each to its own cores
+        torch.set_num_threads(args.threads)
+        torch.set_num_interop_threads(1)
+    start_time = time.time()
 
     # Training env (Self-play)
-    env = JudgementEnv({
+    env_config = {
         'allow_step_back': False,
         'starting_set_cards': args.cards,
-    })
+        'seed': args.seed,
+    }
+    env = JudgementEnv(dict(env_config))
     
-    # Evaluation env (Agent vs 3 Randoms)
+    # Evaluation env (Agent vs 3 baseline opponents)
     eval_env = JudgementEnv({
         'allow_step_back': False,
         'starting_set_cards': args.cards,
+        'seed': args.seed + 1,
     })
 
+    agent_kwargs = dict(
+        num_actions=env.num_actions,
+        hidden_layers_sizes=args.hidden,
+        q_mlp_layers=args.q_mlp,
+        anticipatory_param=0.1,
+        batch_size=args.batch_size,
+        rl_learning_rate=args.rl_lr,
+        sl_learning_rate=args.sl_lr,
+        min_buffer_size_to_learn=2000,     
+        q_replay_memory_init_size=2000,
+        q_replay_memory_size=args.replay_size,
+        reservoir_buffer_capacity=args.reservoir_size,
+    )
     agents = []
     for i in range(env.num_players):
-        agent = NFSPAgent(
-            num_actions=env.num_actions,
-            state_shape=env.state_shape[i],
-            hidden_layers_sizes=[256, 256],    
-            q_mlp_layers=[256, 256],
-            anticipatory_param=0.1,
-            batch_size=256,
-            rl_learning_rate=1e-4,             
-            sl_learning_rate=args.sl_lr,
-            min_buffer_size_to_learn=2000,     
-            q_replay_memory_init_size=2000,
-            q_replay_memory_size=100000,       
-            reservoir_buffer_capacity=100000,
-            device=device
-        )
+        agent = NFSPAgent(state_shape=env.state_shape[i], device=device, **agent_kwargs)
+        if args.replay == 'prioritized':
+            use_prioritized_replay(agent, alpha=args.per_alpha, beta_start=args.per_beta,
+                                   beta_steps=args.per_beta_steps, seed=args.seed + i)
         agents.append(agent)
 
     env.set_agents(agents)
-    random_agent = RandomAgent(num_actions=env.num_actions)
+    opponent = BASELINE_AGENTS[args.eval_opponent](num_actions=env.num_actions)
 
-    print(f"Training on {device} for {args.episodes} episodes...")
+    # Full-run checkpoints (written in the background) for --resume
+    checkpointer = None
+    start_episode = 0
+    if args.checkpoint_every or args.resume:
+        checkpointer = RunCheckpointer(os.path.join(args.save_dir, 'run'), agents, envs=[env, eval_env])
+    if args.resume:
+        last_episode = checkpointer.restore()
+        if last_episode is not None:
+            start_episode = last_episode + 1
+            print(f"Resumed from episode {last_episode}")
 
-    # 3. Training Loop
-    for episode in range(args.episodes):
-        
-        trajectories, payoffs = env.run(is_training=True)
-        trajectories = reorganize(trajectories, payoffs)
+    actor_learner = None
+    if args.actors > 0:
+        actor_learner = ActorLearner(agents, agent_kwargs, env_config, num_actors=args.actors,
+                                     queue_size=args.queue_size, publish_every=args.publish_every,
+                                     seed=args.seed, num_slots=args.weight_slots or None)
 
-        for i in range(env.num_players):
-            for ts in trajectories[i]:
-                agents[i].feed(ts)
+    # Self-play rounds in columnar chunks for analyze_logs.py
+    round_logs = RoundLogWriter(args.round_log_dir) if args.round_log_dir else None
 
+    def after_episode(episode, payoffs):
+        if round_logs is not None:
+            round_logs.add_game(env.game.round_log if actor_learner is None else actor_learner.last_round_log)
         if episode % args.evaluate_every == 0:
-            # Evaluate Agent 0 against 3 Random Agents
-            eval_env.set_agents([agents[0], random_agent, random_agent, random_agent])
+            # Evaluate Agent 0 against 3 baseline opponents
+            # Fresh cache per evaluation since agent 0 keeps training in between
+            eval_agent = CachedAgent(agents[0], maxsize=args.eval_cache_size)
+            eval_env.set_agents([eval_agent, opponent, opponent, opponent])
             rewards = tournament(eval_env, args.evaluate_num)
+            cache_stats = eval_agent.get_stats()
             rl_loss = getattr(agents[0], 'rl_loss', 0)
             sl_loss = getattr(agents[0], 'sl_loss', 0)
             
             print(f"Episode: {episode}")
-            print(f"  >> Payoff vs Random: {rewards[0]:.3f}")
+            print(f"  >> Payoff vs {args.eval_opponent}: {rewards[0]:.3f}")
             print(f"  >> Avg Payoff (Self-Play): {np.mean(payoffs):.3f}")
+            print(f"  >> Eval cache: {cache_stats['hits']} hits | {cache_stats['misses']} misses | {cache_stats['forced']} forced")
             if rl_loss: print(f"  >> RL-Loss: {rl_loss:.4f} | SL-Loss: {sl_loss:.4f}")
+            if actor_learner is not None:
+                metrics = actor_learner.get_metrics()
+                print(f"  >> Actors: v{metrics['version']} | staleness {metrics['staleness_mean']:.2f} (max {metrics['staleness_max']}) | torn {metrics['torn_episodes']} ({metrics['torn_rate']:.1%}) | queue {metrics['queue_size']}")
+                print(f"  >> Waits: learner {metrics['learner_wait']:.1f}s | actors blocked {metrics['actor_put_wait']:.1f}s")
             print("-" * 40)
+            if args.results:
+                append_record(args.results, {
+                    'run_id': args.run_id,
+                    'episode': episode,
+                    'payoff': float(rewards[0]),
+                    'self_play_payoff': float(np.mean(payoffs)),
+                    'rl_loss': float(rl_loss or 0),
+                    'sl_loss': float(sl_loss or 0),
+                    'elapsed': time.time() - start_time,
+                })
+        # After the evaluation, its games draw from the RNGs the checkpoint saves
+        if args.checkpoint_every and (episode + 1) % args.checkpoint_every == 0:
+            checkpointer.save(episode)
+
+    print(f"Training on {device} for {args.episodes} episodes...")
+
+    # 3. Training Loop
+    if actor_learner is not None:
+        # Actors simulate in parallel, this process only learns
+        try:
+            actor_learner.learn(args.episodes - start_episode,
+                                on_episode=lambda i, payoffs: after_episode(start_episode + i, payoffs))
+        finally:
+            actor_learner.stop()
+    else:
+        for episode in range(start_episode, args.episodes):
+            
+            trajectories, payoffs = env.run(is_training=True)
+            trajectories = reorganize(trajectories, payoffs)
+
+            for i in range(env.num_players):
+                for ts in trajectories[i]:
+                    agents[i].feed(ts)
+
+            after_episode(episode, payoffs)
+    if checkpointer is not None:
+        checkpointer.close()
+    if round_logs is not None:
+        round_logs.close()
 
     if not os.path.exists(args.save_dir):
         os.makedirs(args.save_dir)
     agents[0].save_checkpoint(args.save_dir, filename='best_agent_13cards.pth')
     print(f"Training complete. Model saved to {args.save_dir}")
 
+def int_list(text):
+    return [int(x) for x in text.split(',') if x]
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser("NFSP training in Judgement Env")
     parser.add_argument('--episodes', type=int, default=50000)
@@ -83,8 +161,31 @@ if __name__ == '__main__':
     parser.add_argument('--evaluate_num', type=int, default=100)
     parser.add_argument('--cards', type=int, default=13)
     parser.add_argument('--sl_lr', type=float, default=0.005)
+    parser.add_argument('--eval_cache_size', type=int, default=100000)
+    parser.add_argument('--eval_opponent', type=str, default='random', choices=sorted(BASELINE_AGENTS))
+    parser.add_argument('--actors', type=int, default=0)
+    parser.add_argument('--queue_size', type=int, default=64)
+    parser.add_argument('--publish_every', type=int, default=10)
+    parser.add_argument('--weight_slots', type=int, default=0, help="weight store slots (0 = sized from --actors)")
     parser.add_argument('--seed', type=int, default=42)
     parser.add_argument('--save_dir', type=str, default='nfsp_checkpoints')
+    parser.add_argument('--checkpoint_every', type=int, default=1000)
+    parser.add_argument('--resume', action='store_true')
+    parser.add_argument('--hidden', type=int_list, default=[256, 256], help="average policy layer sizes, e.g. 256,256")
+    parser.add_argument('--q_mlp', type=int_list, default=[256, 256], help="Q-network layer sizes")
+    parser.add_argument('--batch_size', type=int, default=256)
+    parser.add_argument('--rl_lr', type=float, default=1e-4)
+    parser.add_argument('--replay_size', type=int, default=100000)
+    parser.add_argument('--reservoir_size', type=int, default=100000)
+    parser.add_argument('--replay', type=str, default='uniform', choices=['uniform', 'prioritized'],
+                        help="Q-network replay sampling")
+    parser.add_argument('--per_alpha', type=float, default=0.6, help="priority exponent of prioritized replay")
+    parser.add_argument('--per_beta', type=float, default=0.4, help="initial importance weight exponent (annealed to 1)")
+    parser.add_argument('--per_beta_steps', type=int, default=100000, help="RL train steps to anneal beta over")
+    parser.add_argument('--threads', type=int, default=0, help="torch intra-op threads (0 = torch default)")
+    parser.add_argument('--results', type=str, default='', help="JSONL file every evaluation is appended to")
+    parser.add_argument('--run_id', type=str, default='')
+    parser.add_argument('--round_log_dir', type=str, default='', help="record every self-play round for analyze_logs.py")
 
     args = parser.parse_args()
     train(args)
\ No newline at end of file